@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Benchmark: bytes transferred with full vs ranged KEL queries
+
+Runs the v2 verification service in-process against fake_keria.py and
+replays a typical onboarding pattern:
+
+  1. cold:   verify every agent of one controller
+  2. growth: the controller appends interaction events
+  3. warm:   the cache expires and every agent is verified again
+
+Each mode (KERIA_RANGED_KEL=off / on) runs in its own subprocess so the
+service module starts from a clean cache and clean counters.
+
+Usage:
+    python3 bench_kel_ranged.py
+    python3 bench_kel_ranged.py --agents 200 --events 20000 --agent-events 50 --growth 50
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+
+
+async def run_mode(agents: int, events: int, agent_events: int, growth: int) -> dict:
+    """Executed in the child process, configured through the environment"""
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    import httpx
+    import fake_keria
+    import verification_service_keri_v2 as service
+    from vlei_verification import caches, kel_fetch, keria
+
+    fake = fake_keria.FakeKeria(controllers=1, agents=agents, events=events, agent_events=agent_events)
+    keria_app = fake_keria.create_app(fake, ranged=True)
+    keria.client = keria.create_client(transport=httpx.ASGITransport(app=keria_app))
+
+    controller = fake.controllers[0]
+    phases = {}
+    async with httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=service.app),
+        base_url="http://verifier"
+    ) as client:
+        async def verify_all(label: str):
+            fake.reset_stats()
+            start = time.perf_counter()
+            valid = 0
+            for agent in fake.agents[controller]:
+                response = await client.post(
+                    "/verify/agent-delegation",
+                    json={"aid": controller, "agent_aid": agent}
+                )
+                valid += response.status_code == 200
+            phases[label] = {
+                "valid": valid,
+                "seconds": time.perf_counter() - start,
+                **fake.stats()
+            }
+
+        await verify_all("cold")
+        fake.append_filler(controller, growth)
+        for entry in caches.kel_cache.entries.values():
+            entry.checked_at -= caches.kel_cache.ttl
+        await verify_all("warm")
+
+    await keria.client.aclose()
+    return {"phases": phases, "cache": caches.kel_cache.stats(), "transfer": kel_fetch.kel_transfer_stats}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bytes transferred with full vs ranged KEL queries")
+    parser.add_argument("--agents", type=int, default=100)
+    parser.add_argument("--events", type=int, default=5000, help="controller KEL length")
+    parser.add_argument("--agent-events", type=int, default=20, help="agent KEL length")
+    parser.add_argument("--growth", type=int, default=20, help="events appended before the warm pass")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(asyncio.run(run_mode(args.agents, args.events, args.agent_events, args.growth))))
+        return
+
+    print(f"{args.agents} agents ({args.agent_events} events each), controller KEL {args.events} events, "
+          f"+{args.growth} events between passes")
+    print(f"{'mode':>7} {'phase':>6} {'valid':>6} {'requests':>9} {'KiB served':>11} {'ms':>9}")
+    print("-" * 54)
+    for mode in ("off", "on"):
+        env = dict(os.environ, KERIA_RANGED_KEL=mode, KERIA_URL="http://fake-keria")
+        output = subprocess.run(
+            [sys.executable, __file__, "--child",
+             "--agents", str(args.agents), "--events", str(args.events),
+             "--agent-events", str(args.agent_events), "--growth", str(args.growth)],
+            env=env, check=True, capture_output=True, text=True
+        ).stdout.strip().splitlines()[-1]
+        result = json.loads(output)
+        for phase, stats in result["phases"].items():
+            print(f"{mode:>7} {phase:>6} {stats['valid']:>6} {sum(stats['requests'].values()):>9} "
+                  f"{stats['total_bytes'] / 1024:>11.1f} {stats['seconds'] * 1000:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Benchmark: full JSON materialisation vs streaming KEL parsing
+
+Generates synthetic controller KELs of increasing length, each anchoring
+one delegation seal per interaction event, and measures how long it takes
+to find the seal for the LAST agent (worst case for the streaming parser,
+which cannot stop early) and for an agent halfway through the log.
+
+Every measurement runs in a fresh subprocess so that the reported peak RSS
+belongs to that case alone.
+
+Usage:
+    python3 bench_kel_streaming.py
+    python3 bench_kel_streaming.py --lengths 1000 10000 100000
+"""
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+CONTROLLER_AID = "E" + "C" * 43
+CHUNK_SIZE = 64 * 1024
+
+
+def agent_aid(n: int) -> str:
+    return "E" + str(n).zfill(43)
+
+
+def write_kel(path: str, length: int):
+    """Write a KERIA-shaped identifier document with `length` events"""
+    with open(path, 'w') as f:
+        f.write('{"prefix": "%s", "events": [' % CONTROLLER_AID)
+        for sn in range(length):
+            event = {
+                "v": "KERI10JSON000000_",
+                "t": "icp" if sn == 0 else "ixn",
+                "d": "E" + str(sn).rjust(43, "D"),
+                "i": CONTROLLER_AID,
+                "s": format(sn, 'x'),
+                "a": [] if sn == 0 else [{"i": agent_aid(sn), "s": "0", "d": agent_aid(sn)}]
+            }
+            if sn:
+                f.write(', ')
+            f.write(json.dumps(event))
+        f.write(']}')
+
+
+def run_case(mode: str, path: str, target: str) -> dict:
+    """Executed in the child process"""
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from vlei_verification import kel_parsing
+
+    baseline_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+
+    if mode == "full":
+        with open(path, 'rb') as f:
+            kel_data = json.loads(f.read())
+        found, details = kel_parsing.find_delegation_seal(kel_data, target, CONTROLLER_AID)
+        events_read = details.get("total_events_searched")
+    else:
+        index = kel_parsing.SealIndex(aids={target})
+        parser = kel_parsing.KelEventStream()
+        idx = 0
+        with open(path, 'rb') as f:
+            while len(index) == 0 and not parser.done:
+                chunk = f.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                for event in parser.feed(chunk):
+                    index.add(idx, event)
+                    idx += 1
+                    if len(index):
+                        break
+        found = index.lookup(target) is not None
+        events_read = index.indexed_events
+
+    elapsed = time.perf_counter() - start
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return {
+        "found": found,
+        "events_read": events_read,
+        "seconds": elapsed,
+        "peak_rss_mb": peak_kb / 1024,
+        "delta_rss_mb": (peak_kb - baseline_kb) / 1024
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--lengths", type=int, nargs="+", default=[100, 1000, 10000, 50000, 200000])
+    parser.add_argument("--case", nargs=3, metavar=("MODE", "PATH", "TARGET"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.case:
+        print(json.dumps(run_case(*args.case)))
+        return
+
+    print(f"{'events':>8} {'size MB':>8} {'target':>7} {'mode':>7} "
+          f"{'ms':>9} {'read':>8} {'peak RSS MB':>12} {'delta MB':>9}")
+    print("-" * 78)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for length in args.lengths:
+            path = os.path.join(tmp, f"kel-{length}.json")
+            write_kel(path, length)
+            size_mb = os.path.getsize(path) / (1024 * 1024)
+
+            for label, target in (("middle", agent_aid(length // 2 or 1)), ("last", agent_aid(length - 1))):
+                for mode in ("full", "stream"):
+                    output = subprocess.run(
+                        [sys.executable, __file__, "--case", mode, path, target],
+                        check=True, capture_output=True, text=True
+                    ).stdout.strip().splitlines()[-1]
+                    result = json.loads(output)
+                    print(f"{length:>8} {size_mb:>8.2f} {label:>7} {mode:>7} "
+                          f"{result['seconds'] * 1000:>9.1f} {result['events_read']:>8} "
+                          f"{result['peak_rss_mb']:>12.1f} {result['delta_rss_mb']:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Benchmark: KEL signature verification, per-event loop vs batched
+
+Verifies every event signature of synthetic signed KELs (fake_keria.py)
+of 10 to 10,000 events in four ways:
+
+  naive:   decode and check one event at a time
+  inline:  SignatureVerifier without worker processes
+  pool:    SignatureVerifier on the process pool (SIG_VERIFY_WORKERS)
+  cached:  the same KEL again, answered from the verified digest cache
+
+Needs an Ed25519 implementation (pysodium or cryptography) for the
+verifier and the cryptography package for signing the KELs.
+
+Usage:
+    python3 bench_sig_verify.py
+    SIG_VERIFY_WORKERS=8 python3 bench_sig_verify.py --sizes 10 1000 10000 --repeat 5
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+
+async def bench_size(signatures, fake_keria, size: int, workers: int, repeat: int) -> dict:
+    fake = fake_keria.FakeKeria(controllers=1, agents=0, events=size, seed=f"bench-sig/{size}")
+    events = fake.kels[fake.controllers[0]]
+    signed = signatures.kel_signed_events(events)
+    timings = {}
+
+    def naive() -> bool:
+        ok = True
+        for event in signed:
+            signers = set()
+            for sig in event.sigs:
+                index, key, raw_sig = signatures.decode_indexed_signature(sig, event.keys)
+                if signatures.ed25519_verify(key, event.raw, raw_sig):
+                    signers.add(index)
+            ok = signatures.threshold_met(event.threshold, signers) and ok
+        return ok
+
+    started = time.perf_counter()
+    for _ in range(repeat):
+        assert naive()
+    timings["naive"] = (time.perf_counter() - started) / repeat
+
+    for mode, mode_workers in (("inline", 0), ("pool", workers)):
+        verifier = signatures.SignatureVerifier(mode_workers, signatures.SIG_BATCH_MIN, signatures.SIG_BATCH_SIZE, size)
+        # Start the workers outside the timed runs
+        if mode_workers:
+            await verifier.check([(b"\x00" * 32, b"", b"\x00" * 64)] * max(1, signatures.SIG_BATCH_MIN))
+        total = 0.0
+        for _ in range(repeat):
+            verifier.clear()
+            started = time.perf_counter()
+            outcomes = await verifier.verify(signed)
+            total += time.perf_counter() - started
+            assert all(outcome["verified"] for outcome in outcomes.values())
+        timings[mode] = total / repeat
+
+        if mode == "inline":
+            started = time.perf_counter()
+            for _ in range(repeat):
+                outcomes = await verifier.verify(signed)
+            timings["cached"] = (time.perf_counter() - started) / repeat
+            assert all(outcome["cached"] for outcome in outcomes.values())
+        verifier.shutdown()
+
+    return timings
+
+
+async def run(sizes, workers: int, repeat: int):
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    import fake_keria
+    from vlei_verification import signatures
+
+    if signatures.ed25519_verify is None or fake_keria.Ed25519PrivateKey is None:
+        sys.exit("needs pysodium or cryptography for verifying and cryptography for signing")
+
+    print(f"backend {signatures.ED25519_BACKEND}, {workers} worker processes, "
+          f"batch_min {signatures.SIG_BATCH_MIN}, batch_size {signatures.SIG_BATCH_SIZE}, mean of {repeat}")
+    print(f"{'events':>7} {'naive ms':>10} {'inline ms':>10} {'pool ms':>10} {'cached ms':>10} {'pool µs/evt':>12}")
+    print("-" * 64)
+    for size in sizes:
+        t = await bench_size(signatures, fake_keria, size, workers, repeat)
+        print(f"{size:>7} {t['naive'] * 1000:>10.2f} {t['inline'] * 1000:>10.2f} {t['pool'] * 1000:>10.2f} "
+              f"{t['cached'] * 1000:>10.2f} {t['pool'] / size * 1e6:>12.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="KEL signature verification, per-event loop vs batched")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000, 10000], help="KEL lengths")
+    parser.add_argument("--workers", type=int, default=int(os.getenv("SIG_VERIFY_WORKERS", str(os.cpu_count() or 1))))
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    asyncio.run(run(args.sizes, args.workers, args.repeat))
+
+
+if __name__ == "__main__":
+    main()
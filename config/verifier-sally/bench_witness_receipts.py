@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Benchmark: witness receipt validation cost against pool size and TOAD
+
+Validates the receipts of every event of a synthetic KEL (fake_keria.py)
+for growing witness pools at a fixed TOAD and at a majority TOAD, with
+receipts attached to the events and served by the witnesses. Receipt
+checks and witness queries should follow the TOAD, not the pool size.
+
+Usage:
+    python3 bench_witness_receipts.py
+    python3 bench_witness_receipts.py --events 500 --pools 3 7 13 25 --toad 2
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+
+async def bench(fake_keria, httpx, events: int, witnesses: int, toad: int, receipt_mode: str) -> dict:
+    from vlei_verification import keria, receipts, signatures
+
+    fake = fake_keria.FakeKeria(
+        controllers=1, agents=0, events=events, witnesses=witnesses, toad=toad,
+        receipts=receipt_mode, seed=f"bench-rct/{witnesses}/{toad}/{receipt_mode}"
+    )
+    keria.client = keria.create_client(transport=httpx.ASGITransport(app=fake_keria.create_app(fake)))
+    validator = receipts.ReceiptValidator(fake.witness_urls("http://fake-keria"), events, receipts.WITNESS_TIMEOUT)
+    signed = signatures.kel_signed_events(fake.kels[fake.controllers[0]])
+
+    started = time.perf_counter()
+    outcomes = await validator.validate(signed)
+    elapsed = time.perf_counter() - started
+    await keria.client.aclose()
+    assert all(outcome["verified"] for outcome in outcomes.values())
+    return {
+        "ms": elapsed * 1000,
+        "checks": validator.receipts_checked / events,
+        "queries": validator.witness_queries / events
+    }
+
+
+async def run(events: int, pools, toad: int):
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    import httpx
+    import fake_keria
+    from vlei_verification import signatures
+
+    if signatures.ed25519_verify is None or fake_keria.Ed25519PrivateKey is None:
+        sys.exit("needs pysodium or cryptography for verifying and cryptography for signing")
+
+    print(f"{events} events per KEL; per-event receipt checks and witness queries")
+    print(f"{'witnesses':>9} {'toad':>5} {'receipts':>9} {'checks':>7} {'queries':>8} {'ms':>9}")
+    print("-" * 52)
+    for witnesses in pools:
+        for threshold in sorted({min(toad, witnesses), witnesses // 2 + 1}):
+            for receipts in ("attached", "served"):
+                r = await bench(fake_keria, httpx, events, witnesses, threshold, receipts)
+                print(f"{witnesses:>9} {threshold:>5} {receipts:>9} {r['checks']:>7.1f} {r['queries']:>8.1f} {r['ms']:>9.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Witness receipt validation cost against pool size and TOAD")
+    parser.add_argument("--events", type=int, default=200, help="KEL length")
+    parser.add_argument("--pools", type=int, nargs="+", default=[3, 6, 12, 24], help="witness pool sizes")
+    parser.add_argument("--toad", type=int, default=2, help="fixed TOAD compared with a majority TOAD")
+    args = parser.parse_args()
+    asyncio.run(run(args.events, args.pools, args.toad))
+
+
+if __name__ == "__main__":
+    main()
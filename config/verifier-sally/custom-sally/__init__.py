@@ -3,4 +3,4 @@ Custom Sally Extensions for Agent Delegation Verification
 """
 
 __version__ = "1.0.0"
-__all__ = ["agent_verifying", "handling_ext"]
+__all__ = ["agent_verifying", "chain_cache", "credential_index", "delegation_graph", "handling_ext", "kel_hooks", "kel_prefetch", "kel_replay", "listeners", "oobi_hooks", "revocation_status", "schema_registry", "tel_hooks", "verdict_cache", "verification_context", "worker_pool"]
@@ -10,14 +10,55 @@ Verification Steps:
 3. Retrieve and verify OOR holder's OOR credential
 4. Verify complete credential chain (OOR → OOR Auth → LE → QVI → GEDA)
 5. Check for revocations at each level
+
+Agents already in the delegation graph are verified by walking the
+graph from the agent to its root and checking the credentials on that
+path for revocation; the full procedure runs for everything else.
+
+Valid verdicts are cached until a KEL or TEL they rest on moves on
+(see verdict_cache).
+
+The agent's and OOR holder's KELs are validated from their replay
+checkpoints, so only events accepted since the last verification are
+checked (see kel_replay).
+
+Credential types are told apart by schema SAID and chain credentials
+validated against their schemas' precompiled validators (see
+schema_registry).
+
+All steps read from one VerificationContext snapshot of the KEL store
+and credential registry, so they agree with each other even while
+credentials and key events are being ingested.
 """
 
 import json
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional, Tuple
 from keri.app import habbing
-from keri.core import coring, eventing
+from keri.core import coring
 from keri.vdr import verifying
 
+from vlei_verification import vlei_rules
+
+from custom_sally import (
+    chain_cache, credential_index, delegation_graph, kel_hooks, kel_replay, revocation_status,
+    schema_registry, tel_hooks, verdict_cache
+)
+from custom_sally.verification_context import VerificationContext
+
+
+# Longest credential chain followed before assuming a loop
+MAX_CHAIN_DEPTH = 10
+
+# Memoised credential chains per verifier
+CHAIN_CACHE_SIZE = 1024
+
+# Cached valid verdicts per verifier
+VERDICT_CACHE_SIZE = 4096
+
+
+class ChainError(Exception):
+    """A credential chain could not be resolved or an edge did not hold"""
+
 
 class AgentDelegationVerifier:
     """Verifies agent delegation chains in vLEI context"""
@@ -31,6 +72,17 @@ class AgentDelegationVerifier:
         """
         self.hby = hby
         self.reger = verifying.Reger(name=hby.name, temp=False)
+        self.credentials = credential_index.index_for(self.reger)
+        self.chains = chain_cache.ChainCache(CHAIN_CACHE_SIZE)
+        self.revocations = revocation_status.RevocationStatusService(self.reger)
+        tel_hooks.add_listener(self.chains.on_tel_event)
+        tel_hooks.add_listener(self.revocations.on_tel_event)
+        self.graph = delegation_graph.shared_graph(hby.db, self.reger)
+        self.verdicts = verdict_cache.VerdictCache(VERDICT_CACHE_SIZE)
+        kel_hooks.add_listener(self.verdicts.on_key_event)
+        tel_hooks.add_listener(self.verdicts.on_tel_event)
+        self.replayer = kel_replay.shared_replayer(hby)
+        self.schemas = schema_registry.shared_registry(hby)
     
     def verify_agent_delegation(
         self, 
@@ -52,198 +104,525 @@ class AgentDelegationVerifier:
                 "oor_holder_aid": str,
                 "oor_credential_said": str (if valid),
                 "credential_chain": list (if valid),
+                "cached": True (if answered from the verdict cache),
                 "error": str (if invalid)
             }
         """
+        verdict = self.verdicts.get(agent_aid, oor_holder_aid)
+        if verdict is not None:
+            return dict(verdict, cached=True)
+        # Read before the snapshot opens, so credentials and TEL events
+        # ingested in between keep what it reads out of the caches
+        snapshot = self.revocations.snapshot
+        chain_generation = self.chains.generation
+        
         try:
-            # Step 1: Verify agent KEL shows delegation
-            agent_hab = self.hby.habByName(agent_aid)
-            if not agent_hab:
-                return {
-                    "valid": False,
-                    "agent_aid": agent_aid,
-                    "oor_holder_aid": oor_holder_aid,
-                    "error": f"Agent AID {agent_aid} not found in local KERI database"
-                }
+            # One read-only snapshot of KELs, credentials and TELs,
+            # released as soon as the verification is decided
+            with VerificationContext(self.hby.db, self.reger) as ctx:
+                replay_error = self._replay_kels((agent_aid, oor_holder_aid), ctx)
+                if replay_error is not None:
+                    return {
+                        "valid": False,
+                        "agent_aid": agent_aid,
+                        "oor_holder_aid": oor_holder_aid,
+                        "error": replay_error
+                    }
+                
+                graph_result = self._verify_from_graph(
+                    agent_aid, oor_holder_aid, ctx, snapshot, chain_generation)
+                if graph_result is not None:
+                    return self._remember(graph_result, ctx, snapshot)
+                
+                # Step 1: Verify agent KEL shows delegation
+                # Key state of any AID whose KEL we hold, not only local habitats
+                agent_state = ctx.state(agent_aid)
+                if agent_state is None:
+                    return {
+                        "valid": False,
+                        "agent_aid": agent_aid,
+                        "oor_holder_aid": oor_holder_aid,
+                        "error": f"Agent AID {agent_aid} not found in local KERI database"
+                    }
             
-            # Check agent is delegated
-            if not agent_hab.kever.delpre:
-                return {
-                    "valid": False,
-                    "agent_aid": agent_aid,
-                    "oor_holder_aid": oor_holder_aid,
-                    "error": "Agent is not a delegated AID"
-                }
+                # Check agent is delegated
+                if not agent_state.di:
+                    return {
+                        "valid": False,
+                        "agent_aid": agent_aid,
+                        "oor_holder_aid": oor_holder_aid,
+                        "error": "Agent is not a delegated AID"
+                    }
             
-            # Verify delegation is from expected OOR holder
-            if agent_hab.kever.delpre != oor_holder_aid:
-                return {
-                    "valid": False,
-                    "agent_aid": agent_aid,
-                    "oor_holder_aid": oor_holder_aid,
-                    "error": f"Agent is delegated by {agent_hab.kever.delpre}, not {oor_holder_aid}"
-                }
+                # Verify delegation is from expected OOR holder
+                if agent_state.di != oor_holder_aid:
+                    return {
+                        "valid": False,
+                        "agent_aid": agent_aid,
+                        "oor_holder_aid": oor_holder_aid,
+                        "error": f"Agent is delegated by {agent_state.di}, not {oor_holder_aid}"
+                    }
             
-            # Step 2: Verify OOR holder KEL contains delegation seal
-            oor_hab = self.hby.habByName(oor_holder_aid)
-            if not oor_hab:
-                return {
-                    "valid": False,
-                    "agent_aid": agent_aid,
-                    "oor_holder_aid": oor_holder_aid,
-                    "error": f"OOR Holder AID {oor_holder_aid} not found"
-                }
+                # Step 2: Verify OOR holder KEL contains delegation seal
+                if ctx.state(oor_holder_aid) is None:
+                    return {
+                        "valid": False,
+                        "agent_aid": agent_aid,
+                        "oor_holder_aid": oor_holder_aid,
+                        "error": f"OOR Holder AID {oor_holder_aid} not found"
+                    }
             
-            delegation_seal_found = self._verify_delegation_seal(
-                oor_hab, agent_aid
-            )
-            if not delegation_seal_found:
-                return {
-                    "valid": False,
-                    "agent_aid": agent_aid,
-                    "oor_holder_aid": oor_holder_aid,
-                    "error": "Delegation seal not found in OOR holder's KEL"
-                }
+                delegation_seal_found = self._verify_delegation_seal(
+                    oor_holder_aid, agent_aid, ctx
+                )
+                if not delegation_seal_found:
+                    return {
+                        "valid": False,
+                        "agent_aid": agent_aid,
+                        "oor_holder_aid": oor_holder_aid,
+                        "error": "Delegation seal not found in OOR holder's KEL"
+                    }
             
-            # Step 3: Get OOR holder's OOR credential
-            oor_credential = self._get_oor_credential(oor_holder_aid)
-            if not oor_credential:
-                return {
-                    "valid": False,
-                    "agent_aid": agent_aid,
-                    "oor_holder_aid": oor_holder_aid,
-                    "error": "OOR credential not found for OOR holder"
-                }
+                # Step 3: Get OOR holder's OOR credential
+                oor_credential = self._get_oor_credential(oor_holder_aid, ctx)
+                if not oor_credential:
+                    return {
+                        "valid": False,
+                        "agent_aid": agent_aid,
+                        "oor_holder_aid": oor_holder_aid,
+                        "error": "OOR credential not found for OOR holder"
+                    }
             
-            # Step 4: Verify credential chain
-            chain_result = self._verify_credential_chain(oor_credential)
-            if not chain_result["valid"]:
-                return {
-                    "valid": False,
-                    "agent_aid": agent_aid,
-                    "oor_holder_aid": oor_holder_aid,
-                    "error": f"Credential chain verification failed: {chain_result['error']}"
-                }
+                # Step 4: Verify credential chain
+                chain_result = self._verify_credential_chain(oor_credential, ctx, chain_generation)
+                if not chain_result["valid"]:
+                    return {
+                        "valid": False,
+                        "agent_aid": agent_aid,
+                        "oor_holder_aid": oor_holder_aid,
+                        "error": f"Credential chain verification failed: {chain_result['error']}"
+                    }
             
-            # Step 5: Check revocations
-            revocation_check = self._check_revocations(chain_result["chain"])
-            if not revocation_check["valid"]:
-                return {
-                    "valid": False,
+                # Step 5: Check revocations
+                revocation_check = self._check_revocations(chain_result["chain"], ctx, snapshot)
+                if not revocation_check["valid"]:
+                    return {
+                        "valid": False,
+                        "agent_aid": agent_aid,
+                        "oor_holder_aid": oor_holder_aid,
+                        "error": f"Revocation found: {revocation_check['error']}"
+                    }
+            
+                # All checks passed
+                return self._remember({
+                    "valid": True,
                     "agent_aid": agent_aid,
                     "oor_holder_aid": oor_holder_aid,
-                    "error": f"Revocation found: {revocation_check['error']}"
-                }
+                    "oor_credential_said": oor_credential.get("sad", {}).get("d"),
+                    "credential_chain": chain_result["chain"],
+                    "revocation_snapshot": revocation_check["snapshot"],
+                    "verification_timestamp": coring.Dater().dts
+                }, ctx, snapshot)
             
-            # All checks passed
+        except Exception as e:
             return {
-                "valid": True,
+                "valid": False,
                 "agent_aid": agent_aid,
                 "oor_holder_aid": oor_holder_aid,
-                "oor_credential_said": oor_credential.get("sad", {}).get("d"),
-                "credential_chain": chain_result["chain"],
-                "verification_timestamp": coring.Dater().dts
+                "error": f"Verification exception: {str(e)}"
             }
+    
+    def _remember(
+        self,
+        result: Dict[str, Any],
+        ctx: VerificationContext,
+        snapshot: int
+    ) -> Dict[str, Any]:
+        """
+        Cache a valid verdict under the KEL and TEL sns it was decided at
+        
+        Participants are the agent, the OOR holder and the issuer of
+        every chain credential.
+        
+        Args:
+            result: verification result
+            ctx: snapshot the verdict was decided on
+            snapshot: revocation snapshot number read before ctx opened
+            
+        Returns:
+            result
+        """
+        if not result.get("valid"):
+            return result
+        
+        chain = result["credential_chain"]
+        aids = {result["agent_aid"], result["oor_holder_aid"]}
+        aids.update(cred["pre"] for cred in chain if cred.get("pre"))
+        kel_sns = {}
+        for aid in aids:
+            state = ctx.state(aid)
+            if state is None:
+                return result
+            kel_sns[aid] = int(state.s, 16)
+        
+        saids = [cred["sad"]["d"] for cred in chain]
+        statuses = self.revocations.status(saids, ctx, snapshot)["statuses"]
+        tel_sns = {said: statuses[said]["sn"] for said in saids}
+        
+        self.verdicts.put(result["agent_aid"], result["oor_holder_aid"],
+                          kel_sns, tel_sns, result, self._live_sns)
+        return result
+    
+    def _live_sns(
+        self,
+        kel_sns: Dict[str, int],
+        tel_sns: Dict[str, int]
+    ) -> Tuple[Dict[str, int], Dict[str, int]]:
+        """
+        Current KEL and TEL sns of the AIDs and credentials of a verdict
+        
+        KEL sns come from the KELs rather than key state, which is
+        updated after the event is logged.
+        
+        Args:
+            kel_sns: KEL sn of every participant AID at verification
+            tel_sns: TEL sn of every chain credential at verification
             
+        Returns:
+            (KEL sns, TEL sns) read from a fresh snapshot
+        """
+        with VerificationContext(self.hby.db, self.reger) as ctx:
+            live_kel = {}
+            for aid, sn in kel_sns.items():
+                while ctx.kel_digest(aid, sn + 1) is not None:
+                    sn += 1
+                live_kel[aid] = sn
+            live_tel = {said: ctx.tel_last(said)[0] for said in sorted(tel_sns)}
+        return live_kel, live_tel
+    
+    def verify_oor_holder_agents(
+        self,
+        oor_holder_aid: str,
+        agent_aids: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
+        """
+        Verify every agent delegated by an OOR holder in one pass
+        
+        The holder's OOR credential, chain and revocation status are
+        checked once and the delegation seals in its KEL are taken from
+        its replay checkpoint, so only events accepted since the last
+        verification are read; each agent then costs a key state, a KEL
+        index read and the replay of its own new events.
+        
+        Args:
+            oor_holder_aid: OOR Holder's AID (prefix)
+            agent_aids: agents to verify, default every agent the holder
+                anchored a delegation seal for or the graph links to it
+            
+        Returns:
+            {
+                "valid": bool (the holder's chain holds),
+                "oor_holder_aid": str,
+                "oor_credential_said": str (if valid),
+                "credential_chain": list (if valid),
+                "agents": [{"agent_aid", "valid", "error" (if invalid)}],
+                "verified": int,
+                "failed": int,
+                "error": str (if invalid)
+            }
+        """
+        result = {"valid": False, "oor_holder_aid": oor_holder_aid}
+        snapshot = self.revocations.snapshot
+        chain_generation = self.chains.generation
+        try:
+            with VerificationContext(self.hby.db, self.reger) as ctx:
+                holder_error = self._verify_oor_holder(
+                    oor_holder_aid, result, ctx, snapshot, chain_generation)
+                
+                # Agent inception digests the holder anchored, as of its checkpoint
+                seals = {}
+                if holder_error is None:
+                    replay = self.replayer.replay(oor_holder_aid, ctx)
+                    if replay.valid:
+                        seals = replay.checkpoint.seals
+                    else:
+                        holder_error = f"KEL replay failed: {replay.error}"
+                
+                if agent_aids is None:
+                    node = self.graph.node(oor_holder_aid)
+                    children = [
+                        child for child in (node.children if node else ())
+                        if self.graph.node(child).kind == delegation_graph.DELEGATION
+                    ]
+                    agent_aids = sorted(set(seals) | set(children))
+                
+                agents = []
+                for agent_aid in agent_aids:
+                    error = holder_error or self._check_agent(agent_aid, oor_holder_aid, seals, ctx)
+                    verdict = {"agent_aid": agent_aid, "valid": error is None}
+                    if error is not None:
+                        verdict["error"] = error
+                    agents.append(verdict)
+        
         except Exception as e:
+            result["error"] = f"Verification exception: {str(e)}"
+            return result
+        
+        verified = sum(verdict["valid"] for verdict in agents)
+        result.update({
+            "valid": holder_error is None,
+            "agents": agents,
+            "verified": verified,
+            "failed": len(agents) - verified,
+            "verification_timestamp": coring.Dater().dts
+        })
+        if holder_error is not None:
+            result["error"] = holder_error
+        return result
+    
+    def _verify_oor_holder(
+        self,
+        oor_holder_aid: str,
+        result: Dict[str, Any],
+        ctx: VerificationContext,
+        snapshot: int,
+        chain_generation: int
+    ) -> Optional[str]:
+        """
+        Steps 3 to 5 for an OOR holder, recording the chain in result
+        
+        Returns:
+            None if the holder's chain holds, else the error
+        """
+        if ctx.state(oor_holder_aid) is None:
+            return f"OOR Holder AID {oor_holder_aid} not found"
+        
+        oor_credential = self._get_oor_credential(oor_holder_aid, ctx)
+        if not oor_credential:
+            return "OOR credential not found for OOR holder"
+        
+        chain_result = self._verify_credential_chain(oor_credential, ctx, chain_generation)
+        if not chain_result["valid"]:
+            return f"Credential chain verification failed: {chain_result['error']}"
+        
+        revocation_check = self._check_revocations(chain_result["chain"], ctx, snapshot)
+        if not revocation_check["valid"]:
+            return f"Revocation found: {revocation_check['error']}"
+        
+        result.update({
+            "oor_credential_said": oor_credential.get("sad", {}).get("d"),
+            "credential_chain": chain_result["chain"],
+            "revocation_snapshot": revocation_check["snapshot"]
+        })
+        return None
+    
+    def _check_agent(
+        self,
+        agent_aid: str,
+        oor_holder_aid: str,
+        seals: Dict[str, str],
+        ctx: VerificationContext
+    ) -> Optional[str]:
+        """
+        Steps 1 and 2 for one agent against the holder's collected seals
+        
+        Returns:
+            None if the agent is delegated by the holder, else the error
+        """
+        agent_state = ctx.state(agent_aid)
+        if agent_state is None:
+            return f"Agent AID {agent_aid} not found in local KERI database"
+        if not agent_state.di:
+            return "Agent is not a delegated AID"
+        if agent_state.di != oor_holder_aid:
+            return f"Agent is delegated by {agent_state.di}, not {oor_holder_aid}"
+        replay = self.replayer.replay(agent_aid, ctx)
+        if not replay.valid:
+            return f"KEL replay failed: {replay.error}"
+        if seals.get(agent_aid) is None or seals[agent_aid] != ctx.kel_digest(agent_aid, 0):
+            return "Delegation seal not found in OOR holder's KEL"
+        return None
+    
+    def _replay_kels(self, aids, ctx: VerificationContext) -> Optional[str]:
+        """
+        Replay the KELs held for aids from their checkpoints
+        
+        AIDs without a KEL are left to the checks that report them.
+        
+        Returns:
+            None if every KEL validates, else the first error
+        """
+        for aid in aids:
+            if ctx.state(aid) is None:
+                continue
+            replay = self.replayer.replay(aid, ctx)
+            if not replay.valid:
+                return f"KEL replay failed: {replay.error}"
+        return None
+    
+    def _verify_from_graph(
+        self,
+        agent_aid: str,
+        oor_holder_aid: str,
+        ctx: VerificationContext,
+        snapshot: int,
+        chain_generation: int
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Verify through the delegation graph
+        
+        The graph only says where to look: the holder's OOR credential is
+        the one its edge was made from. That credential's chain is
+        resolved (memoised by SAID) and checked like the full procedure's,
+        and so are the delegation seal and revocations.
+        
+        Args:
+            agent_aid: Agent's AID (prefix)
+            oor_holder_aid: OOR Holder's AID (prefix)
+            ctx: snapshot to read credentials and TELs from
+            snapshot: revocation snapshot number read before ctx opened
+            chain_generation: chain cache generation read before ctx opened
+            
+        Returns:
+            Verification result, or None when the graph cannot vouch for
+            the agent and the full procedure should decide
+        """
+        path = self.graph.path(agent_aid)
+        if (len(path) < 2 or
+                path[0].kind != delegation_graph.DELEGATION or
+                path[0].parent != oor_holder_aid or
+                path[1].kind != delegation_graph.CREDENTIAL):
+            return None
+        
+        try:
+            chain = list(self._resolve_chain(path[1].via, ctx, chain_generation))
+        except ChainError:
+            return None
+        leaf = chain[0]["sad"]
+        if (self.schemas.kind(leaf.get("s")) != vlei_rules.OOR or
+                (leaf.get("a") or {}).get("i") != oor_holder_aid or
+                len(chain) < 3):
+            return None
+        if not self._verify_delegation_seal(oor_holder_aid, agent_aid, ctx):
+            return None
+        
+        revocation_check = self._check_revocations(chain, ctx, snapshot)
+        if not revocation_check["valid"]:
             return {
                 "valid": False,
                 "agent_aid": agent_aid,
                 "oor_holder_aid": oor_holder_aid,
-                "error": f"Verification exception: {str(e)}"
+                "error": f"Revocation found: {revocation_check['error']}"
             }
+        
+        return {
+            "valid": True,
+            "agent_aid": agent_aid,
+            "oor_holder_aid": oor_holder_aid,
+            "oor_credential_said": leaf.get("d"),
+            "credential_chain": chain,
+            "delegation_path": [node.aid for node in path],
+            "revocation_snapshot": revocation_check["snapshot"],
+            "verification_timestamp": coring.Dater().dts
+        }
     
     def _verify_delegation_seal(
         self, 
-        delegator_hab: habbing.Habitat, 
-        delegatee_aid: str
+        delegator_aid: str, 
+        delegatee_aid: str,
+        ctx: VerificationContext
     ) -> bool:
         """
-        Verify delegation seal exists in delegator's KEL
+        Verify delegator's KEL anchors the delegatee's inception
+        
+        Keyed reads only: the digest of the delegated inception comes
+        from the KEL index, the (sn, digest) of the delegator event that
+        approved it from the source seal couple keripy stored when it
+        accepted the inception (.aess), and that event from the event
+        store. The seal may be anchored in any delegator event (ixn, rot,
+        drt). Without a stored source seal the delegator's KEL is
+        searched instead, in the same snapshot.
         
         Args:
-            delegator_hab: Delegator's habitat
-            delegatee_aid: Delegatee's AID
+            delegator_aid: OOR holder's AID
+            delegatee_aid: Agent's AID
+            ctx: snapshot to read from
             
         Returns:
             True if delegation seal found
         """
-        # Check for delegation seal in interaction events
-        for event in delegator_hab.kever.events:
-            if event.get("t") == "ixn":  # Interaction event
-                seals = event.get("a", [])
-                for seal in seals:
-                    if seal.get("i") == delegatee_aid:
-                        return True
-        return False
+        dig = ctx.kel_digest(delegatee_aid, 0)
+        if dig is None:
+            return False
+        seal = dict(i=delegatee_aid, s="0", d=dig)
+        
+        source = ctx.source_seal(delegatee_aid, dig)
+        if source is None:
+            return ctx.anchoring_event(delegator_aid, seal) is not None
+        
+        sn, said = source
+        serder = ctx.event(delegator_aid, said)
+        if serder is None:
+            return False
+        
+        return (serder.pre == delegator_aid and
+                serder.sn == sn and
+                seal in (serder.seals or []))
     
-    def _get_oor_credential(self, oor_holder_aid: str) -> Optional[Dict[str, Any]]:
+    def _get_oor_credential(
+        self,
+        oor_holder_aid: str,
+        ctx: VerificationContext
+    ) -> Optional[Dict[str, Any]]:
         """
         Get OOR credential for the OOR holder
         
         Args:
             oor_holder_aid: OOR Holder's AID
+            ctx: snapshot to read from
             
         Returns:
             OOR credential dict or None
         """
-        # Query registry for credentials issued to this AID
-        credentials = self.reger.cloneCreds(
-            said=None,
-            limit=100
-        )
-        
-        for cred in credentials:
-            sad = cred.get("sad", {})
-            # Check if this is an OOR credential for our AID
-            if (sad.get("a", {}).get("i") == oor_holder_aid and
-                sad.get("s") and "OORAuthorizationvLEICredential" in sad.get("s")):
-                return cred
+        # Only OOR credentials issued to this AID, via the (issuee, schema) index
+        for schema in self.schemas.saids(vlei_rules.OOR):
+            creds = self.credentials.credentials(oor_holder_aid, schema=schema, ctx=ctx)
+            if creds:
+                return creds[0]
         
         return None
     
     def _verify_credential_chain(
         self, 
-        oor_credential: Dict[str, Any]
+        oor_credential: Dict[str, Any],
+        ctx: VerificationContext,
+        chain_generation: int
     ) -> Dict[str, Any]:
         """
         Verify the complete credential chain
         
-        Chain: OOR → OOR Auth → LE → QVI → GEDA
+        Chain: OOR → OOR Auth → LE → QVI, followed through each
+        credential's edge (`e`) section. Resolved sub-chains are memoised
+        by SAID, so agents under an already verified LE only resolve
+        their own OOR-level credentials.
         
         Args:
             oor_credential: Starting OOR credential
+            ctx: snapshot to read from
+            chain_generation: chain cache generation read before ctx opened
             
         Returns:
             {"valid": bool, "chain": list, "error": str}
         """
-        chain = [oor_credential]
-        current_cred = oor_credential
-        
         try:
-            # Walk up the chain using issuer references
-            while True:
-                sad = current_cred.get("sad", {})
-                issuer_aid = sad.get("i")
-                
-                if not issuer_aid:
-                    break
-                
-                # Get issuer's credential
-                issuer_cred = self._get_credential_for_issuer(issuer_aid)
-                if not issuer_cred:
-                    # Reached top (GEDA) or chain broken
-                    break
-                
-                chain.append(issuer_cred)
-                current_cred = issuer_cred
-                
-                # Prevent infinite loops
-                if len(chain) > 10:
-                    return {
-                        "valid": False,
-                        "error": "Credential chain too long (possible loop)"
-                    }
+            said = oor_credential.get("sad", {}).get("d")
+            if not said:
+                return {
+                    "valid": False,
+                    "error": "OOR credential has no SAID"
+                }
+            
+            chain = list(self._resolve_chain(said, ctx, chain_generation))
             
             # Verify minimum chain length (should have OOR Auth, LE, QVI at minimum)
             if len(chain) < 3:
@@ -257,56 +636,104 @@ class AgentDelegationVerifier:
                 "chain": chain
             }
             
+        except ChainError as e:
+            return {
+                "valid": False,
+                "error": str(e)
+            }
         except Exception as e:
             return {
                 "valid": False,
                 "error": f"Chain verification error: {str(e)}"
             }
     
-    def _get_credential_for_issuer(self, issuer_aid: str) -> Optional[Dict[str, Any]]:
+    def _resolve_chain(
+        self,
+        said: str,
+        ctx: VerificationContext,
+        generation: int,
+        depth: int = 0
+    ) -> chain_cache.Chain:
         """
-        Get credential issued to an issuer (to walk up chain)
+        Credential plus every credential it chains to through its edges
         
         Args:
-            issuer_aid: Issuer's AID
+            said: SAID of the credential to start from
+            ctx: snapshot to read from
+            generation: chain cache generation read before ctx opened;
+                chains resolved from a snapshot older than a credential
+                change are not cached
+            depth: number of edges followed so far
             
         Returns:
-            Credential dict or None
+            Tuple of credential dicts, starting with `said`
+            
+        Raises:
+            ChainError if a chained credential is missing, does not match
+            its schema or an edge does not hold
         """
-        credentials = self.reger.cloneCreds(said=None, limit=100)
+        chain = self.chains.get(said)
+        if chain is not None:
+            return chain
         
-        for cred in credentials:
-            sad = cred.get("sad", {})
-            if sad.get("a", {}).get("i") == issuer_aid:
-                return cred
+        # Prevent infinite loops
+        if depth > MAX_CHAIN_DEPTH:
+            raise ChainError("Credential chain too long (possible loop)")
         
-        return None
+        cred = self.credentials.credential(said, ctx)
+        if cred is None:
+            raise ChainError(f"Chained credential {said} not found")
+        schema_error = self.schemas.validate(cred["sad"])
+        if schema_error is not None:
+            raise ChainError(schema_error)
+        
+        chain = (cred,)
+        seen = {said}
+        for name, edge in vlei_rules.credential_edges(cred["sad"]):
+            parent_chain = self._resolve_chain(edge["n"], ctx, generation, depth + 1)
+            self._check_edge(cred["sad"], name, edge, parent_chain[0]["sad"])
+            for parent in parent_chain:
+                parent_said = parent["sad"].get("d")
+                if parent_said not in seen:
+                    seen.add(parent_said)
+                    chain += (parent,)
+        
+        self.chains.put(said, chain, generation)
+        return chain
     
-    def _check_revocations(self, credential_chain: list) -> Dict[str, Any]:
+    def _check_edge(self, sad: Dict[str, Any], name: str, edge: Dict[str, Any], node: Dict[str, Any]):
+        """
+        Check that a chained credential satisfies the edge pointing to it
+        (see vlei_rules.edge_error)
+        
+        Raises:
+            ChainError if it does not
+        """
+        error = vlei_rules.edge_error(sad, name, edge, node)
+        if error is not None:
+            raise ChainError(error)
+    
+    def _check_revocations(
+        self,
+        credential_chain: list,
+        ctx: VerificationContext,
+        snapshot: int
+    ) -> Dict[str, Any]:
         """
         Check if any credential in chain is revoked
         
+        All TEL lookups of the chain are answered in one batched pass,
+        from cached statuses where nothing changed.
+        
         Args:
             credential_chain: List of credentials to check
+            ctx: snapshot to read from
+            snapshot: revocation snapshot number read before ctx opened
             
         Returns:
-            {"valid": bool, "error": str}
+            {"valid": bool, "snapshot": int, "error": str}
         """
-        for idx, cred in enumerate(credential_chain):
-            sad = cred.get("sad", {})
-            cred_said = sad.get("d")
-            
-            if not cred_said:
-                continue
-            
-            # Check revocation registry
-            if self.reger.reger.getTvt(coring.Diger(qb64=cred_said)):
-                return {
-                    "valid": False,
-                    "error": f"Credential at chain position {idx} is revoked"
-                }
-        
-        return {"valid": True}
+        return self.revocations.check_chains([credential_chain], ctx, snapshot)[0]
 
 
 def create_verifier(hby: habbing.Habery) -> AgentDelegationVerifier:
@@ -319,4 +746,7 @@ def create_verifier(hby: habbing.Habery) -> AgentDelegationVerifier:
     Returns:
         AgentDelegationVerifier instance
     """
+    credential_index.install_hooks()
+    kel_hooks.install_hooks()
+    tel_hooks.install_hooks()
     return AgentDelegationVerifier(hby)
@@ -0,0 +1,127 @@
+"""
+Memoised Credential Chains
+
+Bounded LRU of resolved credential chains keyed by the SAID of the
+chain's first credential. Each entry is the credential followed by every
+credential it chains to through its edges, so chains that share a
+suffix (all OORs under one LE share LE -> QVI) share entries: resolving
+a new OOR stops at the first memoised SAID.
+
+An entry is dropped as soon as the TEL of any credential in it changes
+(see tel_hooks), so a revocation or reissuance is never answered from
+the cache.
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Set, Tuple
+
+
+Chain = Tuple[Dict[str, Any], ...]
+
+
+def chain_saids(chain: Chain) -> Set[str]:
+    return {cred.get("sad", {}).get("d") for cred in chain}
+
+
+class ChainCache:
+    """LRU of resolved chains with member -> entry invalidation"""
+
+    def __init__(self, max_entries: int = 1024):
+        """
+        Args:
+            max_entries: maximum number of memoised chains
+        """
+        self.max_entries = max_entries
+        self.chains: "OrderedDict[str, Chain]" = OrderedDict()
+        # credential SAID -> SAIDs of memoised chains that contain it
+        self.members: Dict[str, Set[str]] = {}
+        # Bumped by every invalidation; see put()
+        self.generation = 0
+        self.lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, said: str) -> Optional[Chain]:
+        with self.lock:
+            chain = self.chains.get(said)
+            if chain is None:
+                self.misses += 1
+                return None
+            self.chains.move_to_end(said)
+            self.hits += 1
+            return chain
+
+    def put(self, said: str, chain: Chain, generation: Optional[int] = None):
+        """
+        Memoise a resolved chain
+
+        Args:
+            said: SAID of the chain's first credential
+            chain: the resolved chain
+            generation: self.generation read before resolving started;
+                the chain is not cached if a TEL event arrived since, as
+                it may have been resolved from state that is now stale
+        """
+        with self.lock:
+            if generation is not None and generation != self.generation:
+                return
+            self._drop(said)
+            self.chains[said] = chain
+            for member in chain_saids(chain):
+                self.members.setdefault(member, set()).add(said)
+            while len(self.chains) > self.max_entries:
+                self._drop(next(iter(self.chains)))
+                self.evictions += 1
+
+    def _drop(self, said: str) -> bool:
+        chain = self.chains.pop(said, None)
+        if chain is None:
+            return False
+        for member in chain_saids(chain):
+            heads = self.members.get(member)
+            if heads is not None:
+                heads.discard(said)
+                if not heads:
+                    del self.members[member]
+        return True
+
+    def invalidate(self, said: str) -> int:
+        """
+        Drop every memoised chain that contains a credential
+
+        Args:
+            said: credential SAID
+
+        Returns:
+            Number of chains dropped
+        """
+        with self.lock:
+            self.generation += 1
+            dropped = sum(self._drop(head) for head in list(self.members.get(said, ())))
+            self.invalidations += dropped
+            return dropped
+
+    def on_tel_event(self, pre: str, sn: int, ilk: str):
+        """tel_hooks listener: pre is the credential SAID for credential events"""
+        self.invalidate(pre)
+
+    def clear(self):
+        with self.lock:
+            self.generation += 1
+            self.chains.clear()
+            self.members.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self.chains),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations
+        }
@@ -0,0 +1,199 @@
+"""
+Credential Lookup Indexes
+
+Persistent secondary indexes used by AgentDelegationVerifier to find
+credentials by issuee instead of cloning and scanning the registry.
+
+keripy's Verifier.saveCredential already maintains `subjs` in the Reger
+(issuee AID -> credential SAIDs). This module adds the composite
+(issuee AID, schema SAID) -> credential SAIDs index in the same LMDB
+environment and keeps it current by hooking saveCredential, so every
+credential admitted into the Reger is indexed as it is saved. Other
+views derived from saved credentials register with add_listener.
+
+Lookups are LMDB B-tree reads and return every matching credential,
+however large the registry is. Passed a VerificationContext they read
+from its snapshot instead of opening a transaction per read.
+"""
+
+import weakref
+from typing import Any, Callable, Dict, List, Optional
+
+from keri.core import coring
+from keri.db import subing
+from keri.vdr import verifying, viring
+
+from custom_sally import listeners
+from custom_sally.verification_context import VerificationContext
+
+
+# Sub database key for the (issuee, schema) index
+SUBJECT_SCHEMA_SUBKEY = "sjsc."
+
+CredentialListener = Callable[[viring.Reger, Any], None]
+
+_listeners = listeners.Listeners("Credential")
+
+# Register with add_listener(listener), called as listener(reger, creder)
+# after the credential is saved and indexed
+add_listener = _listeners.add
+remove_listener = _listeners.remove
+notify = _listeners.notify
+
+
+class CredentialIndex:
+    """Issuee and (issuee, schema) indexes over a Reger's credentials"""
+
+    def __init__(self, reger: viring.Reger):
+        """
+        Open the composite index in the Reger's LMDB environment
+
+        Args:
+            reger: credential registry whose credentials are indexed
+        """
+        self.reger = reger
+        self.subject_schemas = subing.CesrDupSuber(
+            db=reger,
+            subkey=SUBJECT_SCHEMA_SUBKEY,
+            klas=coring.Saider
+        )
+
+    def index(self, creder) -> bool:
+        """
+        Index one saved credential (idempotent)
+
+        Args:
+            creder: SerderACDC of the credential
+
+        Returns:
+            True if the credential has an issuee and was indexed
+        """
+        attrib = creder.attrib if isinstance(creder.attrib, dict) else {}
+        subject = attrib.get("i")
+        if not subject:
+            return False
+
+        saider = coring.Saider(qb64=creder.said)
+        # Normally already written by saveCredential, needed when backfilling
+        self.reger.subjs.add(keys=subject, val=saider)
+        self.subject_schemas.add(keys=(subject, creder.schema), val=saider)
+        return True
+
+    def reindex(self) -> int:
+        """
+        Backfill the indexes from every credential in the Reger
+
+        Covers credentials saved before the hook was installed.
+
+        Returns:
+            Number of credentials indexed
+        """
+        count = 0
+        for _, creder in self.reger.creds.getItemIter():
+            count += self.index(creder)
+        return count
+
+    def saids(
+        self,
+        issuee: str,
+        schema: Optional[str] = None,
+        ctx: Optional[VerificationContext] = None
+    ) -> List[str]:
+        """
+        SAIDs of credentials issued to an AID, optionally of one schema
+
+        Args:
+            issuee: issuee (subject) AID
+            schema: schema SAID to restrict to
+            ctx: snapshot to read from
+
+        Returns:
+            List of credential SAIDs (qb64)
+        """
+        suber = self.reger.subjs if schema is None else self.subject_schemas
+        keys = issuee if schema is None else (issuee, schema)
+        if ctx is not None:
+            return [val.decode("utf-8") for val in ctx.dups(suber, keys)]
+        return [saider.qb64 for saider in suber.get(keys=keys)]
+
+    def credentials(
+        self,
+        issuee: str,
+        schema: Optional[str] = None,
+        ctx: Optional[VerificationContext] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Credentials issued to an AID, optionally of one schema
+
+        Args:
+            issuee: issuee (subject) AID
+            schema: schema SAID to restrict to
+            ctx: snapshot to read from
+
+        Returns:
+            List of {"sad": ..., "pre": issuer AID} dicts, the subset of
+            the cloneCreds shape the verifier uses
+        """
+        creds = (self.credential(said, ctx) for said in self.saids(issuee, schema, ctx))
+        return [cred for cred in creds if cred is not None]
+
+    def credential(self, said: str, ctx: Optional[VerificationContext] = None) -> Optional[Dict[str, Any]]:
+        """
+        Load one credential by SAID
+
+        Args:
+            said: credential SAID
+            ctx: snapshot to read from
+
+        Returns:
+            {"sad": ..., "pre": issuer AID} or None if not in the Reger
+        """
+        if ctx is not None:
+            creder = ctx.credential(said)
+        else:
+            creder = self.reger.creds.get(keys=said)
+        if creder is None:
+            return None
+        return {"sad": creder.sad, "pre": creder.issuer}
+
+
+_indexes: "weakref.WeakKeyDictionary[viring.Reger, CredentialIndex]" = weakref.WeakKeyDictionary()
+
+
+def index_for(reger: viring.Reger) -> CredentialIndex:
+    """
+    Shared CredentialIndex for a Reger, backfilled when first opened
+
+    Args:
+        reger: credential registry
+
+    Returns:
+        CredentialIndex instance
+    """
+    index = _indexes.get(reger)
+    if index is None:
+        index = CredentialIndex(reger)
+        count = index.reindex()
+        print(f"✓ Credential index ready ({count} credentials with an issuee)")
+        _indexes[reger] = index
+    return index
+
+
+def install_hooks():
+    """
+    Index credentials as keripy's Verifier saves them
+
+    Wraps Verifier.saveCredential once per process; calling this again
+    is a no-op.
+    """
+    original = verifying.Verifier.saveCredential
+    if getattr(original, "indexed", False):
+        return
+
+    def saveCredential(self, creder, prefixer, seqner, saider):
+        original(self, creder, prefixer, seqner, saider)
+        index_for(self.reger).index(creder)
+        notify(self.reger, creder)
+
+    saveCredential.indexed = True
+    verifying.Verifier.saveCredential = saveCredential
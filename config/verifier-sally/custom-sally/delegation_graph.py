@@ -0,0 +1,250 @@
+"""
+Delegation Graph
+
+Materialized view of the vLEI authority tree Sally holds KELs and
+credentials for:
+
+    GEDA -> QVI -> LE -> OOR holder -> agents
+
+Each AID points to the AID it derives its authority from:
+
+- a delegated AID to its delegator (KEL `dip`)
+- the issuee of a QVI or LE credential to the credential's issuer
+- the issuee of an OOR credential to the issuer of the OOR Auth it
+  chains to, when that names the issuee (`a.AID`): an OOR holder hangs
+  below the LE that authorized it, not below the QVI that issued it
+
+Only these vLEI chain credentials, known by schema SAID, add edges: an
+ECR, an authorization or any other credential naming an issuee gives it
+no place in the tree.
+
+The graph is kept current by the kel_hooks and credential_index
+listeners and can be rebuilt from the Baser and Reger at startup.
+Walking from an AID to its root is O(depth). Revocation is not folded
+into the structure; callers check the credentials on a path against
+RevocationStatusService.
+"""
+
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Set
+
+from keri.core import serdering
+from keri.db import basing, dbing
+from keri.vdr import viring
+
+from vlei_verification import vlei_rules
+
+from custom_sally import credential_index, kel_hooks
+
+
+# Node kinds, by how the AID got its parent
+DELEGATION = "delegation"
+CREDENTIAL = "credential"
+
+# Credential types whose issuee is linked to the issuer
+CHAIN_KINDS = (vlei_rules.QVI, vlei_rules.LE, vlei_rules.OOR)
+
+# Longest parent path walked before assuming a loop
+MAX_DEPTH = 16
+
+
+@dataclass
+class Node:
+    """One AID and the edge to the AID it derives authority from"""
+    aid: str
+    parent: Optional[str] = None
+    kind: Optional[str] = None
+    # Delegated inception digest or credential SAID establishing the edge
+    via: Optional[str] = None
+    # Authorization credential SAID for credential edges through one
+    auth: Optional[str] = None
+    children: Set[str] = field(default_factory=set)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "aid": self.aid,
+            "parent": self.parent,
+            "kind": self.kind,
+            "via": self.via,
+            "auth": self.auth
+        }
+
+
+class DelegationGraph:
+    """Parent-pointer tree of AIDs with children for subtree dumps"""
+
+    def __init__(self):
+        self.nodes: Dict[str, Node] = {}
+        self.lock = threading.RLock()
+        self.updates = 0
+
+    def node(self, aid: str) -> Optional[Node]:
+        with self.lock:
+            return self.nodes.get(aid)
+
+    def _node(self, aid: str) -> Node:
+        node = self.nodes.get(aid)
+        if node is None:
+            node = self.nodes[aid] = Node(aid=aid)
+        return node
+
+    def link(self, aid: str, parent: str, kind: str, via: str, auth: Optional[str] = None):
+        """
+        Set the parent of an AID, replacing any previous edge
+
+        A link that would close a loop is ignored.
+        """
+        with self.lock:
+            if aid == parent or aid in self._ancestors(parent):
+                return
+            node = self._node(aid)
+            if node.parent is not None and node.parent in self.nodes:
+                self.nodes[node.parent].children.discard(aid)
+            node.parent, node.kind, node.via, node.auth = parent, kind, via, auth
+            self._node(parent).children.add(aid)
+            self.updates += 1
+
+    def _ancestors(self, aid: str) -> List[str]:
+        chain = []
+        node = self.nodes.get(aid)
+        while node is not None and node.parent is not None and len(chain) < MAX_DEPTH:
+            chain.append(node.parent)
+            node = self.nodes.get(node.parent)
+        return chain
+
+    def path(self, aid: str) -> List[Node]:
+        """
+        Nodes from an AID up to its root, O(depth)
+
+        Returns:
+            [node(aid), node(parent), ..., node(root)], empty if unknown
+        """
+        with self.lock:
+            path = []
+            node = self.nodes.get(aid)
+            while node is not None and len(path) <= MAX_DEPTH:
+                path.append(node)
+                node = self.nodes.get(node.parent) if node.parent else None
+            return path
+
+    def subtree(self, aid: str, depth: int = 3, max_nodes: int = 1000) -> Optional[Dict[str, Any]]:
+        """
+        Nested dump of an AID and its descendants
+
+        Args:
+            aid: root of the dump
+            depth: levels of children to include
+            max_nodes: stop adding children after this many nodes
+
+        Returns:
+            node dict with "children" (and "truncated" where cut), None
+            if the AID is not in the graph
+        """
+        with self.lock:
+            if aid not in self.nodes:
+                return None
+            budget = [max_nodes]
+
+            def dump(node: Node, level: int) -> Dict[str, Any]:
+                budget[0] -= 1
+                entry = node.to_dict()
+                entry["children"] = []
+                children = sorted(node.children)
+                for child in children:
+                    if level >= depth or budget[0] <= 0:
+                        entry["truncated"] = len(children) - len(entry["children"])
+                        break
+                    entry["children"].append(dump(self.nodes[child], level + 1))
+                return entry
+
+            return dump(self.nodes[aid], 0)
+
+    # Ingestion
+
+    def on_key_event(self, serder: serdering.SerderKERI):
+        """kel_hooks listener: delegated inceptions link agent to delegator"""
+        if serder.ilk == "dip" and serder.delpre:
+            self.link(serder.pre, serder.delpre, DELEGATION, serder.said)
+
+    def on_credential(self, reger: viring.Reger, creder):
+        """credential_index listener"""
+        self.add_credential(reger, creder)
+
+    def add_credential(self, reger: viring.Reger, creder):
+        kind = vlei_rules.VLEI_TYPES.get(creder.schema)
+        attrib = creder.attrib if isinstance(creder.attrib, dict) else {}
+        issuee = attrib.get("i")
+        if kind not in CHAIN_KINDS or not issuee:
+            return
+
+        parent, auth = creder.issuer, None
+        edges = creder.edge if isinstance(creder.edge, dict) and kind == vlei_rules.OOR else {}
+        for name, edge in edges.items():
+            if name == "d" or not isinstance(edge, dict) or not edge.get("n"):
+                continue
+            node = reger.creds.get(keys=edge["n"])
+            if (node is not None and vlei_rules.VLEI_TYPES.get(node.schema) == vlei_rules.OOR_AUTH and
+                    isinstance(node.attrib, dict) and node.attrib.get("AID") == issuee):
+                parent, auth = node.issuer, node.said
+                break
+
+        self.link(issuee, parent, CREDENTIAL, creder.said, auth)
+
+    def rebuild(self, baser: basing.Baser, reger: viring.Reger) -> int:
+        """
+        Rebuild the graph from the stores
+
+        Args:
+            baser: KEL store, for delegated AIDs
+            reger: credential registry
+
+        Returns:
+            Number of nodes
+        """
+        with self.lock:
+            self.nodes.clear()
+            for (pre,), state in baser.states.getItemIter():
+                if state.di:
+                    dig = baser.getKeLast(dbing.snKey(pre, 0))
+                    via = bytes(dig).decode("utf-8") if dig is not None else None
+                    self.link(pre, state.di, DELEGATION, via)
+            for _, creder in reger.creds.getItemIter():
+                self.add_credential(reger, creder)
+            return len(self.nodes)
+
+    def stats(self) -> Dict[str, Any]:
+        with self.lock:
+            return {
+                "nodes": len(self.nodes),
+                "roots": sum(1 for node in self.nodes.values() if node.parent is None),
+                "updates": self.updates
+            }
+
+
+_graph: Optional[DelegationGraph] = None
+_graph_lock = threading.Lock()
+
+
+def shared_graph(baser: basing.Baser, reger: viring.Reger) -> DelegationGraph:
+    """
+    Process-wide graph, rebuilt from the stores and hooked up when first used
+
+    Args:
+        baser: KEL store
+        reger: credential registry
+
+    Returns:
+        DelegationGraph instance
+    """
+    global _graph
+    with _graph_lock:
+        if _graph is None:
+            graph = DelegationGraph()
+            # Listen first: events logged during the rebuild wait on its lock
+            kel_hooks.add_listener(graph.on_key_event)
+            credential_index.add_listener(graph.on_credential)
+            count = graph.rebuild(baser, reger)
+            print(f"✓ Delegation graph ready ({count} AIDs)")
+            _graph = graph
+        return _graph
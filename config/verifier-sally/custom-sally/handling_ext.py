@@ -7,7 +7,9 @@ Endpoint: POST /verify/agent-delegation
 Request body:
 {
     "agent_aid": "EAgent...",
-    "oor_holder_aid": "EOOR..."
+    "oor_holder_aid": "EOOR...",
+    "agent_oobi": "http://...",     (optional, to resolve an unknown agent)
+    "oor_holder_oobi": "http://..." (optional, to resolve an unknown holder)
 }
 
 Response:
@@ -19,6 +21,34 @@ Response:
     "credential_chain": [...],      (if valid)
     "error": "..."                  (if invalid)
 }
+
+Verifications run on the shared worker pool (see worker_pool); when it
+is saturated the endpoint answers 503 with a Retry-After header. KELs
+of unknown AIDs are resolved in the background (see kel_prefetch)
+meanwhile the endpoint answers 503 with Retry-After and the pending
+AIDs; an AID whose OOBI is refused or fails gets a 400 with the reason.
+
+Endpoint: POST /verify/oor-holder-agents
+
+Request body:
+{
+    "oor_holder_aid": "EOOR...",
+    "agent_aids": ["EAgent...", ...]   (optional, default every agent
+                                         delegated by the holder)
+}
+
+Response:
+{
+    "valid": true/false,            (the holder's own chain)
+    "oor_holder_aid": "...",
+    "agents": [{"agent_aid": "...", "valid": true/false, "error": "..."}],
+    "verified": n,
+    "failed": n
+}
+
+Endpoint: GET /graph/delegations/{aid}?depth=3&max_nodes=1000
+
+Dumps the delegation graph below an AID for operational inspection.
 """
 
 import json
@@ -26,7 +56,93 @@ import falcon
 from typing import Dict, Any
 from keri.app import habbing
 
-from custom_sally import agent_verifying
+from custom_sally import agent_verifying, delegation_graph, kel_prefetch, worker_pool
+
+
+def stream_from_pool(
+    resp: falcon.Response,
+    pool: worker_pool.VerificationPool,
+    fn,
+    **kwargs
+):
+    """
+    Run a verification on the pool and stream its JSON result
+    
+    Answers 503 with Retry-After if the pool is saturated. Otherwise 200,
+    with verification failures reported in the body, or 500 if the
+    worker raised.
+    
+    Args:
+        resp: Falcon response object
+        pool: pool to run fn on
+        fn: verification, called as fn(**kwargs)
+    """
+    try:
+        future = pool.submit(fn, **kwargs)
+    except worker_pool.PoolSaturated as e:
+        resp.status = falcon.HTTP_503
+        resp.set_header("Retry-After", str(e.retry_after))
+        resp.media = {
+            "error": "Verification capacity exhausted, retry later",
+            "retry_after": e.retry_after
+        }
+        return
+    
+    resp.status = falcon.HTTP_200
+    resp.content_type = falcon.MEDIA_JSON
+    resp.stream = worker_pool.poll_result(
+        future,
+        lambda e: {"valid": False, "error": f"Internal server error: {str(e)}"}
+    )
+
+
+def prefetch_or_retry(
+    resp: falcon.Response,
+    prefetcher: kel_prefetch.KelPrefetcher,
+    oobis: Dict[str, Any]
+) -> bool:
+    """
+    Start resolving the KELs of unknown AIDs without waiting for them
+    
+    Answers 400 with the errors when an unknown AID cannot be resolved
+    (no OOBI, a refused OOBI or a failed resolution), else 503 with
+    Retry-After and the pending AIDs while any is being resolved.
+    
+    Args:
+        resp: Falcon response object
+        prefetcher: background KEL resolver
+        oobis: AID -> OOBI URL or None
+        
+    Returns:
+        True if every KEL is available and verification can go ahead
+    """
+    try:
+        pending, failed = prefetcher.ensure(oobis, wait=0)
+    except worker_pool.PoolSaturated as e:
+        pending, failed, retry_after = list(oobis), {}, e.retry_after
+    else:
+        retry_after = worker_pool.VERIFY_RETRY_AFTER
+    if failed:
+        resp.status = falcon.HTTP_400
+        resp.media = {
+            "valid": False,
+            "error": "KEL resolution failed",
+            "failed": failed
+        }
+        return False
+    if not pending:
+        return True
+    
+    resp.status = falcon.HTTP_503
+    resp.set_header("Retry-After", str(retry_after))
+    resp.media = {
+        "valid": False,
+        "error": "KEL resolution in progress, retry later",
+        "pending": pending,
+        "retryable": True,
+        "retry_after": retry_after
+    }
+    return False
 
 
 class AgentDelegationVerificationResource:
@@ -43,11 +159,17 @@ class AgentDelegationVerificationResource:
         """
         self.hby = hby
         self.verifier = agent_verifying.create_verifier(hby)
+        self.pool = worker_pool.shared_pool()
+        self.prefetcher = kel_prefetch.shared_prefetcher(hby)
     
     def on_post(self, req: falcon.Request, resp: falcon.Response):
         """
         Handle POST request to verify agent delegation
         
+        The LMDB-bound verification runs on a worker thread; the response
+        body is streamed once it completes so Sally's HIO loop keeps
+        serving other requests meanwhile.
+        
         Args:
             req: Falcon request object
             resp: Falcon response object
@@ -68,19 +190,83 @@ class AgentDelegationVerificationResource:
                 }
                 return
             
+            oobis = {
+                oor_holder_aid: data.get("oor_holder_oobi"),
+                agent_aid: data.get("agent_oobi")
+            }
+            if not prefetch_or_retry(resp, self.prefetcher, oobis):
+                return
+            
             # Perform verification
-            result = self.verifier.verify_agent_delegation(
+            stream_from_pool(
+                resp,
+                self.pool,
+                self.verifier.verify_agent_delegation,
                 agent_aid=agent_aid,
                 oor_holder_aid=oor_holder_aid
             )
             
-            # Set response status based on result
-            if result["valid"]:
-                resp.status = falcon.HTTP_200
-            else:
-                resp.status = falcon.HTTP_200  # Still 200, but valid=false
+        except json.JSONDecodeError:
+            resp.status = falcon.HTTP_400
+            resp.media = {
+                "error": "Invalid JSON in request body"
+            }
+        except Exception as e:
+            resp.status = falcon.HTTP_500
+            resp.media = {
+                "error": f"Internal server error: {str(e)}"
+            }
+
+
+class OORHolderAgentsVerificationResource:
+    """
+    Falcon resource verifying every agent of an OOR holder in one pass
+    """
+    
+    def __init__(self, verifier: agent_verifying.AgentDelegationVerifier):
+        """
+        Args:
+            verifier: verifier shared with the single agent endpoint
+        """
+        self.verifier = verifier
+        self.pool = worker_pool.shared_pool()
+    
+    def on_post(self, req: falcon.Request, resp: falcon.Response):
+        """
+        Handle POST request to verify an OOR holder's agents
+        
+        Args:
+            req: Falcon request object
+            resp: Falcon response object
+        """
+        try:
+            data = json.loads(req.bounded_stream.read())
+            
+            oor_holder_aid = data.get("oor_holder_aid")
+            agent_aids = data.get("agent_aids")
+            
+            if not oor_holder_aid:
+                resp.status = falcon.HTTP_400
+                resp.media = {
+                    "error": "Missing required field: oor_holder_aid"
+                }
+                return
+            if agent_aids is not None and (
+                    not isinstance(agent_aids, list) or
+                    not all(isinstance(aid, str) and aid for aid in agent_aids)):
+                resp.status = falcon.HTTP_400
+                resp.media = {
+                    "error": "agent_aids must be a list of AIDs"
+                }
+                return
             
-            resp.media = result
+            stream_from_pool(
+                resp,
+                self.pool,
+                self.verifier.verify_oor_holder_agents,
+                oor_holder_aid=oor_holder_aid,
+                agent_aids=agent_aids
+            )
             
         except json.JSONDecodeError:
             resp.status = falcon.HTTP_400
@@ -94,6 +280,47 @@ class AgentDelegationVerificationResource:
             }
 
 
+class DelegationGraphResource:
+    """
+    Falcon resource dumping a subtree of the delegation graph
+    """
+    
+    def __init__(self, graph: delegation_graph.DelegationGraph):
+        """
+        Args:
+            graph: delegation graph to inspect
+        """
+        self.graph = graph
+    
+    def on_get(self, req: falcon.Request, resp: falcon.Response, aid: str):
+        """
+        Handle GET request for the subtree below an AID
+        
+        Args:
+            req: Falcon request object
+            resp: Falcon response object
+            aid: root AID of the dump
+        """
+        depth = req.get_param_as_int("depth", default=3, min_value=0,
+                                     max_value=delegation_graph.MAX_DEPTH)
+        max_nodes = req.get_param_as_int("max_nodes", default=1000, min_value=1)
+        
+        subtree = self.graph.subtree(aid, depth=depth, max_nodes=max_nodes)
+        if subtree is None:
+            resp.status = falcon.HTTP_404
+            resp.media = {
+                "error": f"AID {aid} not in delegation graph"
+            }
+            return
+        
+        resp.status = falcon.HTTP_200
+        resp.media = {
+            "path": [node.aid for node in self.graph.path(aid)],
+            "subtree": subtree,
+            "stats": self.graph.stats()
+        }
+
+
 def register_routes(app: falcon.App, hby: habbing.Habery):
     """
     Register custom routes with Sally's Falcon app
@@ -108,10 +335,14 @@ def register_routes(app: falcon.App, hby: habbing.Habery):
     # Create resource instance
     agent_verification = AgentDelegationVerificationResource(hby)
     
-    # Register route
+    # Register routes
     app.add_route('/verify/agent-delegation', agent_verification)
+    app.add_route('/verify/oor-holder-agents', OORHolderAgentsVerificationResource(agent_verification.verifier))
+    app.add_route('/graph/delegations/{aid}', DelegationGraphResource(agent_verification.verifier.graph))
     
     print("✓ Custom route registered: POST /verify/agent-delegation")
+    print("✓ Custom route registered: POST /verify/oor-holder-agents")
+    print("✓ Custom route registered: GET /graph/delegations/{aid}")
 
 
 # Alternative: Middleware approach for automatic registration
@@ -0,0 +1,49 @@
+"""
+KEL Change Notifications
+
+Lets views derived from key event logs (see delegation_graph) follow
+KELs as Sally accepts events. keripy's Kever.logEvent is wrapped once per
+process and every registered listener is called after each first-seen
+event is logged; additional signatures on an already accepted event do
+not notify again.
+
+Listeners are called as listener(serder) with the SerderKERI of the
+accepted event (serder.pre, serder.sn, serder.ilk, serder.delpre).
+"""
+
+from typing import Callable
+
+from keri.core import eventing, serdering
+
+from custom_sally import listeners
+
+
+KelListener = Callable[[serdering.SerderKERI], None]
+
+_listeners = listeners.Listeners("KEL")
+
+# Register with add_listener(listener), called as listener(serder)
+add_listener = _listeners.add
+remove_listener = _listeners.remove
+notify = _listeners.notify
+
+
+def install_hooks():
+    """
+    Notify listeners whenever keripy first accepts a key event
+
+    Wraps Kever.logEvent once per process; calling this again is a
+    no-op.
+    """
+    original = eventing.Kever.logEvent
+    if getattr(original, "notifying", False):
+        return
+
+    def logEvent(self, serder, *args, first=False, **kwargs):
+        fn = original(self, serder, *args, first=first, **kwargs)
+        if first:
+            notify(serder)
+        return fn
+
+    logEvent.notifying = True
+    eventing.Kever.logEvent = logEvent
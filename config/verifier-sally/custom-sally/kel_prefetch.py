@@ -0,0 +1,313 @@
+"""
+Background OOBI / KEL Prefetch
+
+A verification for an AID Sally holds no KEL for used to fail outright,
+so OOBIs had to be resolved by separate task scripts before every
+verification. KelPrefetcher resolves OOBIs of unknown AIDs in the
+background instead. It queues each OOBI in the Habery's OOBI table, for
+the Oobiery Sally runs on its HIO loop (the one that resolves the iurls
+of verifier.json) to fetch and parse with its own Kevery; nothing is
+parsed off Sally's loop. A single watcher thread settles every pending
+fetch: it sleeps until kel_hooks reports an event of an awaited AID,
+oobi_hooks reports a processed OOBI response, or a deadline passes, so
+slow OOBIs hold no thread each.
+
+Callers either wait for the KELs up to a deadline (ensure,
+ensure_async) or answer with a retryable status and let the client come
+back. Concurrent requests for the same AID share one fetch.
+
+OOBIs come from the request (e.g. "agent_oobi") or, failing that, from
+SALLY_OOBI_URL_TEMPLATE, formatted with the AID:
+    http://keria:3902/oobi/{aid}
+
+Sally fetches whatever it is given, so an OOBI must be an http(s) URL
+on the template's host or one of SALLY_OOBI_HOSTS; others are refused
+before anything is queued.
+
+A delegated agent whose KEL arrives before its delegator's waits in
+Sally's escrows and is accepted as soon as the delegator's KEL is in.
+
+Configuration (environment):
+    SALLY_OOBI_URL_TEMPLATE     OOBI URL for AIDs given without one
+    SALLY_OOBI_HOSTS            further hosts (host or host:port, comma
+                                separated) request OOBIs may point to
+    SALLY_PREFETCH_MAX_INFLIGHT OOBI resolutions underway at once
+                                (default 64)
+    SALLY_PREFETCH_TIMEOUT      seconds an OOBI is given to yield its
+                                KEL (default 10)
+    SALLY_PREFETCH_WAIT         default seconds a request waits (default 5)
+"""
+
+import asyncio
+import os
+import threading
+import time
+import weakref
+from concurrent import futures
+from typing import Any, Dict, List, Optional, Set, Tuple
+from urllib import parse
+
+from keri.app import habbing, oobiing
+from keri.db import basing
+from keri.help import helping
+
+from custom_sally import kel_hooks, oobi_hooks, worker_pool
+
+
+OOBI_URL_TEMPLATE = os.getenv("SALLY_OOBI_URL_TEMPLATE", "")
+OOBI_HOSTS = [host.strip().lower() for host in os.getenv("SALLY_OOBI_HOSTS", "").split(",") if host.strip()]
+PREFETCH_MAX_INFLIGHT = int(os.getenv("SALLY_PREFETCH_MAX_INFLIGHT", "64"))
+PREFETCH_TIMEOUT = float(os.getenv("SALLY_PREFETCH_TIMEOUT", "10"))
+PREFETCH_WAIT = float(os.getenv("SALLY_PREFETCH_WAIT", "5"))
+
+# Seconds from a KEL event of an awaited AID to the check for its key
+# state, which Kevery records only after the event is logged
+RECHECK_DELAY = 0.05
+
+
+class PrefetchError(Exception):
+    """An AID's KEL could not be resolved"""
+
+
+def allowed_hosts() -> Set[str]:
+    """Hosts OOBIs may point to: SALLY_OOBI_HOSTS and the template's"""
+    hosts = set(OOBI_HOSTS)
+    if OOBI_URL_TEMPLATE:
+        hosts.add(parse.urlparse(OOBI_URL_TEMPLATE).netloc.lower())
+    return hosts
+
+
+def oobi_url_error(url: str, hosts: Set[str]) -> Optional[str]:
+    """
+    Why Sally must not be sent to fetch an OOBI URL
+
+    Returns:
+        None for an http(s) URL on one of hosts (host or host:port), else the error
+    """
+    try:
+        parsed = parse.urlparse(url)
+        hostname = parsed.hostname
+    except ValueError:
+        return f"Malformed OOBI URL {url!r}"
+    if parsed.scheme not in ("http", "https") or not hostname:
+        return f"OOBI {url!r} is not an http(s) URL"
+    if parsed.netloc.lower() not in hosts and hostname.lower() not in hosts:
+        return f"OOBI host {parsed.netloc} is not allowed (SALLY_OOBI_HOSTS)"
+    return None
+
+
+class KelPrefetcher:
+    """Bounded background OOBI resolution with per-AID coalescing"""
+
+    def __init__(
+        self,
+        hby: habbing.Habery,
+        max_inflight: int = PREFETCH_MAX_INFLIGHT,
+        timeout: float = PREFETCH_TIMEOUT
+    ):
+        """
+        Args:
+            hby: Sally's Habery, whose OOBI table OOBIs are queued in
+            max_inflight: OOBI resolutions underway at once
+            timeout: seconds an OOBI is given to yield its KEL
+        """
+        self.hby = hby
+        self.max_inflight = max_inflight
+        self.timeout = timeout
+        self.hosts = allowed_hosts()
+        # AID -> (OOBI URL, future, deadline)
+        self.inflight: Dict[str, Tuple[str, futures.Future, float]] = {}
+        self.changed = threading.Condition()
+        self.recheck = False
+        self.watcher: Optional[threading.Thread] = None
+        self.requested = 0
+        self.coalesced = 0
+        self.rejected = 0
+        self.resolved = 0
+        self.failed = 0
+        kel_hooks.add_listener(self._on_kel_event)
+        oobi_hooks.add_listener(self._on_oobi)
+
+    def known(self, aid: str) -> bool:
+        return self.hby.db.kevers.get(aid) is not None
+
+    def prefetch(self, aid: str, oobi: Optional[str] = None) -> Optional[futures.Future]:
+        """
+        Start resolving an AID's KEL unless it is known or already underway
+
+        Args:
+            aid: AID to resolve
+            oobi: OOBI URL, default from SALLY_OOBI_URL_TEMPLATE
+
+        Returns:
+            Future resolving to the AID once its KEL is ingested, None if
+            the KEL is already known
+
+        Raises:
+            PrefetchError if there is no OOBI to resolve or it is refused
+            worker_pool.PoolSaturated if max_inflight resolutions are underway
+        """
+        if self.known(aid):
+            return None
+        with self.changed:
+            entry = self.inflight.get(aid)
+            if entry is not None:
+                self.coalesced += 1
+                return entry[1]
+            url = oobi or (OOBI_URL_TEMPLATE.format(aid=aid) if OOBI_URL_TEMPLATE else None)
+            if not url:
+                raise PrefetchError(f"No OOBI for unknown AID {aid}")
+            error = oobi_url_error(url, self.hosts)
+            if error is not None:
+                raise PrefetchError(error)
+            if len(self.inflight) >= self.max_inflight:
+                self.rejected += 1
+                raise worker_pool.PoolSaturated(self.max_inflight, worker_pool.VERIFY_RETRY_AFTER)
+
+            # Outcomes recorded by an earlier attempt must not end this one
+            self.hby.db.roobi.rem(keys=(url,))
+            self.hby.db.eoobi.rem(keys=(url,))
+            self.hby.db.oobis.pin(keys=(url,), val=basing.OobiRecord(date=helping.nowIso8601()))
+
+            future = futures.Future()
+            self.inflight[aid] = (url, future, time.monotonic() + self.timeout)
+            self.requested += 1
+            if self.watcher is None:
+                self.watcher = threading.Thread(target=self._watch, name="sally-prefetch", daemon=True)
+                self.watcher.start()
+            self.changed.notify()
+        return future
+
+    def _on_kel_event(self, serder):
+        with self.changed:
+            if serder.pre in self.inflight:
+                self.recheck = True
+                self.changed.notify()
+
+    def _on_oobi(self, url: str):
+        with self.changed:
+            if any(entry[0] == url for entry in self.inflight.values()):
+                self.changed.notify()
+
+    def _watch(self):
+        """Settle pending fetches whenever a hook or a deadline says one may be done (watcher thread)"""
+        with self.changed:
+            while True:
+                self.changed.wait(self._settle())
+
+    def _settle(self) -> Optional[float]:
+        """
+        Resolve or fail every fetch whose KEL is in, whose OOBI failed or
+        whose deadline passed; called with .changed held
+
+        Returns:
+            seconds until the next check is due, None to wait for a hook
+        """
+        now = time.monotonic()
+        due = None
+        for aid, (url, future, deadline) in list(self.inflight.items()):
+            error = None
+            if not self.known(aid):
+                record = self.hby.db.roobi.get(keys=(url,))
+                if record is not None and record.state == oobiing.Result.failed:
+                    error = f"Resolving OOBI {url} failed"
+                elif self.hby.db.eoobi.get(keys=(url,)) is not None:
+                    error = f"OOBI {url} not found"
+                elif now >= deadline:
+                    # A delegated KEL may still wait in escrow for its delegator's
+                    error = f"OOBI {url} did not yield an accepted KEL for {aid} within {self.timeout}s"
+                else:
+                    due = deadline - now if due is None else min(due, deadline - now)
+                    continue
+
+            del self.inflight[aid]
+            if error is None:
+                self.resolved += 1
+                future.set_result(aid)
+            else:
+                self.failed += 1
+                future.set_exception(PrefetchError(error))
+
+        if self.recheck and self.inflight:
+            due = RECHECK_DELAY if due is None else min(due, RECHECK_DELAY)
+        self.recheck = False
+        return due
+
+    def _start(self, oobis: Dict[str, Optional[str]]) -> Tuple[Dict[str, futures.Future], Dict[str, str]]:
+        started, failed = {}, {}
+        for aid, oobi in oobis.items():
+            try:
+                future = self.prefetch(aid, oobi)
+            except PrefetchError as e:
+                failed[aid] = str(e)
+                continue
+            if future is not None:
+                started[aid] = future
+        return started, failed
+
+    def _outcome(self, started: Dict[str, futures.Future], failed: Dict[str, str]) -> Tuple[List[str], Dict[str, str]]:
+        pending = []
+        for aid, future in started.items():
+            if not future.done():
+                # Done after all if an escrowed KEL came in with another
+                if not self.known(aid):
+                    pending.append(aid)
+            elif future.exception() is not None and not self.known(aid):
+                failed[aid] = str(future.exception())
+        return pending, failed
+
+    def ensure(self, oobis: Dict[str, Optional[str]], wait: float = PREFETCH_WAIT) -> Tuple[List[str], Dict[str, str]]:
+        """
+        Resolve unknown AIDs, waiting up to a deadline
+
+        Args:
+            oobis: AID -> OOBI URL (None for the template)
+            wait: seconds to wait; 0 starts the fetches and returns
+
+        Returns:
+            (pending, failed): AIDs still being resolved at the deadline,
+            and AID -> error for those that cannot be resolved
+
+        Raises:
+            worker_pool.PoolSaturated if max_inflight resolutions are underway
+        """
+        deadline = time.monotonic() + wait
+        started, failed = self._start(oobis)
+        if started and wait > 0:
+            futures.wait(list(started.values()), timeout=max(0.0, deadline - time.monotonic()))
+        return self._outcome(started, failed)
+
+    async def ensure_async(self, oobis: Dict[str, Optional[str]], wait: float = PREFETCH_WAIT) -> Tuple[List[str], Dict[str, str]]:
+        """ensure() for coroutines: neither key state reads nor the wait block the event loop"""
+        loop = asyncio.get_running_loop()
+        started, failed = await loop.run_in_executor(None, self._start, oobis)
+        if started and wait > 0:
+            await asyncio.wait([asyncio.wrap_future(future) for future in started.values()], timeout=wait)
+        return await loop.run_in_executor(None, self._outcome, started, failed)
+
+    def stats(self) -> Dict[str, Any]:
+        with self.changed:
+            return {
+                "inflight": len(self.inflight),
+                "max_inflight": self.max_inflight,
+                "requested": self.requested,
+                "coalesced": self.coalesced,
+                "rejected": self.rejected,
+                "resolved": self.resolved,
+                "failed": self.failed
+            }
+
+
+_prefetchers: "weakref.WeakKeyDictionary[habbing.Habery, KelPrefetcher]" = weakref.WeakKeyDictionary()
+_prefetchers_lock = threading.Lock()
+
+
+def shared_prefetcher(hby: habbing.Habery) -> KelPrefetcher:
+    """Process-wide prefetcher for a Habery"""
+    with _prefetchers_lock:
+        prefetcher = _prefetchers.get(hby)
+        if prefetcher is None:
+            kel_hooks.install_hooks()
+            oobi_hooks.install_hooks()
+            prefetcher = _prefetchers[hby] = KelPrefetcher(hby)
+        return prefetcher
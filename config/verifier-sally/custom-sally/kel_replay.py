@@ -0,0 +1,364 @@
+"""
+Incremental KEL Replay
+
+Verifications used to treat every KEL they touched as new: the OOR
+holder's KEL was scanned from inception for delegation seals on every
+batch verification. KelReplayer keeps a persistent checkpoint per AID,
+
+    (verified-through sn, digest of that event, key state and next key
+     digests in force, delegation seals anchored so far)
+
+and validates only the events accepted after it:
+
+- chaining: each event is its own SAID, follows at the next sn and its
+  prior digest 'p' is the digest of the checkpointed (or previous) event
+- signatures: the controller signatures stored with the event satisfy
+  the signing threshold of the keys in force
+- pre-rotation: a rotation's signing keys are the ones the prior
+  establishment event committed to, satisfying its next threshold
+- seals: a delegated event (dip, drt) is anchored by a delegator event
+  carrying its seal, and the delegation seals the KEL itself anchors
+  are added to the checkpoint
+
+When the checkpointed event is no longer the one accepted at its sn (a
+superseding recovery replaced events, or the KEL forked), the checkpoint
+is dropped and the KEL replayed from inception, as is a stored
+checkpoint from before next key digests were recorded.
+
+Checkpoints live in an LMDB environment of their own next to Sally's
+stores, so a restarted Sally resumes from them, and are read through an
+in-memory LRU.
+
+Configuration (environment):
+    SALLY_REPLAY_CACHE_SIZE   checkpoints kept in memory (default 4096)
+"""
+
+import json
+import os
+import threading
+import weakref
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, field, replace
+from typing import Any, Dict, List, Optional
+
+from keri import kering
+from keri.app import habbing
+from keri.core import coring, serdering
+from keri.db import dbing, subing
+
+from vlei_verification import keri_rules
+
+from custom_sally.verification_context import VerificationContext
+
+
+REPLAY_CACHE_SIZE = int(os.getenv("SALLY_REPLAY_CACHE_SIZE", "4096"))
+
+
+
+@dataclass
+class Checkpoint:
+    """A KEL validated through event sn, whose digest is said"""
+    pre: str
+    sn: int = -1
+    said: str = ""
+    # Signing keys and threshold in force after event sn
+    keys: List[str] = field(default_factory=list)
+    sith: Any = None
+    # Next key digests and threshold the next rotation must satisfy
+    ndigs: List[str] = field(default_factory=list)
+    nsith: Any = None
+    delegator: Optional[str] = None
+    # Delegated AID -> inception digest, from the KEL's delegation seals
+    seals: Dict[str, str] = field(default_factory=dict)
+
+
+@dataclass
+class Replay:
+    """Outcome of replaying one KEL"""
+    pre: str
+    valid: bool
+    checkpoint: Checkpoint
+    replayed: int = 0
+    full: bool = False
+    fork: bool = False
+    error: Optional[str] = None
+
+
+class CheckpointStore(dbing.LMDBer):
+    """LMDB environment holding one JSON checkpoint per AID"""
+
+    TailDirPath = "keri/rpl"
+    AltTailDirPath = ".keri/rpl"
+    TempPrefix = "keri_rpl_"
+
+    def __init__(self, name="replay", headDirPath=None, reopen=True, **kwa):
+        """
+        Parameters:
+            name: environment name, usually the Habery's
+            headDirPath: directory override, as for other keripy stores
+            reopen: open the environment now
+        """
+        self.ckps = None
+
+        super(CheckpointStore, self).__init__(name=name, headDirPath=headDirPath, reopen=reopen, **kwa)
+
+    def reopen(self, **kwa):
+        super(CheckpointStore, self).reopen(**kwa)
+
+        self.ckps = subing.Suber(db=self, subkey="ckps.")
+
+        return self.env
+
+
+class KelReplayer:
+    """Validates KELs from persistent verified-through checkpoints"""
+
+    def __init__(self, store: CheckpointStore, cache_size: int = REPLAY_CACHE_SIZE):
+        """
+        Args:
+            store: where checkpoints are persisted
+            cache_size: checkpoints kept in memory
+        """
+        self.store = store
+        self.cache_size = cache_size
+        self.cache: "OrderedDict[str, Checkpoint]" = OrderedDict()
+        self.lock = threading.Lock()
+        self.incremental = 0
+        self.full = 0
+        self.forks = 0
+        self.failures = 0
+        self.events_replayed = 0
+        self.events_skipped = 0
+
+    def checkpoint(self, pre: str) -> Optional[Checkpoint]:
+        """Latest checkpoint of a KEL, None if it was never replayed"""
+        with self.lock:
+            checkpoint = self.cache.get(pre)
+            if checkpoint is not None:
+                self.cache.move_to_end(pre)
+                return checkpoint
+        raw = self.store.ckps.get(keys=pre)
+        if raw is None:
+            return None
+        fields = json.loads(raw)
+        if "ndigs" not in fields:
+            # Its rotations were never checked against next key digests
+            self._drop(pre)
+            return None
+        checkpoint = Checkpoint(**fields)
+        self._cache(checkpoint)
+        return checkpoint
+
+    def _cache(self, checkpoint: Checkpoint):
+        with self.lock:
+            self.cache[checkpoint.pre] = checkpoint
+            self.cache.move_to_end(checkpoint.pre)
+            while len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+
+    def _save(self, checkpoint: Checkpoint):
+        self.store.ckps.pin(keys=checkpoint.pre, val=json.dumps(asdict(checkpoint)))
+        self._cache(checkpoint)
+
+    def _drop(self, pre: str):
+        self.store.ckps.rem(keys=pre)
+        with self.lock:
+            self.cache.pop(pre, None)
+
+    def replay(self, pre: str, ctx: VerificationContext) -> Replay:
+        """
+        Validate the events of a KEL accepted since its checkpoint
+
+        Args:
+            pre: AID whose KEL to replay
+            ctx: snapshot to read the KEL from
+
+        Returns:
+            Replay; its checkpoint covers the events that validated, up
+            to the first that did not (see error)
+        """
+        state = ctx.state(pre)
+        if state is None:
+            return Replay(pre=pre, valid=False, checkpoint=Checkpoint(pre=pre), error=f"KEL of {pre} not found")
+        head = int(state.s, 16)
+
+        checkpoint = self.checkpoint(pre)
+        fork = False
+        if checkpoint is not None and (checkpoint.sn > head or
+                                       ctx.kel_digest(pre, checkpoint.sn) != checkpoint.said):
+            # Recovered or forked past the checkpoint, or a snapshot
+            # older than it: nothing it covers can be relied on
+            fork = True
+            checkpoint = None
+            self._drop(pre)
+        start = checkpoint.sn + 1 if checkpoint is not None else 0
+
+        current, error = checkpoint, None
+        for sn in range(start, head + 1):
+            dig = ctx.kel_digest(pre, sn)
+            try:
+                serder = ctx.event(pre, dig) if dig is not None else None
+            except kering.ValidationError as e:
+                error = f"event {sn} of {pre} is not its own SAID: {e}"
+                break
+            if serder is None:
+                error = f"event {sn} of {pre} not found"
+                break
+            if serder.said != dig:
+                error = f"event {sn} of {pre} is filed under another digest"
+                break
+            error = self._check(pre, sn, serder, current, ctx)
+            if error is not None:
+                break
+            current = self._advance(pre, serder, current, copied=current is not checkpoint)
+
+        replayed = (current.sn + 1 if current is not None else 0) - start
+        if replayed:
+            self._save(current)
+
+        with self.lock:
+            if start:
+                self.incremental += 1
+            else:
+                self.full += 1
+            self.forks += fork
+            self.failures += error is not None
+            self.events_replayed += replayed
+            self.events_skipped += start
+
+        return Replay(
+            pre=pre,
+            valid=error is None,
+            checkpoint=current or Checkpoint(pre=pre),
+            replayed=replayed,
+            full=not start,
+            fork=fork,
+            error=error
+        )
+
+    def _check(
+        self,
+        pre: str,
+        sn: int,
+        serder: serdering.SerderKERI,
+        previous: Optional[Checkpoint],
+        ctx: VerificationContext
+    ) -> Optional[str]:
+        """
+        Why an event does not validate against the checkpoint before it
+
+        Returns:
+            None if it does, else the error
+        """
+        if serder.pre != pre or serder.sn != sn:
+            return f"event {sn} of {pre} is filed under the wrong AID or sn"
+        if previous is None:
+            if serder.ilk not in keri_rules.INCEPTION_ILKS:
+                return f"event 0 of {pre} is not an inception ({serder.ilk})"
+        elif serder.ilk in keri_rules.INCEPTION_ILKS:
+            return f"event {sn} of {pre} is a second inception"
+        elif serder.ked.get("p") != previous.said:
+            return f"event {sn} of {pre} does not chain onto event {sn - 1} (prior digest mismatch)"
+
+        # Establishment events are signed by the keys they establish
+        if serder.ilk in keri_rules.ESTABLISHMENT_ILKS:
+            verfers, tholder = serder.verfers, serder.tholder
+        else:
+            verfers = [coring.Verfer(qb64=key) for key in previous.keys]
+            tholder = coring.Tholder(sith=previous.sith)
+        sigers = [
+            siger for siger in ctx.sigs(pre, serder.said)
+            if siger.index < len(verfers) and verfers[siger.index].verify(siger.raw, serder.raw)
+        ]
+        if not tholder.satisfy([siger.index for siger in sigers]):
+            return f"event {sn} of {pre} does not meet its signing threshold"
+
+        if serder.ilk in keri_rules.ROTATION_ILKS:
+            if not previous.ndigs:
+                return f"{serder.ilk} at sn {sn} of {pre} rotates a KEL without next keys"
+            ondices = keri_rules.exposed_next_keys(
+                ((verfers[siger.index].qb64, siger.ondex) for siger in sigers), previous.ndigs
+            )
+            if not coring.Tholder(sith=previous.nsith).satisfy(sorted(ondices)):
+                return f"{serder.ilk} at sn {sn} of {pre} does not reveal the prior next keys (pre-rotation)"
+
+        if serder.ilk in keri_rules.DELEGATED_ILKS:
+            delegator = serder.delpre if serder.ilk == "dip" else previous.delegator
+            if not delegator or not self._anchored(serder, delegator, ctx):
+                return f"{serder.ilk} at sn {sn} of {pre} is not anchored by its delegator"
+        return None
+
+    @staticmethod
+    def _anchored(serder: serdering.SerderKERI, delegator: str, ctx: VerificationContext) -> bool:
+        """
+        Whether a delegator event seals a delegated event
+
+        The anchoring event comes from the source seal couple keripy
+        stored on acceptance; without one the delegator's KEL is searched,
+        in the same snapshot.
+        """
+        seal = dict(i=serder.pre, s=serder.snh, d=serder.said)
+        source = ctx.source_seal(serder.pre, serder.said)
+        if source is None:
+            return ctx.anchoring_event(delegator, seal) is not None
+        anchor = ctx.event(delegator, source[1])
+        return anchor is not None and anchor.pre == delegator and seal in (anchor.seals or [])
+
+    @staticmethod
+    def _advance(
+        pre: str,
+        serder: serdering.SerderKERI,
+        previous: Optional[Checkpoint],
+        copied: bool
+    ) -> Checkpoint:
+        """
+        Checkpoint after a validated event
+
+        The first event of a replay copies the stored checkpoint, which
+        other verifications may be reading; later ones update the copy.
+        """
+        if previous is None:
+            current = Checkpoint(pre=pre)
+        elif copied:
+            current = previous
+        else:
+            current = replace(previous, seals=dict(previous.seals))
+
+        current.sn, current.said = serder.sn, serder.said
+        if serder.ilk in keri_rules.ESTABLISHMENT_ILKS:
+            current.keys = [verfer.qb64 for verfer in serder.verfers]
+            current.sith = serder.tholder.sith
+            current.ndigs = list(serder.ndigs)
+            current.nsith = serder.ntholder.sith if serder.ntholder is not None else None
+        if serder.ilk == "dip":
+            current.delegator = serder.delpre
+        for seal in serder.seals or []:
+            if isinstance(seal, dict) and seal.get("s") == "0" and seal.get("i"):
+                current.seals[seal["i"]] = seal.get("d")
+        return current
+
+    def stats(self) -> Dict[str, Any]:
+        with self.lock:
+            return {
+                "cached_checkpoints": len(self.cache),
+                "cache_size": self.cache_size,
+                "incremental_replays": self.incremental,
+                "full_replays": self.full,
+                "forks": self.forks,
+                "failures": self.failures,
+                "events_replayed": self.events_replayed,
+                "events_skipped": self.events_skipped
+            }
+
+
+_replayers: "weakref.WeakKeyDictionary[habbing.Habery, KelReplayer]" = weakref.WeakKeyDictionary()
+_replayers_lock = threading.Lock()
+
+
+def shared_replayer(hby: habbing.Habery) -> KelReplayer:
+    """Process-wide replayer for a Habery; an LMDB environment is opened once per process"""
+    with _replayers_lock:
+        replayer = _replayers.get(hby)
+        if replayer is None:
+            replayer = _replayers[hby] = KelReplayer(CheckpointStore(name=hby.name, temp=hby.temp))
+        return replayer
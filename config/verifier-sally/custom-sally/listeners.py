@@ -0,0 +1,39 @@
+"""
+Listener Registries
+
+The change notifications of kel_hooks, tel_hooks, oobi_hooks and
+credential_index each keep a registry of callbacks. A failing listener is reported and
+skipped, so one broken view cannot stop the others from being told, nor
+the keripy call that notified them.
+"""
+
+from typing import Callable, List
+
+
+class Listeners:
+    """Callbacks notified in registration order"""
+
+    def __init__(self, name: str):
+        """
+        Args:
+            name: what is being listened to, for failure reports
+        """
+        self.name = name
+        self.listeners: List[Callable] = []
+
+    def add(self, listener: Callable):
+        """Register a callback; registering it again is a no-op"""
+        if listener not in self.listeners:
+            self.listeners.append(listener)
+
+    def remove(self, listener: Callable):
+        if listener in self.listeners:
+            self.listeners.remove(listener)
+
+    def notify(self, *args):
+        """Call every listener with args"""
+        for listener in list(self.listeners):
+            try:
+                listener(*args)
+            except Exception as e:
+                print(f"⚠️  {self.name} listener {listener!r} failed: {e}")
@@ -0,0 +1,50 @@
+"""
+OOBI Resolution Notifications
+
+Lets code waiting on an OOBI (see kel_prefetch) learn when Sally's
+Oobiery has processed the response to it, instead of polling the OOBI
+tables. keripy's Oobiery.processClients is wrapped once per process and
+every registered listener is called after a response is processed,
+whatever became of it: resolved or failed (recorded in roobi), or not
+found and queued for retry (eoobi).
+
+Listeners are called as listener(url) with the OOBI URL.
+"""
+
+from typing import Callable
+
+from keri.app import oobiing
+
+from custom_sally import listeners
+
+
+OobiListener = Callable[[str], None]
+
+_listeners = listeners.Listeners("OOBI")
+
+# Register with add_listener(listener), called as listener(url)
+add_listener = _listeners.add
+remove_listener = _listeners.remove
+notify = _listeners.notify
+
+
+def install_hooks():
+    """
+    Notify listeners whenever keripy processes an OOBI response
+
+    Wraps Oobiery.processClients once per process; calling this again is
+    a no-op.
+    """
+    original = oobiing.Oobiery.processClients
+    if getattr(original, "notifying", False):
+        return
+
+    def processClients(self):
+        # Clients holding a response are the ones this pass processes
+        answered = [url for url, client in self.clients.items() if client.responses]
+        original(self)
+        for url in answered:
+            notify(url)
+
+    processClients.notifying = True
+    oobiing.Oobiery.processClients = processClients
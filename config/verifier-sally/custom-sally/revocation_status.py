@@ -0,0 +1,186 @@
+"""
+Credential Revocation Status
+
+Answers "is this credential issued or revoked" for whole credential
+chains, or many chains at once, in one pass over the TEL database:
+every uncached SAID is resolved inside a single LMDB read transaction,
+in key order, with one cursor over the TEL index.
+
+Reads can come from a caller's VerificationContext snapshot, so a
+verification sees TELs in the same state as the credentials it chained.
+
+Statuses are cached per credential SAID and dropped by the tel_hooks
+listener when that credential's TEL changes. Every TEL event seen bumps
+a snapshot number; answers carry the snapshot they were read at, so a
+caller holding an older snapshot knows that TEL events have been
+ingested since.
+
+A caller passing its own VerificationContext passes the snapshot number
+it read before opening it: a TEL event committed between that read and
+the transaction opening would otherwise be missing from the transaction
+yet already counted, and its stale status cached as current.
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional
+
+from keri.vdr import viring
+
+from vlei_verification import vlei_rules
+
+from custom_sally.verification_context import VerificationContext
+
+
+class RevocationStatusService:
+    """Batched, cached credential TEL status lookups"""
+
+    def __init__(self, reger: viring.Reger, max_entries: int = 10000):
+        """
+        Args:
+            reger: credential registry holding the TELs
+            max_entries: maximum number of cached credential statuses
+        """
+        self.reger = reger
+        self.max_entries = max_entries
+        self.statuses: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self.snapshot = 0
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def status(
+        self,
+        saids: Iterable[str],
+        ctx: Optional[VerificationContext] = None,
+        snapshot: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        TEL status of many credentials
+
+        Args:
+            saids: credential SAIDs
+            ctx: snapshot to read uncached statuses from, else one is
+                opened for the call
+            snapshot: .snapshot as read before ctx was opened; without
+                it, statuses read from ctx are returned but not cached
+
+        Returns:
+            {
+                "snapshot": int,
+                "statuses": {said: {"said", "status", "sn", "ilk", "snapshot"}}
+            }
+            with status "issued", "revoked" or "unknown" (no TEL event),
+            sn the TEL sequence number of the deciding event (-1 if
+            unknown) and snapshot the snapshot it was read at
+        """
+        statuses = {}
+        missing = []
+        cacheable = ctx is None or snapshot is not None
+        with self.lock:
+            if ctx is None or snapshot is None:
+                snapshot = self.snapshot
+            for said in dict.fromkeys(saids):
+                cached = self.statuses.get(said)
+                if cached is None:
+                    missing.append(said)
+                else:
+                    self.statuses.move_to_end(said)
+                    statuses[said] = cached
+            self.hits += len(statuses)
+            self.misses += len(missing)
+
+        if ctx is not None:
+            read = self._read(missing, snapshot, ctx)
+        elif missing:
+            with VerificationContext(reger=self.reger) as ctx:
+                read = self._read(missing, snapshot, ctx)
+        else:
+            read = {}
+        statuses.update(read)
+        with self.lock:
+            # A TEL event logged since the snapshot opened may have made it stale
+            if cacheable and self.snapshot == snapshot:
+                self.statuses.update(read)
+                while len(self.statuses) > self.max_entries:
+                    self.statuses.popitem(last=False)
+
+        return {"snapshot": snapshot, "statuses": statuses}
+
+    def check_chains(
+        self,
+        chains: List[List[Dict[str, Any]]],
+        ctx: Optional[VerificationContext] = None,
+        snapshot: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Revocation check of many credential chains in one batched pass
+
+        Args:
+            chains: credential chains as lists of {"sad": ...} dicts
+            ctx: snapshot to read from
+            snapshot: .snapshot as read before ctx was opened
+
+        Returns:
+            One {"valid": bool, "snapshot": int, "error": str} per chain
+        """
+        saids = [[cred.get("sad", {}).get("d") for cred in chain] for chain in chains]
+        answer = self.status((said for chain in saids for said in chain if said), ctx, snapshot)
+
+        results = []
+        for chain in saids:
+            result = {"valid": True, "snapshot": answer["snapshot"]}
+            for idx, said in enumerate(chain):
+                status = answer["statuses"].get(said)
+                if status is not None and status["status"] == "revoked":
+                    result.update({
+                        "valid": False,
+                        "error": f"Credential at chain position {idx} is revoked "
+                                 f"(TEL sn {status['sn']})"
+                    })
+                    break
+            results.append(result)
+        return results
+
+    def _read(self, saids: List[str], snapshot: int, ctx: VerificationContext) -> Dict[str, Dict[str, Any]]:
+        """Latest TEL event of each credential, all from one snapshot"""
+        statuses = {}
+        # Sorted so the shared TEL cursor only ever moves forward
+        for said in sorted(saids):
+            sn, ilk = ctx.tel_last(said)
+            statuses[said] = {
+                "said": said,
+                "status": self._classify(ilk),
+                "sn": sn,
+                "ilk": ilk,
+                "snapshot": snapshot
+            }
+        return statuses
+
+    @staticmethod
+    def _classify(ilk: Optional[str]) -> str:
+        if ilk in vlei_rules.REVOKED_ILKS:
+            return "revoked"
+        if ilk in vlei_rules.ISSUED_ILKS:
+            return "issued"
+        return "unknown"
+
+    def on_tel_event(self, pre: str, sn: int, ilk: str):
+        """tel_hooks listener: pre is the credential SAID for credential events"""
+        with self.lock:
+            self.snapshot += 1
+            if self.statuses.pop(pre, None) is not None:
+                self.invalidations += 1
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self.statuses),
+            "max_entries": self.max_entries,
+            "snapshot": self.snapshot,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "invalidations": self.invalidations
+        }
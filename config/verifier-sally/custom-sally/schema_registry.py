@@ -0,0 +1,272 @@
+"""
+Schema Registry
+
+Credential types used to be told apart by string tests on the schema
+field of a credential, and payloads validated by keripy's JSONSchema,
+which re-reads the schema for every credential it checks. SchemaRegistry
+loads every schema once:
+
+- the JSON schema files in SALLY_SCHEMA_DIRS (e.g. the invoice schema)
+- the schemas Sally resolved through OOBIs (the vLEI schemas listed in
+  verifier.json), from the Habery's schema store
+
+indexes them by SAID and compiles a validator for each, with
+fastjsonschema if installed, else jsonschema. Credential type detection
+is a dict lookup on the credential's schema SAID; the vLEI types are
+known by SAID (vlei_verification.vlei_rules) even before their schemas
+are resolved.
+
+A schema file whose `$id` is empty is indexed under its computed SAID;
+one whose `$id` is not its SAID is skipped. Schemas resolved after
+startup are picked up from the schema store on first use.
+
+Configuration (environment):
+    SALLY_SCHEMA_DIRS   schema directories, os.pathsep separated
+                        (default /sally/schemas)
+"""
+
+import json
+import os
+import threading
+import weakref
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from keri.app import habbing
+from keri.core import coring
+
+from vlei_verification import vlei_rules
+
+try:
+    import fastjsonschema
+except ImportError:  # pragma: no cover - optional dependency
+    fastjsonschema = None
+
+try:
+    import jsonschema
+except ImportError:  # pragma: no cover - optional dependency
+    jsonschema = None
+
+
+SCHEMA_DIRS = [path for path in os.getenv("SALLY_SCHEMA_DIRS", "/sally/schemas").split(os.pathsep) if path]
+
+# Takes a payload, returns None if it validates, else the error
+Validator = Callable[[Dict[str, Any]], Optional[str]]
+
+
+class SchemaError(Exception):
+    """A schema could not be indexed or compiled"""
+
+
+@dataclass
+class Schema:
+    """An indexed schema"""
+    said: str
+    kind: str
+    sed: Dict[str, Any]
+    validator: Optional[Validator] = None
+    source: str = ""
+
+
+def compile_validator(sed: Dict[str, Any]) -> Optional[Validator]:
+    """
+    Validator for a schema, compiled once
+
+    Returns:
+        Validator, None without fastjsonschema and jsonschema
+
+    Raises:
+        SchemaError if the schema itself is invalid
+    """
+    if fastjsonschema is not None:
+        try:
+            compiled = fastjsonschema.compile(sed)
+        except fastjsonschema.JsonSchemaDefinitionException as e:
+            raise SchemaError(f"Invalid schema: {e}") from e
+
+        def validate(payload: Dict[str, Any]) -> Optional[str]:
+            try:
+                compiled(payload)
+            except fastjsonschema.JsonSchemaException as e:
+                return e.message
+            return None
+        return validate
+
+    if jsonschema is not None:
+        cls = jsonschema.validators.validator_for(sed)
+        try:
+            cls.check_schema(sed)
+        except jsonschema.SchemaError as e:
+            raise SchemaError(f"Invalid schema: {e.message}") from e
+        validator = cls(sed, format_checker=cls.FORMAT_CHECKER)
+
+        def validate(payload: Dict[str, Any]) -> Optional[str]:
+            error = jsonschema.exceptions.best_match(validator.iter_errors(payload))
+            return None if error is None else error.message
+        return validate
+
+    return None
+
+
+def schema_said(sed: Dict[str, Any]) -> str:
+    """
+    SAID of a schema: its `$id`, or computed when `$id` is empty
+
+    Raises:
+        SchemaError if `$id` is not the schema's SAID
+    """
+    said = sed.get("$id")
+    if not said:
+        saider, _ = coring.Saider.saidify(sad=dict(sed), label="$id")
+        return saider.qb64
+    try:
+        verified = coring.Saider(qb64=said).verify(sed, prefixed=True, label="$id")
+    except Exception as e:
+        raise SchemaError(f"Malformed schema $id {said}: {e}") from e
+    if not verified:
+        raise SchemaError(f"Schema $id {said} is not the schema's SAID")
+    return said
+
+
+class SchemaRegistry:
+    """Schemas indexed by SAID, each with a compiled validator"""
+
+    def __init__(self, hby: Optional[habbing.Habery] = None):
+        """
+        Args:
+            hby: Habery whose schema store (OOBI-resolved schemas) to read
+        """
+        self.hby = hby
+        self.schemas: Dict[str, Schema] = {}
+        self.lock = threading.Lock()
+        self.validated = 0
+        self.invalid = 0
+        self.unvalidated = 0
+
+    def load(self, dirs=SCHEMA_DIRS) -> int:
+        """
+        Index the schema files in dirs and the Habery's resolved schemas
+
+        Returns:
+            number of schemas indexed
+        """
+        for directory in dirs:
+            if not os.path.isdir(directory):
+                continue
+            for name in sorted(os.listdir(directory)):
+                if not name.endswith(".json"):
+                    continue
+                path = os.path.join(directory, name)
+                try:
+                    with open(path) as f:
+                        self.add(json.load(f), source=path)
+                except (OSError, ValueError, SchemaError) as e:
+                    print(f"⚠️  Schema {path} skipped: {e}")
+
+        if self.hby is not None:
+            for keys, schemer in self.hby.db.schema.getItemIter():
+                if keys[0] in self.schemas:
+                    continue
+                try:
+                    self.add(schemer.sed, source="oobi")
+                except SchemaError as e:
+                    print(f"⚠️  Schema {keys[0]} skipped: {e}")
+        return len(self.schemas)
+
+    def add(self, sed: Dict[str, Any], source: str = "") -> Schema:
+        """
+        Index a schema and compile its validator
+
+        Raises:
+            SchemaError if the schema is invalid or its `$id` does not verify
+        """
+        said = schema_said(sed)
+        kind = vlei_rules.VLEI_TYPES.get(said) or sed.get("credentialType") or sed.get("title") or said
+        schema = Schema(said=said, kind=kind, sed=sed, validator=compile_validator(sed), source=source)
+        with self.lock:
+            self.schemas[said] = schema
+        return schema
+
+    def get(self, said: Optional[str]) -> Optional[Schema]:
+        """Schema by SAID, read from the schema store if resolved since loading"""
+        if not said:
+            return None
+        schema = self.schemas.get(said)
+        if schema is None and self.hby is not None:
+            schemer = self.hby.db.schema.get(keys=said)
+            if schemer is not None:
+                try:
+                    schema = self.add(schemer.sed, source="oobi")
+                except SchemaError:
+                    return None
+        return schema
+
+    def kind(self, said: Optional[str]) -> Optional[str]:
+        """Credential type of a schema SAID (e.g. "OOR"), None if unknown"""
+        if not said:
+            return None
+        kind = vlei_rules.VLEI_TYPES.get(said)
+        if kind is not None:
+            return kind
+        schema = self.get(said)
+        return schema.kind if schema is not None else None
+
+    def saids(self, kind: str) -> Tuple[str, ...]:
+        """Schema SAIDs of a credential type"""
+        with self.lock:
+            indexed = [said for said, schema in self.schemas.items() if schema.kind == kind]
+        known = [said for said, known_kind in vlei_rules.VLEI_TYPES.items() if known_kind == kind]
+        return tuple(dict.fromkeys(known + indexed))
+
+    def validate(self, sad: Dict[str, Any]) -> Optional[str]:
+        """
+        Validate a credential payload against its schema's compiled validator
+
+        Credentials of schemas the registry does not hold, or holds
+        without a JSON Schema implementation, are not validated here
+        (keripy validated them when they were admitted).
+
+        Returns:
+            None if the payload validates or cannot be validated, else the error
+        """
+        schema = self.get(sad.get("s"))
+        if schema is None or schema.validator is None:
+            with self.lock:
+                self.unvalidated += 1
+            return None
+        error = schema.validator(sad)
+        with self.lock:
+            if error is None:
+                self.validated += 1
+            else:
+                self.invalid += 1
+        if error is not None:
+            return f"Credential {sad.get('d')} does not match its {schema.kind} schema: {error}"
+        return None
+
+    def stats(self) -> Dict[str, Any]:
+        with self.lock:
+            return {
+                "schemas": len(self.schemas),
+                "kinds": sorted({schema.kind for schema in self.schemas.values()}),
+                "engine": "fastjsonschema" if fastjsonschema is not None else
+                          "jsonschema" if jsonschema is not None else None,
+                "validated": self.validated,
+                "invalid": self.invalid,
+                "unvalidated": self.unvalidated
+            }
+
+
+_registries: "weakref.WeakKeyDictionary[habbing.Habery, SchemaRegistry]" = weakref.WeakKeyDictionary()
+_registries_lock = threading.Lock()
+
+
+def shared_registry(hby: habbing.Habery) -> SchemaRegistry:
+    """Process-wide registry for a Habery, loaded on first use"""
+    with _registries_lock:
+        registry = _registries.get(hby)
+        if registry is None:
+            registry = _registries[hby] = SchemaRegistry(hby)
+            count = registry.load()
+            print(f"✓ Schema registry ready ({count} schemas)")
+        return registry
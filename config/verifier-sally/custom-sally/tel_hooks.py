@@ -0,0 +1,49 @@
+"""
+TEL Change Notifications
+
+Lets verification caches drop state derived from a credential as soon as
+its Transaction Event Log changes (issuance, revocation, registry
+rotation). keripy's Tever.logEvent is wrapped once per process and
+every registered listener is called after each event is logged.
+
+Listeners are called as listener(pre, sn, ilk) where pre is the
+credential SAID for credential TEL events (iss, rev, bis, brv) and the
+registry identifier for registry events (vcp, vrt).
+"""
+
+from typing import Callable
+
+from keri.vdr import eventing
+
+from custom_sally import listeners
+
+
+TelListener = Callable[[str, int, str], None]
+
+_listeners = listeners.Listeners("TEL")
+
+# Register with add_listener(listener), called as listener(pre, sn, ilk)
+add_listener = _listeners.add
+remove_listener = _listeners.remove
+notify = _listeners.notify
+
+
+def install_hooks():
+    """
+    Notify listeners whenever keripy logs a TEL event
+
+    Wraps Tever.logEvent once per process; calling this again is a
+    no-op.
+    """
+    original = eventing.Tever.logEvent
+    if getattr(original, "notifying", False):
+        return
+
+    def logEvent(self, pre, sn, serder, seqner, saider, bigers=None, baks=None):
+        original(self, pre, sn, serder, seqner, saider, bigers=bigers, baks=baks)
+        if hasattr(pre, "decode"):
+            pre = pre.decode("utf-8")
+        notify(pre, sn, serder.ilk)
+
+    logEvent.notifying = True
+    eventing.Tever.logEvent = logEvent
@@ -0,0 +1,166 @@
+"""
+Verification Verdict Cache
+
+The same (agent, OOR holder) pair is verified on every presentation.
+VerdictCache remembers valid verdicts under the key
+
+    (agent AID, OOR holder AID,
+     KEL sn of every participant AID, TEL sn of every chain credential)
+
+and answers a repeat verification from memory while that key is still
+current. The current sn of every AID and credential a cached verdict
+depends on is followed through the kel_hooks and tel_hooks listeners, so
+a lookup compares in-memory sequence numbers only: a rotation or
+revocation of anything in the chain changes the key and the verdict is
+no longer served.
+
+Staleness is decided per pair from those sns alone: put() follows the
+entry's AIDs and credentials first and then re-reads their live sns, so
+an event logged while the verdict was being decided is either seen by
+the listeners or by that read, and the entry is dropped.
+
+Only AIDs and credentials referenced by cached verdicts are followed,
+and the cache is a bounded LRU.
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Set, Tuple
+
+from keri.core import serdering
+
+
+Pair = Tuple[str, str]
+Sns = Tuple[Tuple[str, int], ...]
+# (KEL sns, TEL sns) recorded -> (KEL sns, TEL sns) live, for the same keys
+SnReader = Callable[[Dict[str, int], Dict[str, int]], Tuple[Dict[str, int], Dict[str, int]]]
+
+
+class VerdictCache:
+    """LRU of valid verdicts keyed by the sequence numbers they rest on"""
+
+    def __init__(self, max_entries: int = 4096):
+        """
+        Args:
+            max_entries: maximum number of cached verdicts
+        """
+        self.max_entries = max_entries
+        # (agent, holder) -> (KEL sns, TEL sns, verdict)
+        self.entries: "OrderedDict[Pair, Tuple[Sns, Sns, Dict[str, Any]]]" = OrderedDict()
+        # Followed AID or credential SAID -> latest sn seen
+        self.heads: Dict[str, int] = {}
+        # Followed AID or credential SAID -> pairs whose verdict depends on it
+        self.watchers: Dict[str, Set[Pair]] = {}
+        self.lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        self.evictions = 0
+
+    def get(self, agent_aid: str, oor_holder_aid: str) -> Optional[Dict[str, Any]]:
+        """
+        Cached verdict, if every sn it was verified at is still current
+        """
+        pair = (agent_aid, oor_holder_aid)
+        with self.lock:
+            entry = self.entries.get(pair)
+            if entry is None:
+                self.misses += 1
+                return None
+            kel_sns, tel_sns, verdict = entry
+            if any(self.heads.get(ident) != sn for ident, sn in kel_sns + tel_sns):
+                self._drop(pair)
+                self.stale += 1
+                self.misses += 1
+                return None
+            self.entries.move_to_end(pair)
+            self.hits += 1
+            return verdict
+
+    def put(
+        self,
+        agent_aid: str,
+        oor_holder_aid: str,
+        kel_sns: Dict[str, int],
+        tel_sns: Dict[str, int],
+        verdict: Dict[str, Any],
+        current: SnReader
+    ):
+        """
+        Cache a valid verdict
+
+        Args:
+            agent_aid: Agent's AID
+            oor_holder_aid: OOR Holder's AID
+            kel_sns: KEL sn of every participant AID at verification
+            tel_sns: TEL sn of every chain credential at verification
+            verdict: verification result
+            current: reads the live sns of the same AIDs and credentials;
+                called once they are followed, and the entry is dropped
+                if an event was logged since verification
+        """
+        pair = (agent_aid, oor_holder_aid)
+        entry = (tuple(sorted(kel_sns.items())), tuple(sorted(tel_sns.items())), verdict)
+        with self.lock:
+            self._drop(pair)
+            for ident, sn in entry[0] + entry[1]:
+                self.heads.setdefault(ident, sn)
+                self.watchers.setdefault(ident, set()).add(pair)
+            self.entries[pair] = entry
+            while len(self.entries) > self.max_entries:
+                self._drop(next(iter(self.entries)))
+                self.evictions += 1
+
+        # Events logged from here on reach the listeners; the read covers
+        # the ones logged before
+        live_kel, live_tel = current(kel_sns, tel_sns)
+        if live_kel != kel_sns or live_tel != tel_sns:
+            with self.lock:
+                if self.entries.get(pair) is entry:
+                    self._drop(pair)
+                    self.stale += 1
+
+    def _drop(self, pair: Pair) -> bool:
+        entry = self.entries.pop(pair, None)
+        if entry is None:
+            return False
+        for ident, _ in entry[0] + entry[1]:
+            pairs = self.watchers.get(ident)
+            if pairs is not None:
+                pairs.discard(pair)
+                if not pairs:
+                    del self.watchers[ident]
+                    self.heads.pop(ident, None)
+        return True
+
+    def _advance(self, ident: str, sn: int):
+        with self.lock:
+            if ident in self.watchers:
+                self.heads[ident] = sn
+
+    def on_key_event(self, serder: serdering.SerderKERI):
+        """kel_hooks listener"""
+        self._advance(serder.pre, serder.sn)
+
+    def on_tel_event(self, pre: str, sn: int, ilk: str):
+        """tel_hooks listener: pre is the credential SAID for credential events"""
+        self._advance(pre, sn)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.heads.clear()
+            self.watchers.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self.entries),
+            "max_entries": self.max_entries,
+            "followed": len(self.heads),
+            "hits": self.hits,
+            "misses": self.misses,
+            "stale": self.stale,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions
+        }
@@ -0,0 +1,182 @@
+"""
+Read-only Verification Snapshots
+
+Verifying one agent reads key states, delegation seals, credentials and
+TELs. Done as separate keripy reads, each opens its own LMDB transaction,
+and with credentials being ingested concurrently they can each see a
+different state of the stores.
+
+VerificationContext opens one read-only transaction on the KEL store
+(Baser) and one on the credential registry (Reger) and answers every read
+of a verification from them: all reads see the same committed state,
+transaction setup is paid once per verification, and sequential scans
+reuse one cursor per sub database. LMDB readers take no locks, so
+concurrent verifications neither block each other nor the writer.
+
+A snapshot pins the pages it reads until it is released, so hold a
+context only for the duration of one verification:
+
+    with VerificationContext(hby.db, reger) as ctx:
+        ...
+"""
+
+from typing import List, Optional, Tuple
+
+from keri.core import coring, serdering
+from keri.db import basing, dbing, subing
+from keri.vdr import viring
+
+
+# Size of the insertion ordering proem of keripy's IoDup values
+IO_PROEM_SIZE = 33
+
+
+class VerificationContext:
+    """Read-only snapshot of the KEL store and the credential registry"""
+
+    def __init__(self, baser: Optional[basing.Baser] = None, reger: Optional[viring.Reger] = None):
+        """
+        Args:
+            baser: KEL store to snapshot (hby.db)
+            reger: credential registry to snapshot
+        """
+        self.baser = baser
+        self.reger = reger
+        self.txns = {}
+        self.cursors = {}
+
+    def __enter__(self) -> "VerificationContext":
+        self.open()
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def open(self):
+        for lmdber in (self.baser, self.reger):
+            if lmdber is not None and lmdber not in self.txns:
+                self.txns[lmdber] = lmdber.env.begin(write=False, buffers=True)
+
+    def close(self):
+        """Release the snapshot (and its cursors) so LMDB can reuse pages"""
+        self.cursors.clear()
+        for txn in self.txns.values():
+            txn.abort()
+        self.txns.clear()
+
+    def txn(self, lmdber: dbing.LMDBer):
+        txn = self.txns.get(lmdber)
+        if txn is None:
+            raise RuntimeError("VerificationContext is not open on that database")
+        return txn
+
+    def cursor(self, lmdber: dbing.LMDBer, sdb):
+        """Cursor on a sub database, shared by every scan in this snapshot"""
+        cursor = self.cursors.get(sdb)
+        if cursor is None:
+            cursor = self.cursors[sdb] = self.txn(lmdber).cursor(db=sdb)
+        return cursor
+
+    def get(self, lmdber: dbing.LMDBer, sdb, key: bytes) -> Optional[bytes]:
+        val = self.txn(lmdber).get(key, db=sdb)
+        return bytes(val) if val is not None else None
+
+    def dups(self, suber: subing.DupSuber, keys) -> List[bytes]:
+        """All duplicate values of a dupsort suber at keys"""
+        cursor = self.cursor(suber.db, suber.sdb)
+        if not cursor.set_key(suber._tokey(keys)):
+            return []
+        return [bytes(val) for val in cursor.iternext_dup()]
+
+    # KEL store
+
+    def state(self, pre: str) -> Optional[basing.KeyStateRecord]:
+        """Key state of any AID whose KEL we hold"""
+        states = self.baser.states
+        return states.deserializer(self.get(self.baser, states.sdb, states._tokey(pre)))
+
+    def kel_digest(self, pre: str, sn: int) -> Optional[str]:
+        """Digest of the last event accepted at sn of a KEL"""
+        cursor = self.cursor(self.baser, self.baser.kels)
+        if not cursor.set_key(dbing.snKey(pre, sn)) or not cursor.last_dup():
+            return None
+        return bytes(cursor.value()[IO_PROEM_SIZE:]).decode("utf-8")
+
+    def kel_events(self, pre: str):
+        """
+        Every accepted event of a KEL, in sequence number order
+
+        One forward pass of the shared KEL index cursor; events recovered
+        at an sn (after a superseding rotation) are all yielded.
+        """
+        cursor = self.cursor(self.baser, self.baser.kels)
+        prefix = pre.encode("utf-8") + b"."
+        if not cursor.set_range(prefix):
+            return
+        for key, val in cursor:
+            if not bytes(key).startswith(prefix):
+                break
+            serder = self.event(pre, bytes(val[IO_PROEM_SIZE:]).decode("utf-8"))
+            if serder is not None:
+                yield serder
+
+    def anchoring_event(self, pre: str, seal: dict) -> Optional[serdering.SerderKERI]:
+        """First event of a KEL whose seals include seal, the snapshot's findAnchoringSealEvent"""
+        for serder in self.kel_events(pre):
+            if seal in (serder.seals or []):
+                return serder
+        return None
+
+    def source_seal(self, pre: str, dig: str) -> Optional[Tuple[int, str]]:
+        """(sn, digest) of the delegator event that approved a delegated event"""
+        couple = self.get(self.baser, self.baser.aess, dbing.dgKey(pre, dig))
+        if couple is None:
+            return None
+        couple = bytearray(couple)
+        seqner = coring.Seqner(qb64b=couple, strip=True)
+        saider = coring.Saider(qb64b=couple)
+        return seqner.sn, saider.qb64
+
+    def sigs(self, pre: str, dig: str) -> List[coring.Siger]:
+        """Controller signatures stored with an event"""
+        cursor = self.cursor(self.baser, self.baser.sigs)
+        if not cursor.set_key(dbing.dgKey(pre, dig)):
+            return []
+        return [coring.Siger(qb64b=bytes(val)) for val in cursor.iternext_dup()]
+
+    def event(self, pre: str, dig: str) -> Optional[serdering.SerderKERI]:
+        raw = self.get(self.baser, self.baser.evts, dbing.dgKey(pre, dig))
+        return serdering.SerderKERI(raw=raw) if raw is not None else None
+
+    # Credential registry
+
+    def credential(self, said: str) -> Optional[serdering.SerderACDC]:
+        creds = self.reger.creds
+        raw = self.get(self.reger, creds.sdb, creds._tokey(said))
+        return serdering.SerderACDC(raw=raw) if raw is not None else None
+
+    def tel_last(self, said: str) -> Tuple[int, Optional[str]]:
+        """
+        Latest TEL event of a credential
+
+        Scans the TEL index from the credential's key prefix. Callers
+        checking many credentials should go in SAID order so the shared
+        cursor only moves forward.
+
+        Returns:
+            (sn, ilk), (-1, None) if the credential has no TEL event
+        """
+        tels = self.cursor(self.reger, self.reger.tels)
+        prefix = said.encode("utf-8") + b"."
+        sn, dig = -1, None
+        if tels.set_range(prefix):
+            for key, val in tels:
+                if not bytes(key).startswith(prefix):
+                    break
+                sn, dig = int(bytes(key[len(prefix):]), 16), bytes(val)
+        if dig is None:
+            return sn, None
+
+        raw = self.get(self.reger, self.reger.tvts, dbing.dgKey(said, dig))
+        ilk = serdering.SerderKERI(raw=raw).ilk if raw is not None else None
+        return sn, ilk
@@ -0,0 +1,156 @@
+"""
+Bounded Verification Worker Pool
+
+Agent delegation verification is LMDB-bound (key states, KEL store,
+credentials, TELs). Run inline it stalls Sally's HIO loop, and with it
+the presentation webhooks, for as long as a chain is being walked.
+
+VerificationPool runs verifications on a fixed number of worker threads
+behind an explicit queue depth. LMDB readers each use their own read
+transaction, so workers never block each other or the writer. When
+every worker is busy and the queue is full, submit() raises
+PoolSaturated at once so the endpoint can shed load with a 503 instead
+of queueing without bound.
+
+Configuration (environment):
+    SALLY_VERIFY_WORKERS      worker threads (default 4)
+    SALLY_VERIFY_QUEUE_DEPTH  verifications allowed to wait (default 16)
+    SALLY_VERIFY_RETRY_AFTER  Retry-After seconds on 503 (default 1)
+"""
+
+import json
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from hio.help import helping
+
+
+VERIFY_WORKERS = int(os.getenv("SALLY_VERIFY_WORKERS", "4"))
+VERIFY_QUEUE_DEPTH = int(os.getenv("SALLY_VERIFY_QUEUE_DEPTH", "16"))
+VERIFY_RETRY_AFTER = int(os.getenv("SALLY_VERIFY_RETRY_AFTER", "1"))
+
+
+class PoolSaturated(Exception):
+    """Every worker is busy and the queue is full"""
+
+    def __init__(self, capacity: int, retry_after: int):
+        super().__init__(f"Verification pool saturated ({capacity} in flight)")
+        self.capacity = capacity
+        self.retry_after = retry_after
+
+
+class VerificationPool:
+    """Fixed worker threads with a bounded queue and load shedding"""
+
+    def __init__(
+        self,
+        workers: int = VERIFY_WORKERS,
+        queue_depth: int = VERIFY_QUEUE_DEPTH,
+        retry_after: int = VERIFY_RETRY_AFTER
+    ):
+        """
+        Args:
+            workers: number of worker threads
+            queue_depth: submissions allowed to wait for a worker
+            retry_after: seconds clients are told to wait when shed
+        """
+        self.workers = workers
+        self.queue_depth = queue_depth
+        self.retry_after = retry_after
+        self.capacity = workers + queue_depth
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="sally-verify")
+        self.slots = threading.BoundedSemaphore(self.capacity)
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.submitted = 0
+        self.completed = 0
+        self.rejected = 0
+
+    def submit(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Future:
+        """
+        Queue fn(*args, **kwargs) on a worker
+
+        Returns:
+            concurrent.futures.Future of the result
+
+        Raises:
+            PoolSaturated if workers + queue are all taken
+        """
+        if not self.slots.acquire(blocking=False):
+            with self.lock:
+                self.rejected += 1
+            raise PoolSaturated(self.capacity, self.retry_after)
+
+        with self.lock:
+            self.in_flight += 1
+            self.submitted += 1
+        try:
+            future = self.executor.submit(fn, *args, **kwargs)
+        except Exception:
+            self._release(None)
+            raise
+        future.add_done_callback(self._release)
+        return future
+
+    def _release(self, future: Optional[Future]):
+        with self.lock:
+            self.in_flight -= 1
+            if future is not None:
+                self.completed += 1
+        self.slots.release()
+
+    def stats(self) -> Dict[str, Any]:
+        with self.lock:
+            return {
+                "workers": self.workers,
+                "queue_depth": self.queue_depth,
+                "in_flight": self.in_flight,
+                "queued": max(0, self.in_flight - self.workers),
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "rejected": self.rejected
+            }
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+_shared_pool: Optional[VerificationPool] = None
+_shared_lock = threading.Lock()
+
+
+def shared_pool() -> VerificationPool:
+    """Process-wide pool shared by every verification endpoint"""
+    global _shared_pool
+    with _shared_lock:
+        if _shared_pool is None:
+            _shared_pool = VerificationPool()
+        return _shared_pool
+
+
+@helping.attributize
+def poll_result(me, future: Future, on_error: Callable[[Exception], Any]):
+    """
+    Response body generator for HIO's cooperative HTTP server
+
+    Yields empty chunks until the worker finishes, so the server keeps
+    servicing other connections, then the JSON encoded result. HIO only
+    sends the status line with the first non-empty chunk, so a worker
+    exception still turns the response into a 500 (through the
+    generator's _status attribute).
+
+    Args:
+        me: attributive generator, injected by helping.attributize
+        future: verification submitted to the pool
+        on_error: maps a worker exception to the JSON-able body
+    """
+    while not future.done():
+        yield b""
+    try:
+        result = future.result()
+    except Exception as e:
+        me._status = 500
+        result = on_error(e)
+    yield json.dumps(result).encode("utf-8")
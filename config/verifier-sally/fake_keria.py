@@ -0,0 +1,505 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for KERIA serving synthetic KELs
+
+Serves just the KERIA routes the verification service uses, backed by
+generated controller (OOR holder) and delegated agent KELs of any size:
+
+    GET  /identifiers/{aid}                     full identifier document
+    GET  /identifiers/{aid}/events?sn=&limit=   ranged events (sn in hex)
+    GET  /states?pre={aid}                      key state
+    GET  /spec.yaml                             liveness probe
+    GET  /_witness/{wit}/receipts?pre=&sn=      a witness's receipt (CESR)
+    GET  /credentials/{said}                    credential (ACDC)
+    GET  /registries/{ri}/{said}                credential TEL state
+    GET  /schema/{said}                         credential schema
+
+plus a few /_fake routes for inspection, for growing or rotating a KEL and for
+revoking a credential while the verifier is running. Event digests are
+real SAIDs (Blake3-256 with the blake3 package, else Blake2b-256) and
+every establishment event commits to its next key, which rotate() uses.
+Every controller
+holds an OOR credential chained OOR -> OOR Auth -> LE -> QVI, with one
+QVI and LE shared by all controllers and the QVI credential issued by a
+GEDA AID. Every event carries an Ed25519 indexed signature by
+the AID's key in 'sigs' when the cryptography package is installed.
+With --witnesses every AID is witnessed by the same pool; receipts are
+attached to the events in 'rcts', served by the witness route, or both. It can run as a server or be mounted in-process
+through httpx.ASGITransport, which is how the benchmarks use it.
+
+Usage:
+    python3 fake_keria.py --controllers 1 --agents 50 --events 5000 --port 3902
+    KERIA_URL=http://127.0.0.1:3902 python3 verification_service_keri_v2.py
+"""
+
+import argparse
+import base64
+import hashlib
+import json
+from typing import Any, Dict, List, Optional
+
+try:
+    from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PrivateKey
+except ImportError:
+    Ed25519PrivateKey = None
+
+try:
+    import blake3
+except ImportError:
+    blake3 = None
+
+from fastapi import FastAPI, HTTPException, Query
+from fastapi.responses import JSONResponse, PlainTextResponse
+import uvicorn
+
+
+def make_digest(seed: str) -> str:
+    """Deterministic qb64 'E' (32 byte digest) code from a seed string"""
+    raw = hashlib.blake2b(seed.encode(), digest_size=32).digest()
+    return "E" + base64.urlsafe_b64encode(b"\x00" + raw).decode()[1:]
+
+
+def qb64_digest(ser: bytes) -> str:
+    """qb64 Blake3-256 ('E') digest, Blake2b-256 ('F') without the blake3 package"""
+    if blake3 is not None:
+        return "E" + base64.urlsafe_b64encode(b"\x00" + blake3.blake3(ser).digest()).decode()[1:]
+    return "F" + base64.urlsafe_b64encode(b"\x00" + hashlib.blake2b(ser, digest_size=32).digest()).decode()[1:]
+
+
+def saidify(event: Dict[str, Any]) -> Dict[str, Any]:
+    """Set an event's 'd' (and an inception's prefix 'i') to its SAID, as keripy computes it"""
+    labels = ["d", "i"] if event["t"] in ("icp", "dip") else ["d"]
+    dummied = dict(event, **{label: "#" * 44 for label in labels})
+    said = qb64_digest(event_raw(dummied))
+    event.update({label: said for label in labels})
+    return event
+
+
+def make_verkey(seed: str) -> str:
+    """Deterministic qb64 'D' (Ed25519 verification key) code from a seed string"""
+    signer = make_signer(seed)
+    if signer is not None:
+        return signer_verkey(signer)
+    raw = hashlib.sha256(seed.encode()).digest()
+    return "D" + base64.urlsafe_b64encode(b"\x00" + raw).decode()[1:]
+
+
+def make_signer(seed: str) -> Optional["Ed25519PrivateKey"]:
+    """Deterministic Ed25519 signing key from a seed string, None without cryptography"""
+    if Ed25519PrivateKey is None:
+        return None
+    return Ed25519PrivateKey.from_private_bytes(hashlib.sha256(seed.encode()).digest())
+
+
+def signer_verkey(signer: "Ed25519PrivateKey", code: str = "D") -> str:
+    """qb64 verification key; code 'B' makes a non-transferable (witness) prefix"""
+    raw = signer.public_key().public_bytes_raw()
+    return code + base64.urlsafe_b64encode(b"\x00" + raw).decode()[1:]
+
+
+B64 = "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-_"
+
+# vLEI credential schema SAIDs
+QVI_SCHEMA = "EBfdlu8R27Fbx-ehrqwImnK-8Cm79sqbAQ4MmvEAYqao"
+LE_SCHEMA = "ENPXp1vQzRF6JwIuS-mp2U8Uf1MoADoP_GqQ62VsDZWY"
+OOR_AUTH_SCHEMA = "EKA57bKBKxr_kN7iN5i7lMUxpMG-s19dRcmov1iDxz-E"
+OOR_SCHEMA = "EBNaNu-M9P5cgrnfl2Fvymy4E_jvxxyjb70PRtiANlJy"
+
+
+def event_raw(event: Dict[str, Any]) -> bytes:
+    """The event as KERI serializes it, without attached signatures and receipts"""
+    ked = {label: value for label, value in event.items() if label not in ("sigs", "rcts")}
+    return json.dumps(ked, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def indexed_signature(signer: "Ed25519PrivateKey", raw: bytes, index: int = 0) -> str:
+    """qb64 indexed 'A' signature"""
+    sig = signer.sign(raw)
+    return "A" + B64[index] + base64.urlsafe_b64encode(b"\x00\x00" + sig).decode()[2:]
+
+
+def sign_event(signer: "Ed25519PrivateKey", event: Dict[str, Any], index: int = 0) -> str:
+    """qb64 indexed 'A' signature over the event as KERI serializes it"""
+    return indexed_signature(signer, event_raw(event), index)
+
+
+class FakeKeria:
+    """Synthetic KEL store: controllers anchoring delegated agents"""
+
+    def __init__(
+        self,
+        controllers: int = 1,
+        agents: int = 10,
+        events: int = 100,
+        agent_events: int = 1,
+        seed: str = "fake-keria",
+        signed: bool = True,
+        witnesses: int = 0,
+        toad: Optional[int] = None,
+        receipts: str = "attached"
+    ):
+        """
+        Args:
+            controllers: number of controller (OOR holder) AIDs
+            agents: delegated agents per controller
+            events: minimum KEL length per controller; filler interaction
+                events are added after the delegation anchors
+            agent_events: KEL length per agent
+            seed: changes every generated AID and digest
+            signed: attach signatures (needs the cryptography package)
+            witnesses: witness pool size, shared by every AID (needs
+                the cryptography package)
+            toad: witness receipts required per event (default: majority)
+            receipts: 'attached' to the events, 'served' by the witness
+                route only, or 'both'
+        """
+        self.seed = seed
+        self.signed = signed and Ed25519PrivateKey is not None
+        self.signers: Dict[str, Any] = {}
+        # AID -> (key seed, index of the key in force)
+        self.key_seeds: Dict[str, Any] = {}
+        self.witness_signers: Dict[str, Any] = {}
+        if Ed25519PrivateKey is not None:
+            for w in range(witnesses):
+                signer = make_signer(f"{seed}/witness/{w}")
+                self.witness_signers[signer_verkey(signer, "B")] = signer
+        self.witnesses = list(self.witness_signers)
+        self.toad = len(self.witnesses) // 2 + 1 if toad is None and self.witnesses else (toad or 0)
+        self.attach_receipts = receipts in ("attached", "both")
+        self.offline_witnesses = set()
+        self.kels: Dict[str, List[Dict[str, Any]]] = {}
+        self.controllers: List[str] = []
+        self.agents: Dict[str, List[str]] = {}
+        kinds = ("identifiers", "events", "states", "receipts", "credentials", "credential_states", "schemas")
+        self.bytes_served: Dict[str, int] = {kind: 0 for kind in kinds}
+        self.requests: Dict[str, int] = {kind: 0 for kind in kinds}
+        self.credentials: Dict[str, Dict[str, Any]] = {}
+        self.credential_states: Dict[str, Dict[str, Any]] = {}
+        self.schemas: Dict[str, Dict[str, Any]] = {}
+        self.oor_credentials: Dict[str, str] = {}
+        self.geda = make_digest(f"{seed}/geda")
+
+        for c in range(controllers):
+            controller = self._incept(f"{seed}/controller/{c}")
+            self.controllers.append(controller)
+            self.agents[controller] = []
+            for a in range(agents):
+                agent = self._incept(f"{seed}/controller/{c}/agent/{a}", delegator=controller)
+                self.agents[controller].append(agent)
+                icp = self.kels[agent][0]
+                self._append(controller, [{"i": agent, "s": "0", "d": icp["d"]}])
+                self.append_filler(agent, agent_events - 1)
+            self.append_filler(controller, max(0, events - len(self.kels[controller])))
+
+        # One QVI and LE above every controller's OOR Auth and OOR credential
+        qvi, le = make_digest(f"{seed}/qvi"), make_digest(f"{seed}/le")
+        qvi_cred = self._issue(self.geda, QVI_SCHEMA, {"i": qvi, "LEI": "5493001KJTIIGC8Y1R12"})
+        le_cred = self._issue(qvi, LE_SCHEMA, {"i": le, "LEI": "5493001KJTIIGC8Y1R17"},
+                              {"qvi": {"n": qvi_cred, "s": QVI_SCHEMA}})
+        for controller in self.controllers:
+            auth = self._issue(le, OOR_AUTH_SCHEMA, {"i": qvi, "AID": controller, "officialRole": "Agent Owner"},
+                               {"le": {"n": le_cred, "s": LE_SCHEMA}})
+            self.oor_credentials[controller] = self._issue(
+                qvi, OOR_SCHEMA, {"i": controller, "officialRole": "Agent Owner"},
+                {"auth": {"n": auth, "s": OOR_AUTH_SCHEMA, "o": "I2I"}}
+            )
+
+    def _incept(self, seed: str, delegator: Optional[str] = None) -> str:
+        event = {
+            "v": "KERI10JSON000000_",
+            "t": "dip" if delegator else "icp",
+            "d": "",
+            "i": "",
+            "s": "0",
+            "kt": "1",
+            "k": [make_verkey(f"{seed}/key/0")],
+            "nt": "1",
+            "n": [qb64_digest(make_verkey(f"{seed}/key/1").encode())],
+            "bt": format(self.toad, "x"),
+            "b": list(self.witnesses),
+            "c": [],
+            "a": []
+        }
+        if delegator:
+            event["di"] = delegator
+        aid = saidify(event)["i"]
+        self.key_seeds[aid] = (seed, 0)
+        if self.signed:
+            self.signers[aid] = make_signer(f"{seed}/key/0")
+        self.kels[aid] = [self._sign(aid, event)]
+        return aid
+
+    def rotate(self, aid: str, seals: Optional[List[Dict[str, Any]]] = None):
+        """Rotate a non-delegated KEL to the key its last establishment event committed to"""
+        kel = self.kels[aid]
+        if kel[0]["t"] == "dip":
+            raise ValueError("delegated rotations need the delegator's approval, which is not simulated")
+        seed, index = self.key_seeds[aid]
+        index += 1
+        self.key_seeds[aid] = (seed, index)
+        if self.signed:
+            self.signers[aid] = make_signer(f"{seed}/key/{index}")
+        event = {
+            "v": "KERI10JSON000000_",
+            "t": "rot",
+            "d": "",
+            "i": aid,
+            "s": format(len(kel), "x"),
+            "p": kel[-1]["d"],
+            "kt": "1",
+            "k": [make_verkey(f"{seed}/key/{index}")],
+            "nt": "1",
+            "n": [qb64_digest(make_verkey(f"{seed}/key/{index + 1}").encode())],
+            "bt": format(self.toad, "x"),
+            "br": [],
+            "ba": [],
+            "a": seals or []
+        }
+        kel.append(self._sign(aid, saidify(event)))
+
+    def _sign(self, aid: str, event: Dict[str, Any]) -> Dict[str, Any]:
+        signer = self.signers.get(aid)
+        raw = event_raw(event)
+        if signer is not None:
+            event["sigs"] = [indexed_signature(signer, raw)]
+        if self.attach_receipts and self.witnesses:
+            event["rcts"] = [
+                indexed_signature(self.witness_signers[wit], raw, index)
+                for index, wit in enumerate(self.witnesses)
+            ]
+        return event
+
+    def receipt(self, wit: str, aid: str, sn: int) -> Optional[str]:
+        """A witness's receipt message for event sn of a KEL: rct body + -B indexed signature"""
+        kel = self.kels.get(aid)
+        if wit not in self.witness_signers or kel is None or not 0 <= sn < len(kel):
+            return None
+        event = kel[sn]
+        body = {"v": "KERI10JSON000000_", "t": "rct", "d": event["d"], "i": aid, "s": event["s"]}
+        sig = indexed_signature(self.witness_signers[wit], event_raw(event), self.witnesses.index(wit))
+        return json.dumps(body, separators=(",", ":")) + "-BAB" + sig
+
+    def witness_urls(self, base: str) -> Dict[str, str]:
+        """WITNESS_URLS for a verifier reaching this fake at base"""
+        return {wit: f"{base.rstrip('/')}/_witness/{wit}" for wit in self.witnesses}
+
+    def _append(self, aid: str, seals: List[Dict[str, Any]], ilk: str = "ixn"):
+        kel = self.kels[aid]
+        sn = len(kel)
+        event = {
+            "v": "KERI10JSON000000_",
+            "t": ilk,
+            "d": "",
+            "i": aid,
+            "s": format(sn, "x"),
+            "p": kel[-1]["d"],
+            "a": seals
+        }
+        kel.append(self._sign(aid, saidify(event)))
+
+    def append_filler(self, aid: str, count: int):
+        """Grow a KEL by `count` interaction events anchoring data seals"""
+        for _ in range(count):
+            sn = len(self.kels[aid])
+            self._append(aid, [{"d": make_digest(f"{self.seed}/{aid}/data/{sn}")}])
+
+    def _issue(
+        self,
+        issuer: str,
+        schema: str,
+        attributes: Dict[str, Any],
+        edges: Optional[Dict[str, Any]] = None
+    ) -> str:
+        """Issue a credential from the issuer's registry; returns its SAID"""
+        said = make_digest(f"{self.seed}/credential/{len(self.credentials)}")
+        registry = make_digest(f"{self.seed}/registry/{issuer}")
+        sad = {
+            "v": "ACDC10JSON000000_",
+            "d": said,
+            "i": issuer,
+            "ri": registry,
+            "s": schema,
+            "a": {"d": make_digest(f"{self.seed}/attributes/{said}"), **attributes}
+        }
+        if edges:
+            sad["e"] = {"d": make_digest(f"{self.seed}/edges/{said}"), **edges}
+        self.credentials[said] = sad
+        self.credential_states[said] = {"i": said, "ri": registry, "s": "0", "d": make_digest(f"{said}/iss"), "et": "iss"}
+        self.schemas.setdefault(schema, {
+            "$id": schema,
+            "$schema": "http://json-schema.org/draft-07/schema#",
+            "type": "object",
+            "required": ["v", "d", "i", "ri", "s", "a"]
+        })
+        return said
+
+    def revoke(self, said: str):
+        """Append a revocation to a credential's TEL"""
+        state = self.credential_states[said]
+        state.update({"s": "1", "d": make_digest(f"{said}/rev"), "et": "rev"})
+
+    def state(self, aid: str) -> Dict[str, Any]:
+        last = self.kels[aid][-1]
+        return {"i": aid, "s": last["s"], "d": last["d"], "et": last["t"]}
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "requests": dict(self.requests),
+            "bytes_served": dict(self.bytes_served),
+            "total_bytes": sum(self.bytes_served.values()),
+            "controller_kel_lengths": {aid: len(self.kels[aid]) for aid in self.controllers}
+        }
+
+    def reset_stats(self):
+        for key in self.bytes_served:
+            self.bytes_served[key] = 0
+            self.requests[key] = 0
+
+
+def create_app(fake: FakeKeria, ranged: bool = True) -> FastAPI:
+    """
+    Build the ASGI app for a FakeKeria
+
+    Args:
+        fake: backing KEL store
+        ranged: serve /identifiers/{aid}/events; without it the verifier
+            has to fall back to full identifier fetches
+    """
+    app = FastAPI(title="Fake KERIA", version="0.1.0")
+
+    def respond(kind: str, body: Any) -> JSONResponse:
+        response = JSONResponse(body)
+        fake.requests[kind] += 1
+        fake.bytes_served[kind] += len(response.body)
+        return response
+
+    def kel_or_404(aid: str) -> List[Dict[str, Any]]:
+        kel = fake.kels.get(aid)
+        if kel is None:
+            raise HTTPException(404, f"AID not found: {aid}")
+        return kel
+
+    @app.get("/spec.yaml")
+    async def spec():
+        return PlainTextResponse("openapi: 3.1.0\ninfo:\n  title: Fake KERIA\n")
+
+    @app.get("/identifiers/{aid}")
+    async def identifier(aid: str):
+        kel = kel_or_404(aid)
+        return respond("identifiers", {"prefix": aid, "state": fake.state(aid), "events": kel})
+
+    if ranged:
+        @app.get("/identifiers/{aid}/events")
+        async def events(aid: str, sn: str = Query("0"), limit: Optional[int] = Query(None)):
+            kel = kel_or_404(aid)
+            start = int(sn, 16)
+            end = len(kel) if limit is None else start + limit
+            return respond("events", {"prefix": aid, "events": kel[start:end]})
+
+    @app.get("/states")
+    async def states(pre: str):
+        kel_or_404(pre)
+        return respond("states", [fake.state(pre)])
+
+    @app.get("/_witness/{wit}/receipts")
+    async def receipts(wit: str, pre: str, sn: int):
+        if wit in fake.offline_witnesses:
+            raise HTTPException(503, f"Witness {wit} offline")
+        receipt = fake.receipt(wit, pre, sn)
+        if receipt is None:
+            raise HTTPException(404, f"No receipt by {wit} for {pre} sn {sn}")
+        response = PlainTextResponse(receipt, media_type="application/cesr")
+        fake.requests["receipts"] += 1
+        fake.bytes_served["receipts"] += len(response.body)
+        return response
+
+    @app.get("/credentials/{said}")
+    async def credential(said: str):
+        sad = fake.credentials.get(said)
+        if sad is None:
+            raise HTTPException(404, f"Credential not found: {said}")
+        return respond("credentials", {"sad": sad, "status": fake.credential_states[said]})
+
+    @app.get("/registries/{ri}/{said}")
+    async def credential_state(ri: str, said: str):
+        state = fake.credential_states.get(said)
+        if state is None or state["ri"] != ri:
+            raise HTTPException(404, f"No TEL state for {said} in {ri}")
+        return respond("credential_states", state)
+
+    @app.get("/schema/{said}")
+    async def schema(said: str):
+        document = fake.schemas.get(said)
+        if document is None:
+            raise HTTPException(404, f"Schema not found: {said}")
+        return respond("schemas", document)
+
+    @app.get("/_fake/aids")
+    async def aids():
+        return {"controllers": fake.controllers, "agents": fake.agents, "oor_credentials": fake.oor_credentials}
+
+    @app.get("/_fake/stats")
+    async def stats():
+        return fake.stats()
+
+    @app.post("/_fake/identifiers/{aid}/append")
+    async def append(aid: str, count: int = 1):
+        kel_or_404(aid)
+        fake.append_filler(aid, count)
+        return fake.state(aid)
+
+    @app.post("/_fake/identifiers/{aid}/rotate")
+    async def rotate(aid: str):
+        kel_or_404(aid)
+        try:
+            fake.rotate(aid)
+        except ValueError as e:
+            raise HTTPException(400, str(e))
+        return fake.state(aid)
+
+    @app.post("/_fake/credentials/{said}/revoke")
+    async def revoke(said: str):
+        if said not in fake.credentials:
+            raise HTTPException(404, f"Credential not found: {said}")
+        fake.revoke(said)
+        return fake.credential_states[said]
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stand-in for KERIA serving synthetic KELs")
+    parser.add_argument("--controllers", type=int, default=1)
+    parser.add_argument("--agents", type=int, default=10, help="delegated agents per controller")
+    parser.add_argument("--events", type=int, default=100, help="minimum events per controller KEL")
+    parser.add_argument("--agent-events", type=int, default=1, help="events per agent KEL")
+    parser.add_argument("--seed", default="fake-keria")
+    parser.add_argument("--unsigned", action="store_true", help="serve events without signatures")
+    parser.add_argument("--witnesses", type=int, default=0, help="witness pool size")
+    parser.add_argument("--toad", type=int, default=None, help="receipts required (default: majority)")
+    parser.add_argument("--receipts", choices=("attached", "served", "both"), default="attached")
+    parser.add_argument("--no-ranged", action="store_true", help="do not serve ranged event queries")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=3902)
+    args = parser.parse_args()
+
+    fake = FakeKeria(
+        args.controllers, args.agents, args.events, args.agent_events, args.seed,
+        not args.unsigned, args.witnesses, args.toad, args.receipts
+    )
+    for controller in fake.controllers:
+        print(f"controller {controller} ({len(fake.kels[controller])} events, OOR credential {fake.oor_credentials[controller]})")
+        for agent in fake.agents[controller][:3]:
+            print(f"  agent {agent}")
+        if len(fake.agents[controller]) > 3:
+            print(f"  ... {len(fake.agents[controller]) - 3} more (GET /_fake/aids)")
+
+    if fake.witnesses:
+        print(f"WITNESS_URLS='{json.dumps(fake.witness_urls(f'http://{args.host}:{args.port}'))}'")
+    print(f"GEDA_AID={fake.geda}")
+
+    uvicorn.run(create_app(fake, ranged=not args.no_ranged), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,18 +5,45 @@ This module extends Sally to verify agent delegations by:
 1. Querying agent's KEL to verify delegation
 2. Verifying OOR holder's credential
 3. Checking complete trust chain
+
+Verification runs on the shared custom_sally worker pool so blocking
+LMDB reads stay off the event loop.
 """
 
 from keri.app import habbing
 from keri.core import coring
+import asyncio
 import logging
 
+from custom_sally import worker_pool
+
 logger = logging.getLogger(__name__)
 
 
 async def verify_agent_delegation(hab, agent_aid: str, oor_holder_aid: str):
     """
-    Verify agent delegation relationship.
+    Verify agent delegation relationship on the shared worker pool.
+    
+    Args:
+        hab: Sally's habitat
+        agent_aid: Agent's AID (prefix)
+        oor_holder_aid: OOR holder's AID (prefix)
+        
+    Returns:
+        dict: Verification result with details
+        
+    Raises:
+        worker_pool.PoolSaturated: if every worker is busy and the queue is full
+    """
+    future = worker_pool.shared_pool().submit(
+        _verify_agent_delegation, hab, agent_aid, oor_holder_aid
+    )
+    return await asyncio.wrap_future(future)
+
+
+def _verify_agent_delegation(hab, agent_aid: str, oor_holder_aid: str):
+    """
+    Verify agent delegation relationship (blocking).
     
     Args:
         hab: Sally's habitat
@@ -133,6 +160,14 @@ def add_agent_delegation_route(app, hab):
                     
                 resp.media = result
                 
+            except worker_pool.PoolSaturated as e:
+                resp.status = falcon.HTTP_503
+                resp.set_header("Retry-After", str(e.retry_after))
+                resp.media = {
+                    "error": "Verification capacity exhausted, retry later",
+                    "retry_after": e.retry_after
+                }
+                
             except Exception as e:
                 logger.error(f"Error in agent delegation endpoint: {e}")
                 resp.status = falcon.HTTP_500
@@ -7,11 +7,24 @@ This module extends Sally's Falcon app with agent delegation verification that:
 1. Queries agent's KEL to verify delegation
 2. Verifies OOR holder's credential
 3. Checks complete trust chain to GLEIF
+
+The KEL reads are blocking LMDB reads, so verification runs on the
+shared custom_sally worker pool rather than inside the event loop; a
+saturated pool is answered with 503 and Retry-After.
+
+Unknown agents and holders no longer fail outright: their OOBIs are
+resolved in the background (custom_sally.kel_prefetch) and the request
+waits for the KELs up to a deadline, then answers 503 with Retry-After
+if they are still on their way.
 """
 
 from keri.core import coring
+import asyncio
 import logging
 import json
+import math
+
+from custom_sally import kel_prefetch, worker_pool
 
 logger = logging.getLogger(__name__)
 
@@ -20,6 +33,30 @@ async def verify_agent_delegation(hby, agent_aid: str, oor_holder_aid: str):
     """
     Verify agent delegation relationship through KEL inspection.
     
+    Runs the blocking verification on the shared worker pool and awaits
+    it without holding up the event loop.
+    
+    Args:
+        hby: Sally's Habery instance
+        agent_aid: Agent's AID (prefix)
+        oor_holder_aid: OOR holder's AID (prefix)
+        
+    Returns:
+        dict: Verification result with details
+        
+    Raises:
+        worker_pool.PoolSaturated: if every worker is busy and the queue is full
+    """
+    future = worker_pool.shared_pool().submit(
+        _verify_agent_delegation, hby, agent_aid, oor_holder_aid
+    )
+    return await asyncio.wrap_future(future)
+
+
+def _verify_agent_delegation(hby, agent_aid: str, oor_holder_aid: str):
+    """
+    Verify agent delegation relationship through KEL inspection (blocking).
+    
     Args:
         hby: Sally's Habery instance
         agent_aid: Agent's AID (prefix)
@@ -40,7 +77,7 @@ async def verify_agent_delegation(hby, agent_aid: str, oor_holder_aid: str):
         logger.info(f"Verifying agent delegation: {agent_aid} from {oor_holder_aid}")
         
         # 1. Get agent's key event log
-        agent_kever = hby.db.kevers.get(keys=agent_aid)
+        agent_kever = hby.db.kevers.get(agent_aid)
         
         if not agent_kever:
             result["errors"].append(f"Agent AID not found in KEL database: {agent_aid}")
@@ -54,7 +91,7 @@ async def verify_agent_delegation(hby, agent_aid: str, oor_holder_aid: str):
             return result
             
         # 3. Get agent's delegator
-        agent_delegator = agent_kever.delpre
+        agent_delegator = agent_kever.delegator
         
         # 4. Verify delegator matches OOR holder
         if agent_delegator != oor_holder_aid:
@@ -66,7 +103,7 @@ async def verify_agent_delegation(hby, agent_aid: str, oor_holder_aid: str):
             return result
             
         # 5. Get OOR holder's key event log
-        oor_kever = hby.db.kevers.get(keys=oor_holder_aid)
+        oor_kever = hby.db.kevers.get(oor_holder_aid)
         
         if not oor_kever:
             result["errors"].append(f"OOR holder AID not found in KEL database: {oor_holder_aid}")
@@ -81,7 +118,7 @@ async def verify_agent_delegation(hby, agent_aid: str, oor_holder_aid: str):
             
         # 7. Check if OOR holder is also delegated (should be from LE or QVI)
         oor_delegated = oor_kever.delegated
-        oor_delegator = oor_kever.delpre if oor_delegated else None
+        oor_delegator = oor_kever.delegator if oor_delegated else None
         
         # 8. All checks passed - delegation is valid
         result["valid"] = True
@@ -121,7 +158,12 @@ def setup_agent_verification_endpoint(app, hby):
     Request Body:
     {
         "agent_aid": "EAgent...",
-        "oor_holder_aid": "EOOR..."
+        "oor_holder_aid": "EOOR...",
+        "agent_oobi": "http://...",       (optional, for an unknown agent)
+        "oor_holder_oobi": "http://...",  (optional, for an unknown holder)
+        "wait": 5                         (optional, seconds to wait for
+                                           unknown KELs, capped at
+                                           SALLY_PREFETCH_WAIT)
     }
     
     Response:
@@ -176,6 +218,38 @@ def setup_agent_verification_endpoint(app, hby):
                 
                 logger.info(f"POST /verify/agent-delegation: agent={agent_aid}, oor_holder={oor_holder_aid}")
                 
+                try:
+                    wait = float(body.get('wait', kel_prefetch.PREFETCH_WAIT))
+                except (TypeError, ValueError):
+                    wait = math.nan
+                if math.isnan(wait):
+                    resp.status = falcon.HTTP_400
+                    resp.media = {
+                        "valid": False,
+                        "error": "Invalid wait",
+                        "details": "wait must be a number of seconds"
+                    }
+                    return
+                
+                # Resolve unknown KELs in the background, up to a deadline
+                wait = min(max(wait, 0.0), kel_prefetch.PREFETCH_WAIT)
+                pending, failed = await kel_prefetch.shared_prefetcher(self.hby).ensure_async({
+                    oor_holder_aid: body.get('oor_holder_oobi'),
+                    agent_aid: body.get('agent_oobi')
+                }, wait=wait)
+                if pending:
+                    logger.info(f"KEL resolution pending for {pending}")
+                    resp.status = falcon.HTTP_503
+                    resp.set_header("Retry-After", str(worker_pool.VERIFY_RETRY_AFTER))
+                    resp.media = {
+                        "valid": False,
+                        "error": "KEL resolution in progress, retry later",
+                        "pending": pending,
+                        "retryable": True,
+                        "retry_after": worker_pool.VERIFY_RETRY_AFTER
+                    }
+                    return
+                
                 # Verify agent delegation
                 result = await verify_agent_delegation(
                     self.hby, 
@@ -189,10 +263,21 @@ def setup_agent_verification_endpoint(app, hby):
                     logger.info(f"✓ Delegation verified: {agent_aid} <- {oor_holder_aid}")
                 else:
                     resp.status = falcon.HTTP_400
+                    result["errors"].extend(f"KEL resolution failed: {error}" for error in failed.values())
                     logger.warning(f"✗ Delegation verification failed: {result.get('errors')}")
                     
                 resp.media = result
                 
+            except worker_pool.PoolSaturated as e:
+                logger.warning(f"Shedding agent delegation request: {e}")
+                resp.status = falcon.HTTP_503
+                resp.set_header("Retry-After", str(e.retry_after))
+                resp.media = {
+                    "valid": False,
+                    "error": "Verification capacity exhausted, retry later",
+                    "retry_after": e.retry_after
+                }
+                
             except json.JSONDecodeError as e:
                 logger.error(f"Invalid JSON in request: {e}")
                 resp.status = falcon.HTTP_400
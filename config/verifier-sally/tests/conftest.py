@@ -0,0 +1,49 @@
+"""
+Shared fixtures for the verification service tests
+
+Tests run against fake_keria.py mounted in-process as the shared KERIA
+client, the same way the benchmarks use it.
+"""
+
+import asyncio
+import os
+import sys
+
+import httpx
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fake_keria import FakeKeria, create_app  # noqa: E402
+from vlei_verification import caches, kel_fetch, keria  # noqa: E402
+
+
+@pytest.fixture
+def fake_keria(monkeypatch):
+    """
+    Mount a FakeKeria as the shared KERIA client
+
+    Called as fake_keria(ranged=True, **kwargs), kwargs going to
+    FakeKeria; returns the FakeKeria. KEL caches, transfer counters and
+    the ranged query probe start from scratch in every test.
+    """
+    monkeypatch.setattr(caches, "kel_cache", caches.KelCache(
+        caches.KEL_CACHE_MAX_ENTRIES, caches.KEL_CACHE_MAX_BYTES, caches.KEL_CACHE_TTL))
+    monkeypatch.setattr(caches, "negative_cache", caches.NegativeCache(
+        caches.NEGATIVE_CACHE_TTL, caches.NEGATIVE_CACHE_MAX_ENTRIES))
+    monkeypatch.setattr(caches, "kel_flights", caches.SingleFlight())
+    monkeypatch.setattr(kel_fetch, "kel_transfer_stats", dict.fromkeys(kel_fetch.kel_transfer_stats, 0))
+    monkeypatch.setattr(kel_fetch, "KERIA_RANGED_KEL", "auto")
+    monkeypatch.setattr(kel_fetch, "ranged_kel_supported", None)
+    monkeypatch.setattr(keria, "client", None)
+    clients = []
+
+    def mount(ranged: bool = True, **kwargs) -> FakeKeria:
+        fake = FakeKeria(**kwargs)
+        keria.client = keria.create_client(transport=httpx.ASGITransport(app=create_app(fake, ranged=ranged)))
+        clients.append(keria.client)
+        return fake
+
+    yield mount
+    for client in clients:
+        asyncio.run(client.aclose())
@@ -0,0 +1,92 @@
+"""Ranged KEL queries and the fallback to full identifier fetches"""
+
+import asyncio
+
+import pytest
+
+from vlei_verification import caches, kel_fetch
+
+
+def expire(aid: str):
+    caches.kel_cache.get(aid).checked_at -= caches.kel_cache.ttl
+
+
+def test_inception_fetched_by_range_when_supported(fake_keria):
+    fake = fake_keria(agents=1, events=20)
+    agent = fake.agents[fake.controllers[0]][0]
+
+    entry = asyncio.run(kel_fetch.fetch_icp_entry(agent))
+
+    assert not entry.complete
+    assert entry.events == fake.kels[agent][:1]
+    assert kel_fetch.ranged_kel_supported is True
+    assert fake.requests["identifiers"] == 0
+    assert kel_fetch.kel_transfer_stats["ranged_fallbacks"] == 0
+
+
+def test_inception_falls_back_to_full_fetch_without_ranged_route(fake_keria):
+    fake = fake_keria(ranged=False, agents=1, events=20)
+    agent = fake.agents[fake.controllers[0]][0]
+
+    entry = asyncio.run(kel_fetch.fetch_icp_entry(agent))
+
+    assert entry.complete
+    assert entry.events == fake.kels[agent]
+    assert kel_fetch.kel_transfer_stats["ranged_fallbacks"] == 1
+    # The AID exists, so the 404 meant "no such route"
+    assert kel_fetch.ranged_kel_supported is False
+
+    fake.reset_stats()
+    asyncio.run(kel_fetch.fetch_icp_entry(agent))
+    assert fake.requests["identifiers"] == 1
+    assert kel_fetch.kel_transfer_stats["ranged_fallbacks"] == 2
+
+
+def test_unknown_aid_does_not_decide_ranged_support(fake_keria):
+    fake_keria(ranged=False, agents=0, events=1)
+
+    assert asyncio.run(kel_fetch.fetch_icp_entry("Eunknown")) is None
+    assert kel_fetch.ranged_kel_supported is None
+
+
+def test_grown_kel_refetched_in_full_without_ranged_route(fake_keria):
+    fake = fake_keria(ranged=False, agents=0, events=10)
+    controller = fake.controllers[0]
+    asyncio.run(kel_fetch.get_kel(controller))
+    fake.append_filler(controller, 5)
+    expire(controller)
+
+    entry = asyncio.run(kel_fetch.get_kel(controller))
+
+    assert entry.sn == len(fake.kels[controller]) - 1
+    assert caches.kel_cache.refetches == 1
+    assert caches.kel_cache.incremental_updates == 0
+    assert kel_fetch.kel_transfer_stats["ranged_fallbacks"] == 1
+    assert fake.requests["identifiers"] == 2
+
+
+def test_grown_kel_extended_by_range_when_supported(fake_keria):
+    fake = fake_keria(agents=0, events=10)
+    controller = fake.controllers[0]
+    asyncio.run(kel_fetch.get_kel(controller))
+    fake.append_filler(controller, 5)
+    expire(controller)
+
+    entry = asyncio.run(kel_fetch.get_kel(controller))
+
+    assert entry.events == fake.kels[controller]
+    assert caches.kel_cache.incremental_updates == 1
+    assert caches.kel_cache.refreshes == 1
+    assert fake.requests["identifiers"] == 1
+    assert fake.requests["events"] == 1
+
+
+def test_ranged_queries_disabled(fake_keria, monkeypatch):
+    fake = fake_keria(agents=1, events=5)
+    agent = fake.agents[fake.controllers[0]][0]
+    monkeypatch.setattr(kel_fetch, "KERIA_RANGED_KEL", "off")
+    monkeypatch.setattr(kel_fetch, "ranged_kel_supported", False)
+
+    with pytest.raises(kel_fetch.RangeNotSupported):
+        asyncio.run(kel_fetch.fetch_kel_range(agent, 0, limit=1))
+    assert fake.requests["events"] == 0
@@ -0,0 +1,64 @@
+"""Streaming KEL parser limits"""
+
+import asyncio
+import json
+
+import pytest
+
+from vlei_verification import kel_fetch, kel_parsing
+
+
+def feed_in_chunks(body: bytes, size: int):
+    parser = kel_parsing.KelEventStream()
+    events = []
+    for i in range(0, len(body), size):
+        events.extend(parser.feed(body[i:i + size]))
+    return parser, events
+
+
+def test_stream_matches_full_parse_across_chunk_boundaries(fake_keria):
+    fake = fake_keria(agents=2, events=20)
+    controller = fake.controllers[0]
+    body = json.dumps({"prefix": controller, "events": fake.kels[controller]}).encode()
+
+    parser, events = feed_in_chunks(body, 7)
+
+    assert events == fake.kels[controller]
+    assert parser.done
+    assert parser.bytes_read == len(body)
+
+
+def test_stream_rejects_oversized_event(monkeypatch):
+    monkeypatch.setattr(kel_parsing.KelEventStream, "MAX_EVENT_BYTES", 256)
+    event = {"t": "ixn", "s": "1", "a": [{"d": "E" + "x" * 1024}]}
+    body = json.dumps({"events": [event]}).encode()
+
+    with pytest.raises(ValueError, match="exceeds 256 bytes"):
+        feed_in_chunks(body, 64)
+
+
+def test_stream_waits_for_event_within_limit(monkeypatch):
+    monkeypatch.setattr(kel_parsing.KelEventStream, "MAX_EVENT_BYTES", 256)
+    event = {"t": "ixn", "s": "1", "a": [{"d": "E" + "x" * 128}]}
+    body = json.dumps({"events": [event]}).encode()
+
+    _, events = feed_in_chunks(body, 16)
+
+    assert events == [event]
+
+
+def test_kel_over_threshold_is_streamed_not_held(fake_keria, monkeypatch):
+    fake = fake_keria(agents=1, events=50)
+    controller = fake.controllers[0]
+    monkeypatch.setattr(kel_fetch, "KEL_STREAM_THRESHOLD_BYTES", 1024)
+
+    with pytest.raises(kel_fetch.KelTooLargeError):
+        asyncio.run(kel_fetch.fetch_kel(controller))
+
+    entry = asyncio.run(kel_fetch.fetch_kel_entry(controller))
+    assert entry.streamed
+    assert entry.events == []
+    assert kel_fetch.kel_transfer_stats["full_bytes"] == 0
+
+    icp = asyncio.run(kel_fetch.stream_first_event(controller))
+    assert icp == fake.kels[controller][0]
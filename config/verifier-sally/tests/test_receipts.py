@@ -0,0 +1,77 @@
+"""Witness receipts stop at the TOAD"""
+
+import asyncio
+import dataclasses
+
+import pytest
+
+from fake_keria import make_signer
+from vlei_verification import receipts, signatures
+
+pytestmark = pytest.mark.skipif(
+    not signatures.signature_verifier.available or make_signer("probe") is None,
+    reason="needs pysodium or cryptography"
+)
+
+EVENTS = 5
+
+
+def validate(fake, offline=()):
+    fake.offline_witnesses = set(offline)
+    validator = receipts.ReceiptValidator(fake.witness_urls("http://fake-keria"), 100, receipts.WITNESS_TIMEOUT)
+    signed = signatures.kel_signed_events(fake.kels[fake.controllers[0]])
+    return validator, list(asyncio.run(validator.validate(signed)).values())
+
+
+def test_attached_receipts_checked_up_to_toad(fake_keria):
+    fake = fake_keria(agents=0, events=EVENTS, witnesses=5, toad=2, receipts="attached")
+
+    validator, outcomes = validate(fake)
+
+    assert all(outcome["verified"] and outcome["receipted_by"] == 2 for outcome in outcomes)
+    assert validator.receipts_checked == 2 * EVENTS
+    assert validator.witness_queries == 0
+
+
+def test_witnesses_asked_only_for_missing_receipts(fake_keria):
+    fake = fake_keria(agents=0, events=EVENTS, witnesses=5, toad=2, receipts="served")
+
+    validator, outcomes = validate(fake)
+
+    assert all(outcome["verified"] for outcome in outcomes)
+    assert validator.witness_queries == 2 * EVENTS
+    assert fake.requests["receipts"] == 2 * EVENTS
+
+
+def test_failed_witness_replaced_by_next(fake_keria):
+    fake = fake_keria(agents=0, events=EVENTS, witnesses=5, toad=3, receipts="served")
+
+    validator, outcomes = validate(fake, offline=fake.witnesses[:2])
+
+    assert all(outcome["verified"] and outcome["receipted_by"] == 3 for outcome in outcomes)
+    assert validator.witness_queries == 5 * EVENTS
+    assert validator.witness_failures == 2 * EVENTS
+
+
+def test_event_short_of_toad_rejected(fake_keria):
+    fake = fake_keria(agents=0, events=EVENTS, witnesses=5, toad=2, receipts="served")
+
+    validator, outcomes = validate(fake, offline=fake.witnesses[1:])
+
+    for outcome in outcomes:
+        assert not outcome["verified"]
+        assert outcome["error"] == "1 of 2 required witness receipts valid"
+    assert validator.short_events == EVENTS
+    assert validator.validated == {}
+
+
+def test_toad_beyond_witness_pool_rejected_without_checks(fake_keria):
+    fake = fake_keria(agents=0, events=1, witnesses=3, toad=2, receipts="attached")
+    validator = receipts.ReceiptValidator({}, 100, receipts.WITNESS_TIMEOUT)
+    event = dataclasses.replace(signatures.kel_signed_events(fake.kels[fake.controllers[0]])[0], toad="4")
+
+    outcome = asyncio.run(validator.validate([event]))[event.key]
+
+    assert not outcome["verified"]
+    assert outcome["error"] == "TOAD 4 exceeds 3 witnesses"
+    assert validator.receipts_checked == 0
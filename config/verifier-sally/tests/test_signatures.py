@@ -0,0 +1,84 @@
+"""Signature checks and pre-rotation"""
+
+import asyncio
+
+import pytest
+
+from fake_keria import make_signer, make_verkey, qb64_digest, saidify, sign_event
+from vlei_verification import keri_rules, signatures
+
+pytestmark = pytest.mark.skipif(
+    not signatures.signature_verifier.available or make_signer("probe") is None,
+    reason="needs pysodium or cryptography"
+)
+
+
+def verifier() -> signatures.SignatureVerifier:
+    return signatures.SignatureVerifier(workers=0, batch_min=0, batch_size=1, max_entries=100)
+
+
+def forge_rotation(rotation: dict, seed: str) -> dict:
+    """The rotation re-keyed to a key the prior event never committed to, validly signed by it"""
+    forged = {label: value for label, value in rotation.items() if label not in signatures.ATTACHMENT_FIELDS}
+    forged["k"] = [make_verkey(seed)]
+    saidify(forged)
+    forged["sigs"] = [sign_event(make_signer(seed), forged)]
+    return forged
+
+
+def outcomes_by_sn(events) -> dict:
+    signed = signatures.kel_signed_events(events)
+    outcomes = asyncio.run(verifier().verify(signed))
+    return {int(event.sn, 16): outcomes[event.key] for event in signed}
+
+
+def test_rotation_to_committed_key_verifies(fake_keria):
+    fake = fake_keria(agents=0, events=3)
+    controller = fake.controllers[0]
+    fake.rotate(controller)
+    fake.append_filler(controller, 1)
+
+    outcomes = outcomes_by_sn(fake.kels[controller])
+
+    assert all(outcome["verified"] for outcome in outcomes.values())
+
+
+def test_rotation_to_uncommitted_key_rejected(fake_keria):
+    fake = fake_keria(agents=0, events=3)
+    controller = fake.controllers[0]
+    fake.rotate(controller)
+    fake.append_filler(controller, 1)
+    kel = fake.kels[controller]
+    forged = forge_rotation(kel[3], f"{fake.seed}/attacker")
+    # Events after the rotation are signed by the attacker's key too
+    following = {label: value for label, value in kel[4].items() if label != "sigs"}
+    following["p"] = forged["d"]
+    saidify(following)
+    following["sigs"] = [sign_event(make_signer(f"{fake.seed}/attacker"), following)]
+
+    outcomes = outcomes_by_sn(kel[:3] + [forged, following])
+
+    assert outcomes[2]["verified"]
+    assert not outcomes[3]["verified"]
+    assert "pre-rotation" in outcomes[3]["error"]
+    assert not outcomes[4]["verified"]
+    assert outcomes[4]["error"] == "follows the invalid rot at sn 3"
+
+
+def test_exposed_next_keys_matches_digest_at_ondex():
+    keys = [make_verkey(f"pre-rotation/{i}") for i in range(3)]
+    digests = [qb64_digest(key.encode()) for key in keys]
+
+    assert keri_rules.exposed_next_keys([(keys[0], 0), (keys[2], 2)], digests) == {0, 2}
+    # A committed key at the wrong position, or no prior next index, exposes nothing
+    assert keri_rules.exposed_next_keys([(keys[0], 1), (keys[1], None)], digests) == set()
+    assert keri_rules.exposed_next_keys([(keys[0], 5)], digests) == set()
+
+
+def test_next_threshold_needs_enough_exposed_keys():
+    keys = [make_verkey(f"pre-rotation/{i}") for i in range(3)]
+    digests = [qb64_digest(key.encode()) for key in keys]
+
+    assert signatures.next_key_digest_met(keys, {0, 1}, digests, "2")
+    assert not signatures.next_key_digest_met(keys, {0}, digests, "2")
+    assert not signatures.next_key_digest_met(keys[::-1], {0, 2}, digests, "2")
@@ -7,8 +7,8 @@ Queries KERIA for KEL data to perform real delegation verification
 from fastapi import FastAPI, Request, HTTPException
 import logging
 import uvicorn
-import httpx
-import os
+
+from vlei_verification import keria
 
 logging.basicConfig(
     level=logging.INFO,
@@ -19,25 +19,20 @@ logger = logging.getLogger(__name__)
 app = FastAPI(
     title="vLEI Agent Verifier with KERI",
     description="KEL-based verification service",
-    version="2.0.0"
+    version="2.0.0",
+    lifespan=keria.lifespan
 )
 
-KERIA_URL = os.getenv('KERIA_URL', 'http://keria:3902')
-
 
 async def query_kel(aid: str):
     """Query KERIA for AID's KEL data"""
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                f"{KERIA_URL}/identifiers/{aid}",
-                timeout=10.0
-            )
-            if response.status_code == 200:
-                return response.json()
-            else:
-                logger.warning(f"AID not found: {aid[:20]}...")
-                return None
+        response = await keria.get_client().get(f"{keria.KERIA_URL}/identifiers/{aid}")
+        if response.status_code == 200:
+            return response.json()
+        else:
+            logger.warning(f"AID not found: {aid[:20]}...")
+            return None
     except Exception as e:
         logger.error(f"KEL query error: {e}")
         return None
@@ -48,9 +43,8 @@ async def health():
     """Health check with KERIA status"""
     keria_status = "unknown"
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(f"{KERIA_URL}/spec.yaml", timeout=5.0)
-            keria_status = "connected" if response.status_code == 200 else "unreachable"
+        response = await keria.get_client().get(f"{keria.KERIA_URL}/spec.yaml", timeout=5.0)
+        keria_status = "connected" if response.status_code == 200 else "unreachable"
     except:
         keria_status = "unreachable"
     
@@ -59,7 +53,8 @@ async def health():
         "service": "agent-delegation-verifier-keri",
         "version": "2.0.0",
         "keria_status": keria_status,
-        "keria_url": KERIA_URL
+        "keria_url": keria.KERIA_URL,
+        "keria_pool": keria.pool_stats()
     }
 
 
@@ -152,14 +147,14 @@ async def root():
             "KEL-based verification",
             "KERIA integration"
         ],
-        "keria_url": KERIA_URL
+        "keria_url": keria.KERIA_URL
     }
 
 
 if __name__ == "__main__":
     logger.info("=" * 60)
     logger.info("Starting KERI-Enabled Verification Service")
-    logger.info(f"KERIA URL: {KERIA_URL}")
+    logger.info(f"KERIA URL: {keria.KERIA_URL}")
     logger.info("=" * 60)
     
     uvicorn.run(app, host="0.0.0.0", port=9723, log_level="info")
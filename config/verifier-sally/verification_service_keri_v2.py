@@ -2,14 +2,24 @@
 """
 ENHANCED KERI-Based Agent Delegation Verification Service v2.0
 Performs REAL KEL parsing and delegation verification
+
+The verification stages live in the vlei_verification package: KEL
+retrieval and caching, KEL parsing, signatures, witness receipts, KEL
+replay and credential chains. This module wires them into the API.
 """
 
+import asyncio
+import re
+from contextlib import asynccontextmanager
+from functools import lru_cache
 from fastapi import FastAPI, Request, HTTPException
+from fastapi.responses import PlainTextResponse
 import logging
 import uvicorn
-import httpx
 import os
-from typing import Dict, List, Optional, Tuple, Any
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from vlei_verification import caches, credential_chain, kel_fetch, kel_parsing, kel_replay, keri_rules, keria, metrics, receipts, signatures
 
 logging.basicConfig(
     level=logging.INFO,
@@ -17,268 +27,335 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Batch verification limits
+BATCH_MAX_PAIRS = int(os.getenv('BATCH_MAX_PAIRS', '500'))
+BATCH_CONCURRENCY = int(os.getenv('BATCH_CONCURRENCY', '8'))
+BATCH_DEADLINE = float(os.getenv('BATCH_DEADLINE', '30.0'))
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Hold the shared KERIA client open while the app runs; stop the signature workers and close the KEL checkpoints on shutdown"""
+    async with keria.lifespan(app):
+        try:
+            yield
+        finally:
+            signatures.signature_verifier.shutdown()
+            kel_replay.kel_checkpoints.close()
+
+
 app = FastAPI(
     title="vLEI Agent Verifier with Enhanced KEL Parsing",
     description="Real KEL-based delegation verification",
-    version="2.0.0"
+    version="2.0.0",
+    lifespan=lifespan
 )
 
-KERIA_URL = os.getenv('KERIA_URL', 'http://keria:3902')
 
+@app.middleware("http")
+async def server_timing(request: Request, call_next):
+    """Give each request a StageTimer and report it as Server-Timing"""
+    timer = metrics.StageTimer()
+    request.state.timer = timer
+    response = await call_next(request)
+    response.headers["Server-Timing"] = timer.server_timing()
+    return response
 
-# ============================================================================
-# KERIA API FUNCTIONS
-# ============================================================================
 
-async def query_kel(aid: str) -> Optional[Dict]:
-    """Query KERIA for AID's KEL data"""
-    try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                f"{KERIA_URL}/identifiers/{aid}",
-                timeout=10.0
-            )
-            if response.status_code == 200:
-                return response.json()
-            else:
-                logger.warning(f"AID not found: {aid[:20]}...")
-                return None
-    except Exception as e:
-        logger.error(f"KEL query error for {aid[:20]}: {e}")
-        return None
+def verification_failure(endpoint: str, reason: str, status_code: int, detail: str) -> HTTPException:
+    """Count a failed verification and build the HTTPException to raise"""
+    metrics.verification_outcomes.inc(endpoint=endpoint, outcome="failed", reason=reason)
+    return HTTPException(status_code, detail)
+
+
+# CESR derivation codes an AID prefix can carry: code -> (name, transferable, self-addressing)
+AID_DERIVATION_CODES = {
+    'B': ("Ed25519 non-transferable", False, False),
+    'D': ("Ed25519", True, False),
+    'E': ("Blake3-256 digest", True, True),
+    'F': ("Blake2b-256 digest", True, True),
+    'G': ("Blake2s-256 digest", True, True),
+    'H': ("SHA3-256 digest", True, True),
+    'I': ("SHA2-256 digest", True, True),
+    '0D': ("Blake3-512 digest", True, True),
+    '0E': ("Blake2b-512 digest", True, True),
+    '0F': ("SHA3-512 digest", True, True),
+    '0G': ("SHA2-512 digest", True, True),
+    '1AAA': ("ECDSA secp256k1 non-transferable", False, False),
+    '1AAB': ("ECDSA secp256k1", True, False),
+    '1AAC': ("Ed448 non-transferable", False, False),
+    '1AAD': ("Ed448", True, False),
+    '1AAI': ("ECDSA secp256r1 non-transferable", False, False),
+    '1AAJ': ("ECDSA secp256r1", True, False),
+}
 
+# One pass over the whole qb64 string. Codes that pad their raw value
+# leave zero bits in the first character after the code, which limits
+# it to A-P (one pad byte) or A-D (two pad bytes).
+AID_QB64_PATTERN = re.compile(
+    r'(?P<code>[BDEFGHI])[A-P][A-Za-z0-9_-]{42}'
+    r'|(?P<code2>0[DEFG])[A-D][A-Za-z0-9_-]{85}'
+    r'|(?P<code4>1AA[ABIJ])[A-Za-z0-9_-]{44}'
+    r'|(?P<code4l>1AA[CD])[A-Za-z0-9_-]{76}'
+)
+AID_MAX_LENGTH = 88
 
-# ============================================================================
-# KEL PARSING FUNCTIONS - THE NEW STUFF!
-# ============================================================================
 
-def parse_agent_icp(kel_data: Dict, agent_aid: str, controller_aid: str) -> Tuple[bool, Dict]:
+@lru_cache(maxsize=65536)
+def classify_aid(aid: str) -> Tuple[Optional[str], Optional[str]]:
     """
-    Parse agent's inception event to verify delegation
+    Parse the derivation code of a qb64 AID prefix
     
     Returns:
-        (success: bool, details: Dict)
+        (code, None) for a well-formed prefix, (None, reason) otherwise
     """
-    try:
-        # KERIA response structure may vary, try different paths
-        events = None
-        
-        # Try different response structures
-        if isinstance(kel_data, dict):
-            # Try direct events array
-            if 'events' in kel_data:
-                events = kel_data['events']
-            # Try nested in state
-            elif 'state' in kel_data and isinstance(kel_data['state'], dict):
-                if 'k' in kel_data['state']:
-                    events = kel_data['state']['k']
-            # Try direct 'k' field
-            elif 'k' in kel_data:
-                events = kel_data['k']
-        
-        if not events or not isinstance(events, list) or len(events) == 0:
-            return False, {
-                "error": "No events found in KEL",
-                "agent_aid": agent_aid,
-                "kel_structure": str(type(kel_data))
-            }
-        
-        # Get first event (should be ICP)
-        icp_event = events[0]
-        
-        logger.info(f"ICP Event structure: {icp_event}")
-        
-        # Verify it's an inception event
-        event_type = icp_event.get('t')
-        if event_type != 'icp':
-            return False, {
-                "error": f"First event is not ICP, got: {event_type}",
-                "event": icp_event
-            }
-        
-        # Check for delegation field 'di'
-        delegator = icp_event.get('di')
-        
-        if not delegator:
-            return False, {
-                "error": "Agent is not delegated (no 'di' field in ICP)",
-                "icp_event": icp_event,
-                "has_di_field": False
-            }
-        
-        # Verify delegator matches controller
-        if delegator != controller_aid:
-            return False, {
-                "error": "Delegator mismatch",
-                "expected_controller": controller_aid,
-                "actual_delegator": delegator,
-                "match": False
-            }
-        
-        # SUCCESS!
-        return True, {
-            "agent_aid": agent_aid,
-            "agent_aid_from_event": icp_event.get('i'),
-            "delegator_aid": delegator,
-            "controller_aid": controller_aid,
-            "match": True,
-            "event_type": event_type,
-            "sequence_number": icp_event.get('s'),
-            "signing_threshold": icp_event.get('kt'),
-            "public_keys_count": len(icp_event.get('k', [])),
-            "has_di_field": True
-        }
-        
-    except Exception as e:
-        logger.error(f"Error parsing agent ICP: {e}", exc_info=True)
-        return False, {"error": f"ICP parsing failed: {str(e)}"}
+    match = AID_QB64_PATTERN.fullmatch(aid)
+    if match:
+        return match.group(match.lastgroup), None
+    
+    code = None
+    for size in (4, 2, 1):
+        if aid[:size] in AID_DERIVATION_CODES:
+            code = aid[:size]
+            break
+    if code is None:
+        return None, f"unknown derivation code '{aid[:4]}'"
+    return None, f"malformed {AID_DERIVATION_CODES[code][0]} prefix"
 
 
-def find_delegation_seal(kel_data: Dict, agent_aid: str, controller_aid: str) -> Tuple[bool, Dict]:
+def aid_format_error(aid: Any, self_addressing: bool = False) -> Optional[str]:
     """
-    Search controller's KEL for delegation seal anchoring the agent
+    Validate an AID before any network work is done
+    
+    Args:
+        aid: candidate AID
+        self_addressing: require a digest-derived prefix, as KERI does
+            for delegated identifiers
     
     Returns:
-        (found: bool, details: Dict)
+        None if acceptable, otherwise the reason for rejecting it
     """
-    try:
-        # Get events from KEL data
-        events = None
-        
-        if isinstance(kel_data, dict):
-            if 'events' in kel_data:
-                events = kel_data['events']
-            elif 'state' in kel_data and isinstance(kel_data['state'], dict):
-                if 'k' in kel_data['state']:
-                    events = kel_data['state']['k']
-            elif 'k' in kel_data:
-                events = kel_data['k']
-        
-        if not events or not isinstance(events, list):
-            return False, {
-                "error": "No events found in controller KEL",
-                "controller_aid": controller_aid
-            }
-        
-        logger.info(f"Searching {len(events)} events in controller KEL for agent seal")
-        
-        # Search through all events for seals
-        for idx, event in enumerate(events):
-            event_type = event.get('t')
-            sequence = event.get('s')
+    if not isinstance(aid, str) or not aid:
+        return "AID must be a non-empty string"
+    if len(aid) > AID_MAX_LENGTH:
+        return "AID too long"
+    
+    code, error = classify_aid(aid)
+    if error:
+        return error
+    
+    name, transferable, digest = AID_DERIVATION_CODES[code]
+    if not transferable:
+        return f"{name} AIDs cannot take part in delegation"
+    if self_addressing and not digest:
+        return f"delegated AIDs must be self-addressing, got {name}"
+    return None
+
+
+def said_format_error(said: Any) -> Optional[str]:
+    """Validate a credential SAID, a digest like a self-addressing AID"""
+    error = aid_format_error(said, self_addressing=True)
+    return f"Invalid OOR credential SAID format: {error}" if error else None
+
+
+def validate_aid_pairs(pairs: Iterable[Tuple[str, str]]) -> List[Optional[str]]:
+    """
+    Validate many (controller, agent) pairs in one pass
+    
+    Repeated AIDs (typically the controller) hit the classify_aid cache.
+    
+    Returns:
+        Per pair, None if both AIDs are acceptable, otherwise the error
+    """
+    errors = []
+    for controller_aid, agent_aid in pairs:
+        error = aid_format_error(controller_aid)
+        if error:
+            errors.append(f"Invalid controller AID format: {error}")
+            continue
+        error = aid_format_error(agent_aid, self_addressing=True)
+        errors.append(f"Invalid agent AID format: {error}" if error else None)
+    return errors
+
+
+def build_delegation_result(
+    controller_aid: str,
+    agent_aid: str,
+    icp_details: Dict,
+    seal_details: Dict,
+    consistency_ok: bool,
+    consistency_checks: List[Dict],
+    signature_details: Optional[Dict] = None,
+    receipt_details: Optional[Dict] = None,
+    replay_details: Optional[Dict] = None,
+    credential_details: Optional[Dict] = None
+) -> Dict[str, Any]:
+    """Detailed success payload shared by the single and batch endpoints"""
+    replay_details = replay_details or {"verified": False, "skipped": "not requested"}
+    credential_details = credential_details or {"verified": False, "skipped": "no oor_credential_said given"}
+    signature_details = signature_details or {"verified": False, "skipped": "not requested"}
+    receipt_details = receipt_details or {"verified": False, "skipped": "not requested"}
+    coverage = 55
+    coverage += 15 if signature_details.get("verified") else 0
+    coverage += 5 if receipt_details.get("verified") else 0
+    # Chain validation (15%) and revocation checking (10%)
+    coverage += 25 if credential_details.get("verified") else 0
+    return {
+        "valid": True,
+        "verified": True,
+        "controller_aid": controller_aid,
+        "agent_aid": agent_aid,
+        "oor_holder_aid": controller_aid,
+        "message": "Agent delegation verified with KEL parsing",
+        "verification": {
+            "format_valid": True,
+            "existence_verified": True,
+            "kel_parsed": True,
+            "delegation_verified": True,
             
-            # Look for seals in 'a' field (anchors/seals)
-            seals = event.get('a', [])
+            # NEW: Detailed verification results
+            "agent_icp_analysis": {
+                "verified": True,
+                "has_delegator_field": icp_details.get('has_di_field'),
+                "delegator_matches": icp_details.get('match'),
+                "delegator_aid": icp_details.get('delegator_aid'),
+                "details": icp_details
+            },
             
-            if seals and isinstance(seals, list):
-                for seal in seals:
-                    if isinstance(seal, dict):
-                        seal_aid = seal.get('i')
-                        
-                        # Check if seal references our agent
-                        if seal_aid == agent_aid:
-                            logger.info(f"✅ Found delegation seal in event {idx}, sequence {sequence}")
-                            return True, {
-                                "found": True,
-                                "controller_aid": controller_aid,
-                                "agent_aid": agent_aid,
-                                "seal_in_event_type": event_type,
-                                "seal_in_sequence": sequence,
-                                "seal_in_event_index": idx,
-                                "seal_agent_sequence": seal.get('s'),
-                                "seal_digest": seal.get('d', '')[:20] + "...",
-                                "total_events_searched": len(events)
-            }
-        
-        # No seal found
-        return False, {
-            "found": False,
-            "controller_aid": controller_aid,
-            "agent_aid": agent_aid,
-            "events_searched": len(events),
-            "error": "No delegation seal found in controller KEL"
+            "delegation_seal_analysis": {
+                "verified": True,
+                "seal_found_in_controller_kel": seal_details.get('found'),
+                "seal_event_type": seal_details.get('seal_in_event_type'),
+                "seal_sequence": seal_details.get('seal_in_sequence'),
+                "details": seal_details
+            },
+            
+            "consistency_checks": {
+                "all_passed": consistency_ok,
+                "checks": consistency_checks
+            },
+            
+            "kel_replay_analysis": replay_details,
+            
+            "signature_analysis": signature_details,
+            
+            "witness_receipt_analysis": receipt_details,
+            
+            "credential_chain_analysis": credential_details,
+            
+            "verification_level": "enhanced_kel_parsing",
+            "coverage_percentage": coverage
         }
-        
-    except Exception as e:
-        logger.error(f"Error searching for delegation seal: {e}", exc_info=True)
-        return False, {"error": f"Seal search failed: {str(e)}"}
+    }
 
 
-def verify_event_consistency(agent_icp_details: Dict, seal_details: Dict) -> Tuple[bool, List[Dict]]:
+def verify_delegation_kels(
+    agent_kel: Dict,
+    controller_kel: Dict,
+    agent_aid: str,
+    controller_aid: str,
+    seal_index: Optional[kel_parsing.SealIndex] = None,
+    timer: Optional[metrics.StageTimer] = None,
+    signature_outcomes: Optional[Dict[Tuple[str, str, str], Dict[str, Any]]] = None,
+    receipt_outcomes: Optional[Dict[Tuple[str, str, str], Dict[str, Any]]] = None,
+    replays: Optional[Dict[str, Dict[str, Any]]] = None,
+    chain: Optional[Dict[str, Any]] = None
+) -> Tuple[bool, Dict[str, Any]]:
     """
-    Verify consistency between agent ICP and controller seal
+    Run STEP 3-8 (ICP parse, seal search, signatures, witness receipts,
+    credential chain, consistency) on fetched KELs
+    
+    Pass the controller entry's seal_index to make the seal search O(1),
+    and the request's timer to accumulate stage durations across pairs.
+    Signatures and receipts are judged from signature_verifier.verify()
+    and receipt_validator.validate() outcomes covering this pair's
+    delegation_signed_events(), and KEL replays from replay_kels()
+    results, so that a batch checks all of them together; None skips
+    the stage. chain is the resolved chain of the controller's OOR
+    credential, if one was named.
     
     Returns:
-        (all_passed: bool, checks: List[Dict])
+        (valid: bool, result: Dict) - the detailed payload on success,
+        otherwise {"stage": ..., "error": ...}
     """
-    checks = []
+    timer = timer or metrics.StageTimer()
+    replay_details = None
+    if replays is not None:
+        with timer.stage("kel_replay"):
+            replay_ok, replay_details = kel_replay.check_kel_replays(replays, (agent_aid, controller_aid))
+        if not replay_ok:
+            return False, {
+                "stage": "kel_replay",
+                "error": f"KEL replay failed: {replay_details['error']}"
+            }
     
-    try:
-        # Check 1: Agent ICP sequence is 0
-        agent_seq = agent_icp_details.get('sequence_number')
-        checks.append({
-            "name": "Agent ICP sequence is 0",
-            "passed": agent_seq == "0" or agent_seq == 0,
-            "value": agent_seq
-        })
-        
-        # Check 2: Seal references agent's inception (sequence 0)
-        seal_agent_seq = seal_details.get('seal_agent_sequence')
-        checks.append({
-            "name": "Seal references agent inception",
-            "passed": seal_agent_seq == "0" or seal_agent_seq == 0,
-            "value": seal_agent_seq
-        })
-        
-        # Check 3: Controller seal is in event after inception
-        seal_controller_seq = seal_details.get('seal_in_sequence')
-        if seal_controller_seq:
-            try:
-                seq_int = int(seal_controller_seq)
-                checks.append({
-                    "name": "Controller seal after inception",
-                    "passed": seq_int >= 1,
-                    "value": seal_controller_seq
-                })
-            except:
-                checks.append({
-                    "name": "Controller seal after inception",
-                    "passed": False,
-                    "value": seal_controller_seq,
-                    "error": "Invalid sequence"
-                })
-        
-        # Check 4: AIDs match
-        agent_from_icp = agent_icp_details.get('agent_aid_from_event')
-        agent_from_seal = seal_details.get('agent_aid')
-        checks.append({
-            "name": "Agent AIDs match across events",
-            "passed": agent_from_icp == agent_from_seal,
-            "icp_aid": agent_from_icp,
-            "seal_aid": agent_from_seal
-        })
-        
-        all_passed = all(check.get('passed', False) for check in checks)
-        
-        return all_passed, checks
-        
-    except Exception as e:
-        logger.error(f"Error in consistency checks: {e}")
-        return False, [{"error": str(e)}]
-
+    with timer.stage("agent_icp"):
+        icp_success, icp_details = kel_parsing.parse_agent_icp(agent_kel, agent_aid, controller_aid)
+    if not icp_success:
+        return False, {
+            "stage": "agent_icp",
+            "error": f"Agent ICP verification failed: {icp_details.get('error')}"
+        }
+    
+    with timer.stage("delegation_seal"):
+        seal_found, seal_details = kel_parsing.find_delegation_seal(
+            controller_kel, agent_aid, controller_aid, seal_index
+        )
+    if not seal_found:
+        return False, {
+            "stage": "delegation_seal",
+            "error": f"Delegation seal verification failed: {seal_details.get('error')}"
+        }
+    
+    signature_details = receipt_details = None
+    if signature_outcomes is not None or receipt_outcomes is not None:
+        signed, unavailable = signatures.delegation_signed_events(
+            agent_kel, controller_kel, seal_details.get('seal_in_event_index')
+        )
+    if signature_outcomes is not None:
+        with timer.stage("signatures"):
+            signature_ok, signature_details = signatures.check_delegation_signatures(signed, signature_outcomes, unavailable)
+        if not signature_ok:
+            return False, {
+                "stage": "signatures",
+                "error": f"Signature verification failed: {signature_details.get('error') or signature_details.get('skipped')}"
+            }
+    if receipt_outcomes is not None:
+        with timer.stage("witness_receipts"):
+            receipt_ok, receipt_details = receipts.check_delegation_receipts(signed, receipt_outcomes, unavailable)
+        if not receipt_ok:
+            return False, {
+                "stage": "witness_receipts",
+                "error": f"Witness receipt validation failed: {receipt_details.get('error') or receipt_details.get('skipped')}"
+            }
+    
+    credential_details = None
+    if chain is not None:
+        with timer.stage("credential_chain"):
+            credential_ok, credential_details = credential_chain.check_credential_chain(chain, controller_aid)
+        if not credential_ok:
+            return False, {
+                "stage": credential_details["stage"],
+                "error": f"Credential chain verification failed: {credential_details['error']}"
+            }
+    
+    with timer.stage("consistency"):
+        consistency_ok, consistency_checks = kel_parsing.verify_event_consistency(icp_details, seal_details)
+    return True, build_delegation_result(
+        controller_aid, agent_aid,
+        icp_details, seal_details,
+        consistency_ok, consistency_checks,
+        signature_details, receipt_details, replay_details, credential_details
+    )
 
-# ============================================================================
-# API ENDPOINTS
-# ============================================================================
 
 @app.get("/health")
 async def health():
     """Health check with KERIA status"""
     keria_status = "unknown"
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(f"{KERIA_URL}/spec.yaml", timeout=5.0)
-            keria_status = "connected" if response.status_code == 200 else "unreachable"
+        response = await keria.get_client().get(f"{keria.KERIA_URL}/spec.yaml", timeout=5.0)
+        keria_status = "connected" if response.status_code == 200 else "unreachable"
     except:
         keria_status = "unreachable"
     
@@ -287,14 +364,50 @@ async def health():
         "service": "agent-delegation-verifier-keri-v2",
         "version": "2.0.0-enhanced",
         "keria_status": keria_status,
-        "keria_url": KERIA_URL,
+        "keria_url": keria.KERIA_URL,
+        "keria_pool": keria.pool_stats(),
+        "kel_cache": caches.kel_cache.stats(),
+        "negative_cache": caches.negative_cache.stats(),
+        "single_flight": caches.kel_flights.stats(),
+        "kel_transfer": {
+            **kel_fetch.kel_transfer_stats,
+            "ranged_supported": kel_fetch.ranged_kel_supported,
+            "ranged_mode": kel_fetch.KERIA_RANGED_KEL
+        },
         "features": [
             "Format validation",
             "KEL existence check",
             "Agent ICP parsing (NEW)",
             "Delegation seal verification (NEW)",
+            "Incremental KEL replay from verified-through checkpoints",
+            "Batched Ed25519 signature verification",
+            "Witness receipt validation against the TOAD",
+            "Credential chain and revocation verification",
             "Event consistency checks (NEW)"
-        ]
+        ],
+        "kel_replay": kel_replay.kel_replayer.stats(),
+        "credential_chains": credential_chain.credential_resolver.stats(),
+        "signatures": signatures.signature_verifier.stats(),
+        "witness_receipts": receipts.receipt_validator.stats()
+    }
+
+
+@app.get("/metrics")
+async def prometheus_metrics():
+    """Prometheus text exposition of stage timings, KERIA latency and caches"""
+    return PlainTextResponse(metrics.registry.render(), media_type="text/plain; version=0.0.4")
+
+
+@app.delete("/admin/cache/kel/{aid}")
+async def purge_kel_cache(aid: str):
+    """Drop one AID from the KEL cache so the next lookup refetches it"""
+    purged = caches.kel_cache.purge(aid)
+    purged = caches.negative_cache.purge(aid) or purged
+    logger.info(f"🧹 KEL cache purge for {aid[:20]}...: {'removed' if purged else 'not cached'}")
+    return {
+        "aid": aid,
+        "purged": purged,
+        "kel_cache": caches.kel_cache.stats()
     }
 
 
@@ -307,26 +420,33 @@ async def verify_delegation(request: Request):
     {
         "aid": "controller_aid",
         "agent_aid": "agent_aid",
-        "verify_kel": true  // optional, default true
+        "verify_kel": true,  // optional, default true
+        "oor_credential_said": "said"  // optional, verifies the controller's credential chain
     }
+    
+    Per-stage durations are returned in the Server-Timing header.
     """
+    timer: metrics.StageTimer = request.state.timer
     try:
         data = await request.json()
         controller_aid = data.get("aid", "")
         agent_aid = data.get("agent_aid", "")
         verify_kel = data.get("verify_kel", True)
+        oor_credential_said = data.get("oor_credential_said")
         
         # ========================================
         # STEP 1: Format Validation (existing)
         # ========================================
         
-        if not controller_aid or not agent_aid:
-            raise HTTPException(400, "Both 'aid' and 'agent_aid' required")
-        
-        if not (controller_aid.startswith('E') and len(controller_aid) == 44):
-            raise HTTPException(400, "Invalid controller AID format")
-        if not (agent_aid.startswith('E') and len(agent_aid) == 44):
-            raise HTTPException(400, "Invalid agent AID format")
+        with timer.stage("format"):
+            if not controller_aid or not agent_aid:
+                format_error = "Both 'aid' and 'agent_aid' required"
+            else:
+                format_error = validate_aid_pairs([(controller_aid, agent_aid)])[0]
+            if not format_error and oor_credential_said is not None:
+                format_error = said_format_error(oor_credential_said)
+        if format_error:
+            raise verification_failure("single", "format", 400, format_error)
         
         logger.info(f"🔍 Verifying: agent={agent_aid[:20]}... controller={controller_aid[:20]}...")
         
@@ -336,19 +456,24 @@ async def verify_delegation(request: Request):
         
         logger.info("📥 Fetching KEL data from KERIA...")
         
-        agent_kel = await query_kel(agent_aid)
-        controller_kel = await query_kel(controller_aid)
-        
-        if not agent_kel:
-            raise HTTPException(404, "Agent AID not found in KEL")
-        if not controller_kel:
-            raise HTTPException(404, "Controller AID not found in KEL")
+        # One deadline for every network-bound stage of the verification
+        expires = asyncio.get_running_loop().time() + kel_fetch.VERIFY_DEADLINE
+        try:
+            with timer.stage("kel_existence"):
+                agent_entry, controller_entry = await kel_fetch.query_kels(agent_aid, controller_aid, kel_fetch.time_left(expires))
+        except kel_fetch.KelNotFoundError as e:
+            raise verification_failure("single", "kel_not_found", 404, f"{e.role} AID not found in KEL")
+        except asyncio.TimeoutError:
+            raise verification_failure(
+                "single", "deadline", 504, f"KERIA lookups exceeded {kel_fetch.VERIFY_DEADLINE}s deadline"
+            )
         
         logger.info("✅ Both AIDs exist in KERIA")
         
         # If skip KEL parsing, return basic verification
         if not verify_kel:
             logger.info("⏭️  KEL parsing skipped (verify_kel=false)")
+            metrics.verification_outcomes.inc(endpoint="single", outcome="verified", reason="existence_only")
             return {
                 "valid": True,
                 "verified": True,
@@ -368,13 +493,49 @@ async def verify_delegation(request: Request):
         # STEP 3: Parse Agent ICP Event (NEW!)
         # ========================================
         
+        if agent_entry.streamed or controller_entry.streamed:
+            logger.info("🌊 Streaming oversized KEL(s) from KERIA...")
+        try:
+            with timer.stage("kel_stream"):
+                agent_kel, seal_index = await asyncio.wait_for(
+                    asyncio.gather(
+                        kel_fetch.agent_kel_data(agent_entry),
+                        kel_fetch.controller_seal_index(controller_entry, [agent_aid])
+                    ),
+                    kel_fetch.time_left(expires)
+                )
+        except asyncio.TimeoutError:
+            raise verification_failure(
+                "single", "deadline", 504, f"KEL streaming exceeded {kel_fetch.VERIFY_DEADLINE}s deadline"
+            )
+        controller_kel = controller_entry.kel_data
+        
+        with timer.stage("kel_replay"):
+            replays = await kel_replay.replay_kels([agent_entry, controller_entry])
+            replay_ok, replay_details = kel_replay.check_kel_replays(replays, (agent_aid, controller_aid))
+        
+        if not replay_ok:
+            logger.error(f"❌ KEL replay failed: {replay_details['error']}")
+            raise verification_failure(
+                "single", "kel_replay", 400, f"KEL replay failed: {replay_details['error']}"
+            )
+        
+        for aid, replay in replays.items():
+            logger.info(
+                f"✅ KEL of {aid[:20]}... verified through sn {replay['verified_through_sn']} "
+                f"({replay['mode']} replay of {replay['events_replayed']} events)"
+            )
+        
         logger.info("🔎 Parsing agent's ICP event...")
         
-        icp_success, icp_details = parse_agent_icp(agent_kel, agent_aid, controller_aid)
+        with timer.stage("agent_icp"):
+            icp_success, icp_details = kel_parsing.parse_agent_icp(agent_kel, agent_aid, controller_aid)
         
         if not icp_success:
             logger.error(f"❌ Agent ICP verification failed: {icp_details.get('error')}")
-            raise HTTPException(400, f"Agent ICP verification failed: {icp_details.get('error')}")
+            raise verification_failure(
+                "single", "agent_icp", 400, f"Agent ICP verification failed: {icp_details.get('error')}"
+            )
         
         logger.info(f"✅ Agent ICP verified: delegated from {icp_details['delegator_aid'][:20]}...")
         
@@ -384,21 +545,102 @@ async def verify_delegation(request: Request):
         
         logger.info("🔍 Searching for delegation seal in controller KEL...")
         
-        seal_found, seal_details = find_delegation_seal(controller_kel, agent_aid, controller_aid)
+        with timer.stage("delegation_seal"):
+            seal_found, seal_details = kel_parsing.find_delegation_seal(
+                controller_kel, agent_aid, controller_aid, seal_index
+            )
         
         if not seal_found:
             logger.error(f"❌ Delegation seal not found: {seal_details.get('error')}")
-            raise HTTPException(400, f"Delegation seal verification failed: {seal_details.get('error')}")
+            raise verification_failure(
+                "single", "delegation_seal", 400,
+                f"Delegation seal verification failed: {seal_details.get('error')}"
+            )
         
         logger.info(f"✅ Delegation seal found in controller event {seal_details['seal_in_sequence']}")
         
         # ========================================
-        # STEP 5: Verify Consistency (NEW!)
+        # STEP 5: Verify Signatures
+        # ========================================
+        
+        logger.info("🔏 Verifying signatures of the delegation events...")
+        
+        signed, unavailable = signatures.delegation_signed_events(
+            agent_kel, controller_kel, seal_details.get('seal_in_event_index')
+        )
+        with timer.stage("signatures"):
+            signature_ok, signature_details = await signatures.verify_delegation_signatures(signed, unavailable)
+        
+        if not signature_ok:
+            logger.error(f"❌ Signature verification failed: {signature_details.get('error') or signature_details.get('skipped')}")
+            raise verification_failure(
+                "single", "signatures", 400,
+                f"Signature verification failed: {signature_details.get('error') or signature_details.get('skipped')}"
+            )
+        
+        if signature_details.get("verified"):
+            logger.info(f"✅ Signatures verified on {signature_details['events_checked']} events")
+        else:
+            logger.info(f"⏭️  Signatures not verified: {signature_details.get('skipped')}")
+        
+        # ========================================
+        # STEP 6: Validate Witness Receipts
+        # ========================================
+        
+        logger.info("🧾 Validating witness receipts of the delegation events...")
+        
+        try:
+            with timer.stage("witness_receipts"):
+                receipt_ok, receipt_details = await asyncio.wait_for(
+                    receipts.verify_delegation_receipts(signed, unavailable), kel_fetch.time_left(expires)
+                )
+        except asyncio.TimeoutError:
+            raise verification_failure(
+                "single", "deadline", 504, f"Witness receipt queries exceeded {kel_fetch.VERIFY_DEADLINE}s deadline"
+            )
+        
+        if not receipt_ok:
+            logger.error(f"❌ Witness receipt validation failed: {receipt_details.get('error') or receipt_details.get('skipped')}")
+            raise verification_failure(
+                "single", "witness_receipts", 400,
+                f"Witness receipt validation failed: {receipt_details.get('error') or receipt_details.get('skipped')}"
+            )
+        
+        if receipt_details.get("verified"):
+            logger.info(f"✅ Witness receipts meet the TOAD on {receipt_details['events_checked']} events")
+        else:
+            logger.info(f"⏭️  Witness receipts not validated: {receipt_details.get('skipped')}")
+        
+        # ========================================
+        # STEP 7: Verify Credential Chain
+        # ========================================
+        
+        credential_details = None
+        if oor_credential_said:
+            logger.info(f"🪪 Verifying credential chain of {oor_credential_said[:20]}...")
+            
+            with timer.stage("credential_chain"):
+                chains = await credential_chain.verify_credential_chains([oor_credential_said], kel_fetch.time_left(expires))
+                credential_ok, credential_details = credential_chain.check_credential_chain(chains[oor_credential_said], controller_aid)
+            
+            if not credential_ok:
+                logger.error(f"❌ Credential chain verification failed: {credential_details['error']}")
+                stage = credential_details["stage"]
+                raise verification_failure(
+                    "single", stage, 504 if stage == "deadline" else 400,
+                    f"Credential chain verification failed: {credential_details['error']}"
+                )
+            
+            logger.info(f"✅ Credential chain verified: {' → '.join(hop['role'] for hop in credential_details['chain'])}")
+        
+        # ========================================
+        # STEP 8: Verify Consistency (NEW!)
         # ========================================
         
         logger.info("🔍 Verifying event consistency...")
         
-        consistency_ok, consistency_checks = verify_event_consistency(icp_details, seal_details)
+        with timer.stage("consistency"):
+            consistency_ok, consistency_checks = kel_parsing.verify_event_consistency(icp_details, seal_details)
         
         if not consistency_ok:
             logger.warning("⚠️  Some consistency checks failed")
@@ -410,65 +652,474 @@ async def verify_delegation(request: Request):
         # ========================================
         
         logger.info("🎉 VERIFICATION SUCCESSFUL!")
+        metrics.verification_outcomes.inc(endpoint="single", outcome="verified", reason="ok")
         
+        return build_delegation_result(
+            controller_aid, agent_aid,
+            icp_details, seal_details,
+            consistency_ok, consistency_checks,
+            signature_details, receipt_details, replay_details, credential_details
+        )
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"❌ Verification error: {e}", exc_info=True)
+        raise verification_failure("single", "internal_error", 500, f"Verification failed: {str(e)}")
+
+
+async def fetch_batch_kels(
+    agent_aids: List[str],
+    controller_aids: List[str],
+    deadline: float = BATCH_DEADLINE
+) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """
+    Fetch every distinct KEL of a batch once, with bounded concurrency
+    
+    Returns:
+        (agent_kels, controller_kels) mapping AID to KelCacheEntry, None
+        when KERIA does not know the AID, or an error string when the
+        lookup failed or missed the deadline
+    """
+    semaphore = asyncio.Semaphore(BATCH_CONCURRENCY)
+    
+    async def bounded(aid: str, icp_only: bool):
+        async with semaphore:
+            return await kel_fetch.get_kel(aid, icp_only=icp_only)
+    
+    tasks = {}
+    for aid in agent_aids:
+        tasks[asyncio.create_task(bounded(aid, True))] = ("agent", aid)
+    for aid in controller_aids:
+        tasks[asyncio.create_task(bounded(aid, False))] = ("controller", aid)
+    
+    results = {"agent": {}, "controller": {}}
+    if not tasks:
+        return results["agent"], results["controller"]
+    
+    done, pending = await asyncio.wait(tasks, timeout=deadline)
+    for task in pending:
+        task.cancel()
+        role, aid = tasks[task]
+        results[role][aid] = f"KERIA lookup exceeded {BATCH_DEADLINE}s batch deadline"
+    for task in done:
+        role, aid = tasks[task]
+        if task.exception() is not None:
+            results[role][aid] = f"KERIA lookup failed: {task.exception()}"
+        else:
+            results[role][aid] = task.result()
+    
+    return results["agent"], results["controller"]
+
+
+async def prepare_batch_kels(
+    pairs: List[Tuple[int, str, str]],
+    agent_kels: Dict[str, Any],
+    controller_kels: Dict[str, Any],
+    deadline: float = BATCH_DEADLINE
+) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """
+    Resolve agent KEL data and controller seal indexes for a batch
+    
+    Cached KELs are used as they are; streamed ones are read once per
+    AID, with each controller stream looking for all of its agents.
+    
+    Returns:
+        (agent_data, seal_indexes) keyed by AID; values are an error
+        string when streaming failed or missed the deadline
+    """
+    semaphore = asyncio.Semaphore(BATCH_CONCURRENCY)
+    wanted: Dict[str, Set[str]] = {}
+    for _, controller_aid, agent_aid in pairs:
+        wanted.setdefault(controller_aid, set()).add(agent_aid)
+    
+    async def bounded(coro):
+        async with semaphore:
+            return await coro
+    
+    tasks = {}
+    for aid, entry in agent_kels.items():
+        if isinstance(entry, caches.KelCacheEntry):
+            tasks[asyncio.create_task(bounded(kel_fetch.agent_kel_data(entry)))] = ("agent", aid)
+    for aid, entry in controller_kels.items():
+        if isinstance(entry, caches.KelCacheEntry):
+            tasks[asyncio.create_task(bounded(kel_fetch.controller_seal_index(entry, wanted[aid])))] = ("controller", aid)
+    
+    results = {"agent": {}, "controller": {}}
+    if not tasks:
+        return results["agent"], results["controller"]
+    
+    done, pending = await asyncio.wait(tasks, timeout=deadline)
+    for task in pending:
+        task.cancel()
+        role, aid = tasks[task]
+        results[role][aid] = f"KEL streaming exceeded {BATCH_DEADLINE}s batch deadline"
+    for task in done:
+        role, aid = tasks[task]
+        if task.exception() is not None:
+            results[role][aid] = f"KEL streaming failed: {task.exception()}"
+        else:
+            results[role][aid] = task.result()
+    return results["agent"], results["controller"]
+
+
+def batch_signed_events(
+    pairs: List[Tuple[int, str, str]],
+    controller_kels: Dict[str, Any],
+    agent_data: Dict[str, Any],
+    seal_indexes: Dict[str, Any]
+) -> List[signatures.SignedEvent]:
+    """
+    The delegation events of every pair in a batch whose KELs are at
+    hand, deduplicated by digest (agents of one controller share its
+    establishment events)
+    """
+    signed: Dict[str, signatures.SignedEvent] = {}
+    for _, controller_aid, agent_aid in pairs:
+        agent_kel = agent_data.get(agent_aid)
+        seal_index = seal_indexes.get(controller_aid)
+        controller_entry = controller_kels.get(controller_aid)
+        if not isinstance(agent_kel, dict) or not isinstance(seal_index, kel_parsing.SealIndex):
+            continue
+        seal = seal_index.lookup(agent_aid)
+        if seal is None:
+            continue
+        events, _ = signatures.delegation_signed_events(agent_kel, controller_entry.kel_data, seal['event_index'])
+        for event in events:
+            signed.setdefault(event.digest, event)
+    return list(signed.values())
+
+
+async def verify_batch_signatures(signed: List[signatures.SignedEvent]) -> Optional[Dict[Tuple[str, str, str], Dict[str, Any]]]:
+    """
+    Check the signatures of every delegation in a batch in a single
+    signature_verifier call
+    
+    Returns:
+        outcomes for verify_delegation_kels, None when SIG_VERIFY_MODE
+        is 'off'
+    """
+    if signatures.SIG_VERIFY_MODE == 'off':
+        return None
+    return await signatures.signature_verifier.verify(signed) if signed else {}
+
+
+async def verify_batch_receipts(
+    signed: List[signatures.SignedEvent],
+    deadline: float = BATCH_DEADLINE
+) -> Optional[Dict[Tuple[str, str, str], Dict[str, Any]]]:
+    """
+    Validate the witness receipts of every delegation in a batch, all
+    events concurrently
+    
+    Returns:
+        outcomes for verify_delegation_kels, None when
+        RECEIPT_VERIFY_MODE is 'off'; events still waiting on witnesses
+        at the deadline fail
+    """
+    if receipts.RECEIPT_VERIFY_MODE == 'off':
+        return None
+    if not signed:
+        return {}
+    try:
+        return await asyncio.wait_for(receipts.receipt_validator.validate(signed), deadline)
+    except asyncio.TimeoutError:
+        error = {"verified": False, "cached": False, "error": f"witness receipt queries exceeded {BATCH_DEADLINE}s batch deadline"}
+        return {event.key: error for event in signed}
+
+
+@app.post("/verify/agent-delegations")
+async def verify_delegations(request: Request):
+    """
+    Batch agent delegation verification
+    
+    Every distinct controller (and agent) KEL is fetched once, so all
+    agents of one OOR holder share a single controller lookup.
+    Failures are reported per pair and do not fail the batch.
+    
+    Request body:
+    {
+        "pairs": [
+            {"aid": "controller_aid", "agent_aid": "agent_aid", "oor_credential_said": "said"},
+            ["controller_aid", "agent_aid"]
+        ],
+        "verify_kel": true  // optional, default true
+    }
+    
+    Stage durations summed over the batch are returned in the
+    Server-Timing header.
+    """
+    timer: metrics.StageTimer = request.state.timer
+    try:
+        data = await request.json()
+        pairs = data.get("pairs")
+        verify_kel = data.get("verify_kel", True)
+        
+        if not isinstance(pairs, list) or not pairs:
+            raise HTTPException(400, "'pairs' must be a non-empty list")
+        if len(pairs) > BATCH_MAX_PAIRS:
+            raise HTTPException(400, f"Too many pairs ({len(pairs)}), maximum is {BATCH_MAX_PAIRS}")
+        
+        # Normalise pairs and validate formats up front
+        requested: List[Tuple[str, str]] = []
+        # Pair index -> OOR credential whose chain to verify
+        credential_saids: Dict[int, str] = {}
+        with timer.stage("format"):
+            for pair in pairs:
+                if isinstance(pair, dict):
+                    requested.append((pair.get("aid", ""), pair.get("agent_aid", "")))
+                    if pair.get("oor_credential_said"):
+                        credential_saids[len(requested) - 1] = pair["oor_credential_said"]
+                elif isinstance(pair, (list, tuple)) and len(pair) == 2:
+                    requested.append((pair[0], pair[1]))
+                else:
+                    requested.append(("", ""))
+            format_errors = validate_aid_pairs(requested)
+            for index, said in credential_saids.items():
+                format_errors[index] = format_errors[index] or said_format_error(said)
+        
+        results: List[Optional[Dict]] = [None] * len(pairs)
+        normalised: List[Tuple[int, str, str]] = []
+        for index, (controller_aid, agent_aid) in enumerate(requested):
+            error = format_errors[index]
+            if not controller_aid or not agent_aid:
+                error = "Both 'aid' and 'agent_aid' required"
+            
+            if error:
+                results[index] = {
+                    "index": index,
+                    "valid": False,
+                    "controller_aid": controller_aid,
+                    "agent_aid": agent_aid,
+                    "stage": "format",
+                    "error": error
+                }
+            else:
+                normalised.append((index, controller_aid, agent_aid))
+        
+        controller_aids = list(dict.fromkeys(c for _, c, _ in normalised))
+        agent_aids = list(dict.fromkeys(a for _, _, a in normalised))
+        
+        logger.info(
+            f"📦 Batch verification: {len(pairs)} pairs, "
+            f"{len(controller_aids)} distinct controllers, {len(agent_aids)} distinct agents"
+        )
+        
+        # One deadline for every network-bound stage of the batch
+        expires = asyncio.get_running_loop().time() + BATCH_DEADLINE
+        with timer.stage("kel_existence"):
+            agent_kels, controller_kels = await fetch_batch_kels(agent_aids, controller_aids, kel_fetch.time_left(expires))
+        if verify_kel:
+            with timer.stage("kel_stream"):
+                agent_data, seal_indexes = await prepare_batch_kels(
+                    normalised, agent_kels, controller_kels, kel_fetch.time_left(expires)
+                )
+            with timer.stage("kel_replay"):
+                replays = await kel_replay.replay_kels([*agent_kels.values(), *controller_kels.values()])
+            signed = batch_signed_events(normalised, controller_kels, agent_data, seal_indexes)
+            with timer.stage("signatures"):
+                signature_outcomes = await verify_batch_signatures(signed)
+            with timer.stage("witness_receipts"):
+                receipt_outcomes = await verify_batch_receipts(signed, kel_fetch.time_left(expires))
+            with timer.stage("credential_chain"):
+                chains = await credential_chain.verify_credential_chains(
+                    (credential_saids[index] for index, _, _ in normalised if index in credential_saids),
+                    kel_fetch.time_left(expires)
+                )
+        
+        # Outcome counter reasons that are finer than the reported stage
+        failure_reasons: Dict[int, str] = {}
+        for index, controller_aid, agent_aid in normalised:
+            result = {
+                "index": index,
+                "valid": False,
+                "controller_aid": controller_aid,
+                "agent_aid": agent_aid
+            }
+            results[index] = result
+            
+            agent_entry = agent_kels.get(agent_aid)
+            controller_entry = controller_kels.get(controller_aid)
+            for role, entry in (("Agent", agent_entry), ("Controller", controller_entry)):
+                if isinstance(entry, str):
+                    result.update({"stage": "kel_existence", "error": entry})
+                    failure_reasons[index] = "deadline" if "deadline" in entry else "keria_error"
+                    break
+                if entry is None:
+                    result.update({"stage": "kel_existence", "error": f"{role} AID not found in KEL"})
+                    failure_reasons[index] = "kel_not_found"
+                    break
+            if "error" in result:
+                continue
+            
+            if not verify_kel:
+                result.update({
+                    "valid": True,
+                    "message": "Format and existence verified (KEL parsing skipped)"
+                })
+                continue
+            
+            agent_kel = agent_data[agent_aid]
+            seal_index = seal_indexes[controller_aid]
+            if isinstance(agent_kel, str) or isinstance(seal_index, str):
+                result.update({
+                    "stage": "kel_streaming",
+                    "error": agent_kel if isinstance(agent_kel, str) else seal_index
+                })
+                continue
+            
+            valid, details = verify_delegation_kels(
+                agent_kel, controller_entry.kel_data,
+                agent_aid, controller_aid,
+                seal_index, timer,
+                signature_outcomes, receipt_outcomes, replays,
+                chains[credential_saids[index]] if index in credential_saids else None
+            )
+            if valid:
+                result.update({
+                    "valid": True,
+                    "message": details["message"],
+                    "verification": details["verification"]
+                })
+            else:
+                result.update(details)
+        
+        for result in results:
+            if result["valid"]:
+                metrics.verification_outcomes.inc(endpoint="batch", outcome="verified", reason="ok")
+            else:
+                reason = failure_reasons.get(result["index"], result["stage"])
+                metrics.verification_outcomes.inc(endpoint="batch", outcome="failed", reason=reason)
+        
+        verified = sum(1 for r in results if r["valid"])
+        logger.info(f"📦 Batch complete: {verified}/{len(results)} verified")
+        
+        return {
+            "total": len(results),
+            "verified": verified,
+            "failed": len(results) - verified,
+            "controllers_fetched": len(controller_aids),
+            "agents_fetched": len(agent_aids),
+            "results": results
+        }
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"❌ Batch verification error: {e}", exc_info=True)
+        raise HTTPException(500, f"Batch verification failed: {str(e)}")
+
+
+@app.post("/verify/credential-chain")
+async def verify_credential_chain(request: Request):
+    """
+    Credential chain and revocation verification
+    
+    Resolves OOR -> OOR Auth -> LE -> QVI -> GEDA from KERIA, checking
+    every credential's schema, TEL state and edges, within
+    VERIFY_DEADLINE.
+    
+    Request body:
+    {
+        "said": "oor_credential_said",
+        "aid": "oor_holder_aid"  // optional, must be the OOR credential's issuee
+    }
+    """
+    timer: metrics.StageTimer = request.state.timer
+    try:
+        data = await request.json()
+        said = data.get("said", "")
+        holder_aid = data.get("aid")
+        
+        with timer.stage("format"):
+            format_error = said_format_error(said)
+            if not format_error and holder_aid is not None:
+                error = aid_format_error(holder_aid)
+                format_error = f"Invalid OOR holder AID format: {error}" if error else None
+        if format_error:
+            raise verification_failure("chain", "format", 400, format_error)
+        
+        logger.info(f"🪪 Verifying credential chain of {said[:20]}...")
+        
+        with timer.stage("credential_chain"):
+            chains = await credential_chain.verify_credential_chains([said], kel_fetch.VERIFY_DEADLINE)
+            chain_ok, details = credential_chain.check_credential_chain(chains[said], holder_aid)
+        
+        if not chain_ok:
+            logger.error(f"❌ Credential chain verification failed: {details['error']}")
+            stage = details["stage"]
+            raise verification_failure(
+                "chain", stage, 504 if stage == "deadline" else 400,
+                f"Credential chain verification failed: {details['error']}"
+            )
+        
+        logger.info(f"✅ Credential chain verified: {' → '.join(hop['role'] for hop in details['chain'])}")
+        metrics.verification_outcomes.inc(endpoint="chain", outcome="verified", reason="ok")
         return {
             "valid": True,
             "verified": True,
-            "controller_aid": controller_aid,
-            "agent_aid": agent_aid,
-            "oor_holder_aid": controller_aid,
-            "message": "Agent delegation verified with KEL parsing",
+            "said": said,
+            "oor_holder_aid": details["chain"][0]["issuee"],
+            "message": "Credential chain verified",
             "verification": {
-                "format_valid": True,
-                "existence_verified": True,
-                "kel_parsed": True,
-                "delegation_verified": True,
-                
-                # NEW: Detailed verification results
-                "agent_icp_analysis": {
-                    "verified": icp_success,
-                    "has_delegator_field": icp_details.get('has_di_field'),
-                    "delegator_matches": icp_details.get('match'),
-                    "delegator_aid": icp_details.get('delegator_aid'),
-                    "details": icp_details
-                },
-                
-                "delegation_seal_analysis": {
-                    "verified": seal_found,
-                    "seal_found_in_controller_kel": seal_details.get('found'),
-                    "seal_event_type": seal_details.get('seal_in_event_type'),
-                    "seal_sequence": seal_details.get('seal_in_sequence'),
-                    "details": seal_details
-                },
-                
-                "consistency_checks": {
-                    "all_passed": consistency_ok,
-                    "checks": consistency_checks
-                },
-                
-                "verification_level": "enhanced_kel_parsing",
-                "coverage_percentage": 55
+                "credential_chain_analysis": details
             }
         }
-        
+    
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"❌ Verification error: {e}", exc_info=True)
-        raise HTTPException(500, f"Verification failed: {str(e)}")
+        logger.error(f"❌ Credential chain verification error: {e}", exc_info=True)
+        raise verification_failure("chain", "internal_error", 500, f"Verification failed: {str(e)}")
+
+
+def unenforced_checks() -> List[Tuple[int, str]]:
+    """
+    Checks the current settings and installed packages let pass unchecked
+    
+    In 'auto' mode events KERIA serves without signatures or receipts are
+    skipped rather than failed, which is what KERIA's /identifiers
+    responses carry; only 'required' enforces the stage.
+    
+    Returns:
+        (coverage points, description) of each gap
+    """
+    gaps = []
+    if signatures.SIG_VERIFY_MODE != 'required':
+        gaps.append((15, f"Signature verification is not enforced (SIG_VERIFY_MODE={signatures.SIG_VERIFY_MODE}): "
+                         "events without attached signatures pass unchecked"))
+    elif signatures.ED25519_BACKEND is None:
+        gaps.append((15, "Signature verification fails every event: no Ed25519 implementation "
+                         "installed (pysodium or cryptography)"))
+    if receipts.RECEIPT_VERIFY_MODE != 'required':
+        gaps.append((5, f"Witness receipt validation is not enforced (RECEIPT_VERIFY_MODE={receipts.RECEIPT_VERIFY_MODE}): "
+                        "events whose receipts cannot be obtained pass unchecked"))
+    if keri_rules.blake3 is None:
+        gaps.append((0, "Blake3-256 ('E') event SAIDs cannot be recomputed: blake3 is not installed"))
+    if credential_chain.jsonschema is None:
+        gaps.append((0, "Credentials are not validated against their schemas: jsonschema is not installed"))
+    if not credential_chain.GEDA_AID:
+        gaps.append((0, "GEDA_AID is not set: every credential chain fails as unrooted"))
+    return gaps
 
 
 @app.get("/")
 async def root():
     """Service information"""
+    gaps = unenforced_checks()
+    missing = sum(points for points, _ in gaps)
     return {
         "service": "vLEI Agent Verifier with Enhanced KEL Parsing",
         "version": "2.0.0",
-        "verification_coverage": "55%",
+        "verification_coverage": f"{100 - missing}% with oor_credential_said, else {75 - missing}%",
         "improvements_over_v1": [
             "Real KEL event parsing",
             "Agent ICP delegation field verification",
             "Controller KEL seal search and verification",
+            "Incremental KEL replay from verified-through checkpoints",
+            "Batched Ed25519 signature verification",
+            "Witness receipt validation against the TOAD",
+            "Credential chain resolution with parallel hop lookups",
             "Event sequence consistency checks",
             "Detailed verification reporting"
         ],
@@ -477,27 +1128,35 @@ async def root():
             "✅ KEL existence (10%)",
             "✅ Agent ICP has 'di' field = controller (15%)",
             "✅ Controller KEL contains delegation seal (15%)",
-            "✅ Event consistency checks (10%)"
-        ],
-        "still_missing": [
-            "❌ Cryptographic signature verification (15%)",
-            "❌ Credential chain validation (15%)",
-            "❌ Revocation checking (10%)",
-            "❌ Witness receipt validation (5%)"
+            "✅ Event consistency checks (10%)",
+            "✅ Cryptographic signature verification (15%)",
+            "✅ Witness receipt validation (5%)",
+            "✅ Credential chain validation (15%, with oor_credential_said)",
+            "✅ Revocation checking (10%, with oor_credential_said)"
         ],
-        "keria_url": KERIA_URL
+        "still_missing": [gap for _, gap in gaps],
+        "keria_url": keria.KERIA_URL
     }
 
 
 if __name__ == "__main__":
     logger.info("=" * 70)
     logger.info("Starting ENHANCED KERI Verification Service v2.0")
-    logger.info(f"KERIA URL: {KERIA_URL}")
+    logger.info(f"KERIA URL: {keria.KERIA_URL}")
     logger.info("New features:")
     logger.info("  • Real KEL event parsing")
     logger.info("  • Agent ICP delegation verification")
     logger.info("  • Controller seal search")
+    logger.info(f"  • Incremental KEL replay ({'checkpoints in ' + kel_replay.KEL_CHECKPOINT_DB if kel_replay.KEL_REPLAY else 'disabled'})")
+    logger.info(f"  • Signature verification ({signatures.ED25519_BACKEND or 'no Ed25519 backend'}, mode={signatures.SIG_VERIFY_MODE})")
+    logger.info(f"  • Witness receipt validation ({len(receipts.receipt_validator.urls)} witness URLs, mode={receipts.RECEIPT_VERIFY_MODE})")
+    if credential_chain.GEDA_AID:
+        logger.info(f"  • Credential chain verification (GEDA root {credential_chain.GEDA_AID[:20]}...)")
+    else:
+        logger.warning("  ⚠️  GEDA_AID is not set: every credential chain will fail as unrooted")
     logger.info("  • Event consistency checks")
+    for _, gap in unenforced_checks():
+        logger.warning(f"  ⚠️  {gap}")
     logger.info("=" * 70)
     
     uvicorn.run(app, host="0.0.0.0", port=9723, log_level="info")
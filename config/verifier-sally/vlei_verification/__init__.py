@@ -0,0 +1,10 @@
+"""
+vLEI Agent Delegation Verification
+
+Modules of the KERIA-backed verification service
+(verification_service_keri_v2), and the KERI and vLEI rules it shares
+with Sally's agent verifier (custom_sally).
+"""
+
+__version__ = "2.0.0"
+__all__ = ["caches", "credential_chain", "kel_fetch", "kel_parsing", "kel_replay", "keri_rules", "keria", "metrics", "receipts", "signatures", "vlei_rules"]
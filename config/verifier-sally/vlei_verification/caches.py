@@ -0,0 +1,348 @@
+"""
+KEL Caches
+
+Parsed KELs by AID (KelCache, bounded by entries and bytes and
+revalidated against key state after KEL_CACHE_TTL), AIDs KERIA reported
+as unknown (NegativeCache), and SingleFlight, which lets concurrent
+lookups of one AID share a single KERIA round trip.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field, replace
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from vlei_verification import kel_parsing, metrics
+
+logger = logging.getLogger(__name__)
+
+# KEL cache bounds; entries older than the TTL are revalidated against key state
+KEL_CACHE_MAX_ENTRIES = int(os.getenv('KEL_CACHE_MAX_ENTRIES', '1024'))
+KEL_CACHE_MAX_BYTES = int(os.getenv('KEL_CACHE_MAX_BYTES', str(64 * 1024 * 1024)))
+KEL_CACHE_TTL = float(os.getenv('KEL_CACHE_TTL', '30.0'))
+
+# AIDs KERIA reported as unknown are answered locally for this long
+NEGATIVE_CACHE_TTL = float(os.getenv('NEGATIVE_CACHE_TTL', '30.0'))
+NEGATIVE_CACHE_MAX_ENTRIES = int(os.getenv('NEGATIVE_CACHE_MAX_ENTRIES', '10000'))
+
+
+@dataclass
+class KelCacheEntry:
+    """Parsed KEL for one AID plus what is needed to revalidate it"""
+    aid: str
+    kel_data: Dict
+    events: List[Dict]
+    sn: int
+    digest: str
+    size: int
+    checked_at: float = field(default_factory=time.monotonic)
+    streamed: bool = False
+    complete: bool = True
+    _seal_index: Optional[kel_parsing.SealIndex] = field(default=None, repr=False)
+    
+    @property
+    def seal_index(self) -> kel_parsing.SealIndex:
+        """Seal index for this KEL, built on first use and kept up to date"""
+        if self._seal_index is None:
+            self._seal_index = kel_parsing.SealIndex()
+        if self._seal_index.indexed_events < len(self.events):
+            self._seal_index.extend(self.events)
+        return self._seal_index
+    
+    def inherit_seal_index(self, previous: "KelCacheEntry"):
+        """
+        Reuse a previous entry's index when this KEL only appends to it
+        
+        The old KEL is a prefix of the new one when the new KEL still has
+        the old latest event (same digest) at the old position.
+        """
+        if previous._seal_index is None or previous.digest == '':
+            return
+        count = len(previous.events)
+        if (len(self.events) >= count and
+                isinstance(self.events[count - 1], dict) and
+                self.events[count - 1].get('d') == previous.digest):
+            self._seal_index = previous._seal_index
+    
+    @classmethod
+    def from_kel(cls, aid: str, kel_data: Dict, size: int) -> "KelCacheEntry":
+        events = kel_parsing.extract_events(kel_data)
+        if not isinstance(events, list):
+            events = []
+        
+        sn, digest = -1, ''
+        if events and isinstance(events[-1], dict):
+            try:
+                sn = kel_parsing.parse_sn(events[-1].get('s', -1))
+            except ValueError:
+                sn = -1
+            digest = events[-1].get('d', '')
+        
+        return cls(aid=aid, kel_data=kel_data, events=events, sn=sn, digest=digest, size=size)
+    
+    @classmethod
+    def inception_only(cls, aid: str, icp: Dict, size: int) -> "KelCacheEntry":
+        """Entry holding just event 0, enough for agent ICP checks"""
+        entry = cls.from_kel(aid, {"events": [icp]}, size)
+        entry.complete = False
+        return entry
+    
+    def extended(self, events: List[Dict], size: int) -> Optional["KelCacheEntry"]:
+        """
+        New entry with events appended after this one's latest event
+        
+        Returns None unless the first new event chains onto ours (next sn,
+        prior digest 'p' equal to our digest), i.e. KERIA's KEL still
+        starts with what we have cached.
+        """
+        if not events:
+            return None
+        first = events[0]
+        try:
+            chained = (isinstance(first, dict) and
+                       kel_parsing.parse_sn(first.get('s', -1)) == self.sn + 1 and
+                       first.get('p') == self.digest)
+        except ValueError:
+            chained = False
+        if not chained:
+            return None
+        
+        kel_data = dict(self.kel_data)
+        kel_data['events'] = self.events + events
+        entry = KelCacheEntry.from_kel(self.aid, kel_data, self.size + size)
+        entry.complete = self.complete
+        entry.inherit_seal_index(self)
+        return entry
+    
+    def refreshed(self) -> "KelCacheEntry":
+        """
+        Copy of this entry, confirmed current by KERIA just now
+        
+        Cached entries are shared with verifications still reading them,
+        so a refresh swaps in a new entry instead of updating this one.
+        """
+        return replace(self, checked_at=time.monotonic(), complete=True)
+    
+    @classmethod
+    def streaming(cls, aid: str) -> "KelCacheEntry":
+        """Placeholder recording that this KEL is too large to hold and must be streamed"""
+        return cls(aid=aid, kel_data={}, events=[], sn=-1, digest='', size=0, streamed=True)
+
+
+class KelCache:
+    """
+    In-process LRU + TTL cache of KELs keyed by AID
+    
+    Bounded both by entry count and by the total size of the cached
+    KERIA responses. Expired entries are not dropped; they are
+    revalidated with a key-state (sn + digest) check and only refetched
+    when the KEL has actually advanced.
+    
+    Lookups count as hits (fresh entry), refreshes (stale entry
+    revalidated or extended, which still costs KERIA round trips) or
+    misses (refetched).
+    """
+    
+    def __init__(self, max_entries: int, max_bytes: int, ttl: float):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.entries: "OrderedDict[str, KelCacheEntry]" = OrderedDict()
+        self.total_bytes = 0
+        self.hits = 0
+        self.refreshes = 0
+        self.misses = 0
+        self.evictions = 0
+        self.revalidations = 0
+        self.refetches = 0
+        self.incremental_updates = 0
+    
+    def get(self, aid: str) -> Optional[KelCacheEntry]:
+        entry = self.entries.get(aid)
+        if entry is not None:
+            self.entries.move_to_end(aid)
+        return entry
+    
+    def is_fresh(self, entry: KelCacheEntry) -> bool:
+        return time.monotonic() - entry.checked_at < self.ttl
+    
+    def put(self, entry: KelCacheEntry):
+        self.purge(entry.aid)
+        if entry.size > self.max_bytes:
+            logger.info(f"KEL for {entry.aid[:20]}... too large to cache ({entry.size} bytes)")
+            return
+        
+        self.entries[entry.aid] = entry
+        self.total_bytes += entry.size
+        while len(self.entries) > self.max_entries or self.total_bytes > self.max_bytes:
+            _, evicted = self.entries.popitem(last=False)
+            self.total_bytes -= evicted.size
+            self.evictions += 1
+    
+    def refresh(self, entry: KelCacheEntry) -> KelCacheEntry:
+        """Swap in a revalidated or extended entry, counting the lookup as a refresh"""
+        self.refreshes += 1
+        self.put(entry)
+        return entry
+    
+    def purge(self, aid: str) -> bool:
+        entry = self.entries.pop(aid, None)
+        if entry is None:
+            return False
+        self.total_bytes -= entry.size
+        return True
+    
+    def clear(self):
+        self.entries.clear()
+        self.total_bytes = 0
+    
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.refreshes + self.misses
+        return {
+            "entries": len(self.entries),
+            "bytes": self.total_bytes,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "refreshes": self.refreshes,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "revalidations": self.revalidations,
+            "refetches": self.refetches,
+            "incremental_updates": self.incremental_updates
+        }
+
+
+kel_cache = KelCache(KEL_CACHE_MAX_ENTRIES, KEL_CACHE_MAX_BYTES, KEL_CACHE_TTL)
+
+
+class NegativeCache:
+    """
+    Short-lived record of AIDs that KERIA reported as unknown
+    
+    Lets repeated lookups of junk or not-yet-resolved AIDs be answered
+    without a KERIA round-trip. Entries expire after the TTL so that an
+    AID which later becomes known is picked up again.
+    """
+    
+    def __init__(self, ttl: float, max_entries: int):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.entries: "OrderedDict[str, float]" = OrderedDict()
+        self.hits = 0
+    
+    def add(self, aid: str):
+        self.entries.pop(aid, None)
+        self.entries[aid] = time.monotonic() + self.ttl
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+    
+    def __contains__(self, aid: str) -> bool:
+        expires = self.entries.get(aid)
+        if expires is None:
+            return False
+        if expires <= time.monotonic():
+            del self.entries[aid]
+            return False
+        self.hits += 1
+        return True
+    
+    def purge(self, aid: str) -> bool:
+        return self.entries.pop(aid, None) is not None
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "entries": len(self.entries),
+            "ttl_seconds": self.ttl,
+            "hits": self.hits
+        }
+
+
+negative_cache = NegativeCache(NEGATIVE_CACHE_TTL, NEGATIVE_CACHE_MAX_ENTRIES)
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent lookups of the same key into one in-flight task
+    
+    The first caller (the leader) starts the work; callers arriving while
+    it runs await the same task instead of issuing their own KERIA
+    requests. Waiters are shielded, so a caller that is cancelled (client
+    gone, deadline hit, sibling lookup failed) does not cancel the work
+    the others are waiting on. Unlike the KEL cache, nothing outlives the
+    task: the next lookup after it finishes starts a new flight.
+    """
+    
+    def __init__(self):
+        self.flights: Dict[Any, asyncio.Task] = {}
+        self.leaders = 0
+        self.coalesced = 0
+    
+    def _forget(self, key: Any, task: asyncio.Task):
+        if self.flights.get(key) is task:
+            del self.flights[key]
+        if not task.cancelled():
+            # Mark the exception retrieved if every waiter went away
+            task.exception()
+    
+    def join(self, key: Any) -> Optional[asyncio.Task]:
+        """In-flight task for key, counting the caller as a coalesced waiter"""
+        task = self.flights.get(key)
+        if task is not None:
+            self.coalesced += 1
+        return task
+    
+    async def do(self, key: Any, factory: Callable[[], Awaitable[Any]]) -> Any:
+        task = self.join(key)
+        if task is None:
+            task = asyncio.ensure_future(factory())
+            self.flights[key] = task
+            self.leaders += 1
+            task.add_done_callback(lambda t: self._forget(key, t))
+        return await asyncio.shield(task)
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "in_flight": len(self.flights),
+            "leaders": self.leaders,
+            "coalesced_waiters": self.coalesced
+        }
+
+
+kel_flights = SingleFlight()
+
+
+metrics.registry.register(metrics.CallbackMetric(
+    "verifier_kel_cache_hit_ratio",
+    "KEL cache hits / lookups (hits, refreshes and misses) since start",
+    lambda: kel_cache.stats()["hit_ratio"]
+))
+metrics.registry.register(metrics.CallbackMetric(
+    "verifier_kel_cache_lookups_total",
+    "KEL cache lookups by result",
+    lambda: {"hit": kel_cache.hits, "refresh": kel_cache.refreshes, "miss": kel_cache.misses},
+    kind="counter",
+    labels=("result",)
+))
+metrics.registry.register(metrics.CallbackMetric(
+    "verifier_kel_cache_bytes",
+    "Approximate size of the cached KELs",
+    lambda: kel_cache.total_bytes
+))
+metrics.registry.register(metrics.CallbackMetric(
+    "verifier_negative_cache_hits_total",
+    "Lookups answered from the unknown-AID cache",
+    lambda: negative_cache.hits,
+    kind="counter"
+))
+metrics.registry.register(metrics.CallbackMetric(
+    "verifier_single_flight_coalesced_waiters_total",
+    "KEL lookups that joined an identical in-flight lookup",
+    lambda: kel_flights.coalesced,
+    kind="counter"
+))
@@ -0,0 +1,402 @@
+"""
+Credential Chains
+
+Resolves and validates an OOR holder's credential chain
+(OOR -> OOR Auth -> LE -> QVI -> GEDA) from KERIA's credential, TEL
+state and schema routes, following the vLEI rules of vlei_rules.
+"""
+
+import asyncio
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import httpx
+
+try:
+    import jsonschema
+except ImportError:
+    jsonschema = None
+
+from vlei_verification import caches, keria, metrics, vlei_rules
+
+# Credential chains (OOR -> OOR Auth -> LE -> QVI -> GEDA) from KERIA's
+# credential, TEL state and schema routes. GEDA_AID is the root of trust
+# the QVI credential must be issued by; without it no chain verifies.
+# TEL states are rechecked after CREDENTIAL_STATUS_TTL seconds.
+KERIA_CREDENTIAL_PATH = os.getenv('KERIA_CREDENTIAL_PATH', '/credentials/{said}')
+KERIA_CREDENTIAL_STATE_PATH = os.getenv('KERIA_CREDENTIAL_STATE_PATH', '/registries/{ri}/{said}')
+KERIA_SCHEMA_PATH = os.getenv('KERIA_SCHEMA_PATH', '/schema/{said}')
+GEDA_AID = os.getenv('GEDA_AID', '')
+CREDENTIAL_CACHE_MAX_ENTRIES = int(os.getenv('CREDENTIAL_CACHE_MAX_ENTRIES', '4096'))
+CREDENTIAL_STATUS_TTL = float(os.getenv('CREDENTIAL_STATUS_TTL', '30.0'))
+
+
+# Longest credential chain followed before assuming a loop
+MAX_CHAIN_DEPTH = 10
+
+
+class ChainError(Exception):
+    """A credential chain hop is missing or does not hold, or the chain is not an OOR chain"""
+    
+    def __init__(self, message: str, stage: str = "credential_chain"):
+        super().__init__(message)
+        self.stage = stage
+
+
+async def fetch_credential_document(route: str, url: str, what: str) -> Optional[Dict]:
+    """
+    GET one JSON document of the credential routes from KERIA
+    
+    Returns:
+        The document, None when KERIA does not have it
+    
+    Raises:
+        ChainError when KERIA cannot be asked or answers with an error
+    """
+    try:
+        with metrics.keria_timing(route) as call:
+            response = await keria.get_client().get(url)
+            call["status"] = response.status_code
+    except httpx.HTTPError as e:
+        raise ChainError(f"KERIA lookup of {what} failed: {e}")
+    if response.status_code == 404:
+        return None
+    if response.status_code != 200:
+        raise ChainError(f"KERIA lookup of {what} failed: HTTP {response.status_code}")
+    try:
+        document = metrics.decode_json(response.content, route)
+    except ValueError:
+        raise ChainError(f"KERIA returned malformed JSON for {what}")
+    return document if isinstance(document, dict) else None
+
+
+async def fetch_credential(said: str) -> Optional[Dict]:
+    """A credential's SAD; KERIA wraps it with its attachments under 'sad'"""
+    document = await fetch_credential_document(
+        "credentials", f"{keria.KERIA_URL}{KERIA_CREDENTIAL_PATH.format(said=said)}", f"credential {said}"
+    )
+    if document is not None and isinstance(document.get('sad'), dict):
+        return document['sad']
+    return document
+
+
+async def fetch_credential_state(registry: str, said: str) -> Optional[Dict]:
+    """A credential's TEL state ('et' is the latest TEL event type)"""
+    return await fetch_credential_document(
+        "credential_states", f"{keria.KERIA_URL}{KERIA_CREDENTIAL_STATE_PATH.format(ri=registry, said=said)}",
+        f"TEL state of {said}"
+    )
+
+
+async def fetch_schema(said: str) -> Optional[Dict]:
+    return await fetch_credential_document(
+        "schemas", f"{keria.KERIA_URL}{KERIA_SCHEMA_PATH.format(said=said)}", f"schema {said}"
+    )
+
+
+def check_credential_edge(sad: Dict[str, Any], name: str, edge: Dict[str, Any], node: Dict[str, Any]):
+    """
+    Check that a chained credential satisfies the edge pointing to it
+    (see vlei_rules.edge_error)
+    
+    Raises:
+        ChainError if it does not
+    """
+    error = vlei_rules.edge_error(sad, name, edge, node)
+    if error is not None:
+        raise ChainError(error)
+
+
+def check_oor_chain(chain: List[Tuple[Dict, Dict[str, Any]]]):
+    """
+    Check that a resolved chain is an OOR chain: leaf first, the roles
+    of vlei_rules.OOR_CHAIN by schema SAID, each credential's only edge
+    pointing to the next and the QVI credential without one
+    
+    Raises:
+        ChainError if it is not
+    """
+    roles = [report["role"] for _, report in chain]
+    if tuple(roles) != vlei_rules.OOR_CHAIN:
+        raise ChainError(
+            f"Not an OOR credential chain ({' -> '.join(vlei_rules.OOR_CHAIN)}): "
+            f"{' -> '.join(role if role in vlei_rules.VLEI_TYPES.values() else 'unknown schema ' + role for role in roles)}"
+        )
+    for (sad, report), (parent, _) in zip(chain, chain[1:] + [(None, None)]):
+        targets = [edge['n'] for _, edge in vlei_rules.credential_edges(sad)]
+        expected = [parent['d']] if parent is not None else []
+        if targets != expected:
+            raise ChainError(f"{report['role']} credential {report['said']} has edges to {targets or 'nothing'}, expected {expected or 'none'}")
+
+
+class CredentialChainResolver:
+    """
+    Resolves and validates vLEI credential chains from KERIA
+    
+    A chain is followed from its leaf credential through each
+    credential's edges. Once a credential is fetched its registry, schema
+    and parents are known, so its TEL state, its schema and the
+    credentials its edges point to are fetched at the same time: a chain
+    costs one round trip per level, not one per lookup.
+    
+    Credentials and schemas cannot change under their SAIDs and are kept
+    until evicted. TEL states are rechecked after status_ttl seconds,
+    except revocations, which are final. Concurrent lookups of one SAID
+    share a flight, so chains under the same LE and QVI fetch those hops
+    once.
+    """
+    
+    def __init__(self, max_entries: int, status_ttl: float):
+        """
+        Args:
+            max_entries: credentials, TEL states and schemas kept, each
+            status_ttl: seconds a TEL state is trusted
+        """
+        self.max_entries = max_entries
+        self.status_ttl = status_ttl
+        self.credentials: "OrderedDict[str, Dict]" = OrderedDict()
+        # Credential SAID -> (TEL state, time checked)
+        self.statuses: "OrderedDict[str, Tuple[Dict, float]]" = OrderedDict()
+        # Schema SAID -> (schema, compiled validator or None)
+        self.schemas: "OrderedDict[str, Tuple[Dict, Any]]" = OrderedDict()
+        self.flights = caches.SingleFlight()
+        self.lookups: Dict[Tuple[str, str], int] = {
+            (kind, result): 0
+            for kind in ("credential", "state", "schema") for result in ("hit", "miss")
+        }
+        self.chains_verified = 0
+        self.chains_failed = 0
+        self.revoked = 0
+    
+    def _remember(self, cache: OrderedDict, key: str, value: Any):
+        cache[key] = value
+        cache.move_to_end(key)
+        while len(cache) > self.max_entries:
+            cache.popitem(last=False)
+    
+    async def _credential(self, said: str) -> Tuple[Dict, bool]:
+        sad = self.credentials.get(said)
+        if sad is not None:
+            self.credentials.move_to_end(said)
+            self.lookups[("credential", "hit")] += 1
+            return sad, True
+        self.lookups[("credential", "miss")] += 1
+        sad = await self.flights.do(("credential", said), lambda: fetch_credential(said))
+        if sad is None:
+            raise ChainError(f"Credential {said} not found")
+        if sad.get('d') != said:
+            raise ChainError(f"Credential {said} carries SAID {sad.get('d')}")
+        self._remember(self.credentials, said, sad)
+        return sad, False
+    
+    async def _status(self, said: str, sad: Dict) -> Dict:
+        cached = self.statuses.get(said)
+        if cached is not None and (cached[0].get('et') in vlei_rules.REVOKED_ILKS or
+                                   time.monotonic() - cached[1] < self.status_ttl):
+            self.lookups[("state", "hit")] += 1
+            return cached[0]
+        self.lookups[("state", "miss")] += 1
+        registry = sad.get('ri')
+        if not registry:
+            raise ChainError(f"Credential {said} names no registry", "revocation")
+        state = await self.flights.do(("state", said), lambda: fetch_credential_state(registry, said))
+        if state is None:
+            raise ChainError(f"No TEL state for credential {said}", "revocation")
+        self._remember(self.statuses, said, (state, time.monotonic()))
+        return state
+    
+    async def _schema(self, said: Optional[str]) -> Tuple[Dict, Any]:
+        if not said:
+            raise ChainError("Credential names no schema")
+        cached = self.schemas.get(said)
+        if cached is not None:
+            self.schemas.move_to_end(said)
+            self.lookups[("schema", "hit")] += 1
+            return cached
+        self.lookups[("schema", "miss")] += 1
+        schema = await self.flights.do(("schema", said), lambda: fetch_schema(said))
+        if schema is None:
+            raise ChainError(f"Schema {said} not found")
+        if schema.get('$id') != said:
+            raise ChainError(f"Schema {said} carries $id {schema.get('$id')}")
+        validator = None
+        if jsonschema is not None:
+            validator_class = jsonschema.validators.validator_for(schema)
+            try:
+                validator_class.check_schema(schema)
+            except jsonschema.SchemaError as e:
+                raise ChainError(f"Schema {said} is not a valid JSON schema: {e.message}")
+            validator = validator_class(schema)
+        self._remember(self.schemas, said, (schema, validator))
+        return schema, validator
+    
+    async def _hop(self, said: str, path: frozenset) -> List[Tuple[Dict, Dict[str, Any]]]:
+        """
+        A credential and every credential it chains to, as (SAD, report)
+        pairs starting with said
+        
+        Raises:
+            ChainError if a hop is missing, revoked or an edge does not hold
+        """
+        if said in path or len(path) > MAX_CHAIN_DEPTH:
+            raise ChainError(f"Credential chain too long or looping at {said}")
+        sad, cached = await self._credential(said)
+        edges = vlei_rules.credential_edges(sad)
+        
+        # TEL state, schema and parent credentials all hang on the SAD only
+        status, (schema, validator), *parents = await asyncio.gather(
+            self._status(said, sad),
+            self._schema(sad.get('s')),
+            *(self._hop(edge['n'], path | {said}) for _, edge in edges)
+        )
+        
+        role = vlei_rules.VLEI_TYPES.get(sad.get('s'), sad.get('s'))
+        if validator is not None:
+            error = next(iter(validator.iter_errors(sad)), None)
+            if error is not None:
+                raise ChainError(f"{role} credential {said} does not match its schema: {error.message}")
+        for (name, edge), parent in zip(edges, parents):
+            check_credential_edge(sad, name, edge, parent[0][0])
+        
+        ilk = status.get('et')
+        if ilk in vlei_rules.REVOKED_ILKS:
+            raise ChainError(f"{role} credential {said} is revoked", "revocation")
+        if ilk not in vlei_rules.ISSUED_ILKS:
+            raise ChainError(f"{role} credential {said} has TEL state {ilk!r}", "revocation")
+        
+        chain = [(sad, {
+            "role": role,
+            "said": said,
+            "schema": sad.get('s'),
+            "issuer": sad.get('i'),
+            "issuee": (sad.get('a') or {}).get('i'),
+            "registry": sad.get('ri'),
+            "status": ilk,
+            "status_sn": status.get('s'),
+            "schema_validated": validator is not None,
+            "cached": cached
+        })]
+        seen = {said}
+        for parent in parents:
+            for hop in parent:
+                if hop[1]["said"] not in seen:
+                    seen.add(hop[1]["said"])
+                    chain.append(hop)
+        return chain
+    
+    async def resolve(self, said: str) -> Dict[str, Any]:
+        """
+        Resolve and validate the OOR chain a credential rests on
+        
+        Every credential must match its schema, be issued (not revoked)
+        in its TEL and satisfy the edges pointing to it. The chain must
+        be OOR -> OOR Auth -> LE -> QVI by vLEI schema SAID, and the QVI
+        credential issued by GEDA_AID; with GEDA_AID unset nothing is.
+        
+        Returns:
+            {"verified", "said", "chain": [hop reports, leaf first],
+            "root_of_trust"}, or {"verified": False, "stage", "error"}
+            with stage 'credential_chain', 'revocation' or 'root_of_trust'
+        """
+        try:
+            if not GEDA_AID:
+                raise ChainError("GEDA_AID is not configured, so no chain can be rooted", "root_of_trust")
+            chain = await self._hop(said, frozenset())
+            check_oor_chain(chain)
+            root = chain[-1][0].get('i')
+            if root != GEDA_AID:
+                raise ChainError(f"QVI credential {chain[-1][1]['said']} is issued by {root}, not GEDA {GEDA_AID}", "root_of_trust")
+        except ChainError as e:
+            self.chains_failed += 1
+            self.revoked += e.stage == "revocation"
+            return {"verified": False, "said": said, "stage": e.stage, "error": str(e)}
+        
+        self.chains_verified += 1
+        return {
+            "verified": True,
+            "said": said,
+            "chain": [report for _, report in chain],
+            "root_of_trust": {"aid": root}
+        }
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "cached_credentials": len(self.credentials),
+            "cached_states": len(self.statuses),
+            "cached_schemas": len(self.schemas),
+            "max_entries": self.max_entries,
+            "status_ttl": self.status_ttl,
+            "schema_validation": jsonschema is not None,
+            "geda_aid": GEDA_AID or None,
+            "chain_roles": list(vlei_rules.OOR_CHAIN),
+            "lookups": {f"{kind}_{result}": count for (kind, result), count in self.lookups.items()},
+            "chains_verified": self.chains_verified,
+            "chains_failed": self.chains_failed,
+            "revoked": self.revoked,
+            "single_flight": self.flights.stats()
+        }
+
+
+credential_resolver = CredentialChainResolver(CREDENTIAL_CACHE_MAX_ENTRIES, CREDENTIAL_STATUS_TTL)
+
+
+def check_credential_chain(chain: Dict[str, Any], holder_aid: Optional[str]) -> Tuple[bool, Dict[str, Any]]:
+    """
+    Judge a resolved chain for an OOR holder: the leaf OOR credential
+    must be issued to the holder
+    
+    Returns:
+        (ok, details); failed details carry "stage" and "error"
+    """
+    if not chain["verified"]:
+        return False, chain
+    issuee = chain["chain"][0]["issuee"]
+    if holder_aid and issuee != holder_aid:
+        return False, {
+            "verified": False,
+            "said": chain["said"],
+            "stage": "credential_chain",
+            "error": f"Credential {chain['said']} is issued to {issuee}, not {holder_aid}"
+        }
+    return True, chain
+
+
+async def verify_credential_chains(
+    saids: Iterable[str],
+    deadline: float
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Resolve the chains of several credentials concurrently under one
+    deadline; chains still resolving at the deadline fail
+    
+    Returns:
+        SAID -> credential_resolver.resolve() result
+    """
+    saids = list(dict.fromkeys(saids))
+    if not saids:
+        return {}
+    tasks = {asyncio.ensure_future(credential_resolver.resolve(said)): said for said in saids}
+    done, pending = await asyncio.wait(tasks, timeout=deadline)
+    results = {}
+    for task in pending:
+        task.cancel()
+        results[tasks[task]] = {
+            "verified": False,
+            "said": tasks[task],
+            "stage": "deadline",
+            "error": "Credential chain resolution ran past the verification deadline"
+        }
+    for task in done:
+        results[tasks[task]] = task.result()
+    return results
+
+
+metrics.registry.register(metrics.CallbackMetric(
+    "verifier_credential_lookups_total",
+    "Credential chain lookups by kind (credential, TEL state, schema) and cache result",
+    lambda: dict(credential_resolver.lookups),
+    kind="counter",
+    labels=("lookup", "result")
+))
@@ -0,0 +1,489 @@
+"""
+KEL Retrieval
+
+Fetches KELs from KERIA through the shared client and the KEL caches:
+whole when small, by sn range when KERIA supports it (probed once in
+'auto' mode), and stream-parsed when larger than
+KEL_STREAM_THRESHOLD_BYTES. Cached KELs older than their TTL are
+revalidated against KERIA's key state and extended with only the events
+accepted since.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from contextlib import aclosing
+from typing import AsyncIterator, Dict, Iterable, List, Optional, Tuple
+
+from vlei_verification import caches, kel_parsing, keria, metrics
+
+logger = logging.getLogger(__name__)
+
+# Deadline shared by all KERIA lookups made for one verification request
+VERIFY_DEADLINE = float(os.getenv('VERIFY_DEADLINE', '10.0'))
+
+# Key state route, read to revalidate cached KELs
+KERIA_STATE_PATH = os.getenv('KERIA_STATE_PATH', '/states?pre={aid}')
+
+# Ranged KEL queries: 'auto' probes the server, 'on'/'off' force the mode
+KERIA_EVENTS_PATH = os.getenv('KERIA_EVENTS_PATH', '/identifiers/{aid}/events')
+KERIA_RANGED_KEL = os.getenv('KERIA_RANGED_KEL', 'auto').lower()
+
+# KELs larger than this are never materialised; they are stream-parsed instead
+KEL_STREAM_THRESHOLD_BYTES = int(os.getenv('KEL_STREAM_THRESHOLD_BYTES', str(4 * 1024 * 1024)))
+
+
+class KelTooLargeError(Exception):
+    """Raised when a KEL exceeds KEL_STREAM_THRESHOLD_BYTES and must be streamed"""
+    
+    def __init__(self, aid: str, size: int):
+        super().__init__(f"KEL for {aid} exceeds {KEL_STREAM_THRESHOLD_BYTES} bytes ({size})")
+        self.aid = aid
+        self.size = size
+
+
+# Bytes pulled from KERIA per access mode, reported on /health
+kel_transfer_stats = {
+    "full_requests": 0,
+    "full_bytes": 0,
+    "ranged_requests": 0,
+    "ranged_bytes": 0,
+    "ranged_fallbacks": 0
+}
+
+
+async def fetch_kel(aid: str) -> Optional[Tuple[Dict, int]]:
+    """
+    Query KERIA for AID's KEL data
+    
+    The body is read incrementally and abandoned as soon as it is known
+    to exceed KEL_STREAM_THRESHOLD_BYTES, so oversized KELs are never
+    held in memory.
+    
+    Returns:
+        (kel_data, response_size_in_bytes) or None if not found
+    
+    Raises:
+        KelTooLargeError if the KEL has to be stream-parsed instead
+    """
+    try:
+        with metrics.keria_timing("identifiers") as call:
+            async with keria.get_client().stream('GET', f"{keria.KERIA_URL}/identifiers/{aid}") as response:
+                call["status"] = response.status_code
+                if response.status_code != 200:
+                    logger.warning(f"AID not found: {aid[:20]}...")
+                    if response.status_code == 404:
+                        caches.negative_cache.add(aid)
+                    return None
+                
+                length = response.headers.get('content-length')
+                if length and int(length) > KEL_STREAM_THRESHOLD_BYTES:
+                    raise KelTooLargeError(aid, int(length))
+                
+                body = bytearray()
+                async for chunk in response.aiter_bytes():
+                    body.extend(chunk)
+                    if len(body) > KEL_STREAM_THRESHOLD_BYTES:
+                        raise KelTooLargeError(aid, len(body))
+        
+        kel_transfer_stats["full_requests"] += 1
+        kel_transfer_stats["full_bytes"] += len(body)
+        return metrics.decode_json(body, "identifiers"), len(body)
+    except KelTooLargeError:
+        raise
+    except Exception as e:
+        logger.error(f"KEL query error for {aid[:20]}: {e}")
+        return None
+
+
+async def query_kel(aid: str) -> Optional[Dict]:
+    """Query KERIA for AID's KEL data"""
+    result = await fetch_kel(aid)
+    return result[0] if result else None
+
+
+class RangeNotSupported(Exception):
+    """KERIA did not answer a ranged KEL query; fall back to a full fetch"""
+    
+    def __init__(self, message: str, ambiguous: bool = False):
+        super().__init__(message)
+        # A 404 before support is known may mean "unknown AID" or "no such route"
+        self.ambiguous = ambiguous
+
+
+ranged_kel_supported: Optional[bool] = {'on': True, 'off': False}.get(KERIA_RANGED_KEL)
+
+
+def note_ranged_support(supported: bool):
+    """Record the probe result when running in auto mode"""
+    global ranged_kel_supported
+    if KERIA_RANGED_KEL == 'auto' and ranged_kel_supported is None:
+        ranged_kel_supported = supported
+        logger.info(f"📏 Ranged KEL queries {'supported' if supported else 'not supported'} by KERIA")
+
+
+async def fetch_kel_range(aid: str, sn: int, limit: Optional[int] = None) -> Optional[Tuple[List[Dict], int]]:
+    """
+    Ask KERIA for the events of an AID starting at sequence number sn
+    
+    Query: GET {KERIA_EVENTS_PATH}?sn=<hex sn>[&limit=<count>], answered
+    with either an event list or an object carrying one.
+    
+    Returns:
+        (events, response_size_in_bytes) or None if the AID is unknown
+    
+    Raises:
+        RangeNotSupported if the server cannot serve ranged queries
+    """
+    if ranged_kel_supported is False:
+        raise RangeNotSupported("ranged KEL queries disabled")
+    
+    params = {"sn": format(sn, 'x')}
+    if limit is not None:
+        params["limit"] = str(limit)
+    
+    try:
+        with metrics.keria_timing("events") as call:
+            response = await keria.get_client().get(
+                f"{keria.KERIA_URL}{KERIA_EVENTS_PATH.format(aid=aid)}",
+                params=params
+            )
+            call["status"] = response.status_code
+    except Exception as e:
+        raise RangeNotSupported(f"ranged KEL query failed: {e}")
+    
+    if response.status_code == 404:
+        if ranged_kel_supported:
+            caches.negative_cache.add(aid)
+            return None
+        raise RangeNotSupported("ranged KEL route returned 404", ambiguous=True)
+    if response.status_code != 200:
+        note_ranged_support(False)
+        raise RangeNotSupported(f"ranged KEL route returned {response.status_code}")
+    
+    data = metrics.decode_json(response.content, "events")
+    events = data if isinstance(data, list) else kel_parsing.extract_events(data)
+    if not isinstance(events, list):
+        note_ranged_support(False)
+        raise RangeNotSupported("ranged KEL response has no event list")
+    
+    note_ranged_support(True)
+    kel_transfer_stats["ranged_requests"] += 1
+    kel_transfer_stats["ranged_bytes"] += len(response.content)
+    return events, len(response.content)
+
+
+async def stream_kel_events(aid: str) -> AsyncIterator[Tuple[int, Dict]]:
+    """
+    Stream (index, event) pairs from KERIA without materialising the KEL
+    
+    Stopping iteration (break out of an aclosing() block) closes the
+    response, so callers that find what they need early do not download
+    the rest of the log.
+    """
+    started = time.perf_counter()
+    async with keria.get_client().stream('GET', f"{keria.KERIA_URL}/identifiers/{aid}") as response:
+        # Time to response headers only, the body is consumed at parse speed
+        metrics.keria_request_seconds.observe(
+            time.perf_counter() - started,
+            route="identifiers_stream",
+            status=response.status_code
+        )
+        if response.status_code != 200:
+            logger.warning(f"AID not found: {aid[:20]}...")
+            return
+        
+        parser = kel_parsing.KelEventStream()
+        index = 0
+        async for chunk in response.aiter_bytes():
+            for event in parser.feed(chunk):
+                yield index, event
+                index += 1
+            if parser.done:
+                return
+
+
+async def stream_first_event(aid: str) -> Optional[Dict]:
+    """Read only the inception event of a streamed KEL"""
+    async with aclosing(stream_kel_events(aid)) as events:
+        async for _, event in events:
+            return event
+    return None
+
+
+async def stream_seal_index(controller_aid: str, agent_aids: Iterable[str]) -> kel_parsing.SealIndex:
+    """
+    Build a seal index for the given agents from a streamed controller KEL
+    
+    Only seals for the requested agents are kept and the download stops
+    once all of them have been found.
+    """
+    wanted = set(agent_aids)
+    index = kel_parsing.SealIndex(aids=wanted)
+    async with aclosing(stream_kel_events(controller_aid)) as events:
+        async for idx, event in events:
+            index.add(idx, event)
+            if len(index) == len(wanted):
+                break
+    logger.info(
+        f"🌊 Streamed {index.indexed_events} controller events, "
+        f"found {len(index)}/{len(wanted)} seals"
+    )
+    return index
+
+
+async def query_key_state(aid: str) -> Optional[Tuple[int, str]]:
+    """
+    Query KERIA for the current key state of an AID
+    
+    Returns:
+        (sequence_number, latest_event_digest) or None if unavailable
+    """
+    try:
+        with metrics.keria_timing("states") as call:
+            response = await keria.get_client().get(
+                f"{keria.KERIA_URL}{KERIA_STATE_PATH.format(aid=aid)}"
+            )
+            call["status"] = response.status_code
+        if response.status_code != 200:
+            return None
+        
+        state = metrics.decode_json(response.content, "states")
+        if isinstance(state, list):
+            state = next((s for s in state if s.get('i') == aid), None)
+        if not isinstance(state, dict) or 's' not in state:
+            return None
+        
+        return kel_parsing.parse_sn(state['s']), state.get('d', '')
+    except Exception as e:
+        logger.debug(f"Key state query failed for {aid[:20]}: {e}")
+        return None
+
+
+async def fetch_icp_entry(aid: str) -> Optional[caches.KelCacheEntry]:
+    """
+    Fetch just the inception event of an AID
+    
+    Falls back to the full identifier document when KERIA cannot serve
+    ranged queries, in which case a complete entry is returned.
+    """
+    try:
+        result = await fetch_kel_range(aid, 0, limit=1)
+        if result is None:
+            return None
+        events, size = result
+        if events:
+            return caches.KelCacheEntry.inception_only(aid, events[0], size)
+        return None
+    except RangeNotSupported as e:
+        kel_transfer_stats["ranged_fallbacks"] += 1
+        ambiguous = e.ambiguous
+    
+    entry = await fetch_kel_entry(aid)
+    if ambiguous and entry is not None:
+        note_ranged_support(False)
+    return entry
+
+
+async def extend_kel_entry(entry: caches.KelCacheEntry) -> Optional[caches.KelCacheEntry]:
+    """
+    Fetch only the events after entry.sn, if possible
+    
+    Returns:
+        A new entry with them appended (a refreshed copy when there were
+        none), None when the cache must refetch the KEL
+    """
+    try:
+        result = await fetch_kel_range(entry.aid, entry.sn + 1)
+    except RangeNotSupported:
+        kel_transfer_stats["ranged_fallbacks"] += 1
+        return None
+    if result is None:
+        return None
+    
+    events, size = result
+    if not events:
+        # Nothing after our latest event, the cached KEL is current
+        return entry.refreshed()
+    
+    extended = entry.extended(events, size)
+    if extended is None:
+        logger.info(f"⚠️  KEL delta for {entry.aid[:20]}... does not chain onto cache, refetching")
+    return extended
+
+
+async def fetch_kel_entry(aid: str) -> Optional[caches.KelCacheEntry]:
+    """Full identifier fetch, degrading to a streaming placeholder for huge KELs"""
+    try:
+        result = await fetch_kel(aid)
+    except KelTooLargeError as e:
+        logger.info(f"🌊 KEL for {aid[:20]}... is {e.size}+ bytes, switching to streaming")
+        return caches.KelCacheEntry.streaming(aid)
+    if result is None:
+        return None
+    return caches.KelCacheEntry.from_kel(aid, *result)
+
+
+async def get_kel(aid: str, icp_only: bool = False) -> Optional[caches.KelCacheEntry]:
+    """
+    Return the KEL for an AID, served from the cache where possible
+    
+    Concurrent calls for the same AID share one lookup (see SingleFlight).
+    An icp_only caller also joins a full lookup that is already running,
+    since the full KEL contains the inception event.
+    
+    Args:
+        aid: AID to look up
+        icp_only: the caller only needs the inception event. Any cached
+            entry will do, since an inception event never changes, and
+            a miss fetches only event 0 when KERIA supports ranged queries.
+    
+    Returns:
+        KelCacheEntry or None if KERIA does not know the AID
+    """
+    if aid in caches.negative_cache:
+        return None
+    
+    if icp_only:
+        task = caches.kel_flights.join((aid, False))
+        if task is not None:
+            return await asyncio.shield(task)
+    return await caches.kel_flights.do((aid, icp_only), lambda: _get_kel(aid, icp_only))
+
+
+async def _get_kel(aid: str, icp_only: bool) -> Optional[caches.KelCacheEntry]:
+    """Cache lookup, revalidation and fetch behind get_kel"""
+    entry = caches.kel_cache.get(aid)
+    if entry is not None:
+        if icp_only or (entry.complete and caches.kel_cache.is_fresh(entry)):
+            caches.kel_cache.hits += 1
+            return entry
+        
+        state = None
+        if entry.complete and not entry.streamed:
+            state = await query_key_state(aid)
+            if state is not None and state == (entry.sn, entry.digest):
+                caches.kel_cache.revalidations += 1
+                return caches.kel_cache.refresh(entry.refreshed())
+        
+        # KEL advanced (or we only hold its inception): fetch just the new events
+        if not entry.streamed and (not entry.complete or (state is not None and state[0] > entry.sn)):
+            extended = await extend_kel_entry(entry)
+            if extended is not None:
+                caches.kel_cache.incremental_updates += 1
+                return caches.kel_cache.refresh(extended)
+        caches.kel_cache.refetches += 1
+    
+    caches.kel_cache.misses += 1
+    previous = entry
+    entry = await (fetch_icp_entry(aid) if icp_only else fetch_kel_entry(aid))
+    if entry is None:
+        caches.kel_cache.purge(aid)
+        return None
+    
+    if previous is not None:
+        entry.inherit_seal_index(previous)
+    caches.kel_cache.put(entry)
+    return entry
+
+
+async def get_seal_index(controller_aid: str) -> Optional[kel_parsing.SealIndex]:
+    """Shared seal index for a controller KEL, or None if KERIA lacks the AID"""
+    entry = await get_kel(controller_aid)
+    if entry is None or entry.streamed:
+        return None
+    return entry.seal_index
+
+
+async def agent_kel_data(entry: caches.KelCacheEntry) -> Dict:
+    """Agent KEL for ICP parsing, reading only event 0 when it is streamed"""
+    if not entry.streamed:
+        return entry.kel_data
+    icp = await stream_first_event(entry.aid)
+    return {"events": [icp] if icp is not None else []}
+
+
+async def controller_seal_index(entry: caches.KelCacheEntry, agent_aids: Iterable[str]) -> kel_parsing.SealIndex:
+    """Seal index for a controller, stream-built for the given agents when needed"""
+    if not entry.streamed:
+        return entry.seal_index
+    return await stream_seal_index(entry.aid, agent_aids)
+
+
+class KelNotFoundError(Exception):
+    """Raised when KERIA has no KEL for one side of a delegation"""
+    
+    def __init__(self, role: str, aid: str):
+        super().__init__(f"{role} AID not found in KEL: {aid}")
+        self.role = role
+        self.aid = aid
+
+
+def time_left(expires: float) -> float:
+    """Seconds left until a deadline on the event loop clock, never negative"""
+    return max(0.0, expires - asyncio.get_running_loop().time())
+
+
+async def query_kels(
+    agent_aid: str,
+    controller_aid: str,
+    deadline: float = VERIFY_DEADLINE
+) -> Tuple[caches.KelCacheEntry, caches.KelCacheEntry]:
+    """
+    Fetch agent and controller KELs concurrently under one shared deadline
+    
+    As soon as either lookup comes back empty the other one is cancelled,
+    since the verification cannot succeed without both KELs.
+    
+    Returns:
+        (agent_kel, controller_kel)
+    
+    Raises:
+        KelNotFoundError if either AID is unknown to KERIA
+        asyncio.TimeoutError if the deadline expires first
+    """
+    tasks = {
+        asyncio.create_task(get_kel(agent_aid, icp_only=True)): "agent",
+        asyncio.create_task(get_kel(controller_aid)): "controller"
+    }
+    results = {"agent": None, "controller": None}
+    pending = set(tasks)
+    
+    try:
+        loop = asyncio.get_running_loop()
+        expires = loop.time() + deadline
+        while pending:
+            remaining = expires - loop.time()
+            if remaining <= 0:
+                raise asyncio.TimeoutError()
+            
+            done, pending = await asyncio.wait(
+                pending,
+                timeout=remaining,
+                return_when=asyncio.FIRST_COMPLETED
+            )
+            if not done:
+                raise asyncio.TimeoutError()
+            
+            for task in done:
+                role = tasks[task]
+                results[role] = task.result()
+                if results[role] is None:
+                    logger.info(f"⏹️  {role} KEL missing, cancelling remaining lookup")
+                    aid = agent_aid if role == "agent" else controller_aid
+                    raise KelNotFoundError(role.capitalize(), aid)
+        
+        return results["agent"], results["controller"]
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+metrics.registry.register(metrics.CallbackMetric(
+    "verifier_keria_bytes_total",
+    "Bytes of KEL data pulled from KERIA by access mode",
+    lambda: {"full": kel_transfer_stats["full_bytes"], "ranged": kel_transfer_stats["ranged_bytes"]},
+    kind="counter",
+    labels=("mode",)
+))
@@ -0,0 +1,439 @@
+"""
+KEL Parsing
+
+Reads key events out of KERIA identifier responses, whole or streamed
+(KelEventStream), indexes the delegation seals of a controller's KEL
+(SealIndex) and checks an agent's delegated inception against the seal
+anchoring it.
+"""
+
+import codecs
+import json
+import logging
+import re
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class KelEventStream:
+    """
+    Incremental parser for KERIA identifier responses
+    
+    Bytes are fed in as they arrive and complete events are returned as
+    soon as they have been fully received. Only the event currently being
+    read is buffered, so memory stays bounded by the largest single
+    event no matter how long the KEL is. The event list is located the
+    same way as extract_events(): top-level 'events', 'state.k' or 'k'.
+    
+    Outside the event list a small tokenizer tracks nesting and keys;
+    inside it each element is decoded by the C JSON decoder in one call.
+    """
+    
+    EVENT_KEYS = ('events', 'k')
+    MAX_EVENT_BYTES = 1024 * 1024
+    _TOKEN = re.compile(r'["{}\[\],:]')
+    _STRING_END = re.compile(r'["\\]')
+    _ELEMENT_GAP = re.compile(r'[\s,]*')
+    _DECODER = json.JSONDecoder()
+    
+    def __init__(self):
+        self._decoder = codecs.getincrementaldecoder('utf-8')()
+        self._buf = ''
+        self._pos = 0
+        self._stack: List[str] = []
+        self._keys: List[Optional[str]] = []
+        self._expect_key = False
+        self._in_string = False
+        self._string_start = 0
+        self._capture_key = False
+        self._target_depth: Optional[int] = None
+        self._array_events = 0
+        self.events_seen = 0
+        self.bytes_read = 0
+        self.done = False
+    
+    def feed(self, chunk: bytes) -> List[Dict]:
+        """Consume a chunk and return the events it completed"""
+        self.bytes_read += len(chunk)
+        self._buf += self._decoder.decode(chunk)
+        events = self._scan()
+        self._compact()
+        return events
+    
+    def _is_event_array(self) -> bool:
+        if self._target_depth is not None or self.done:
+            return False
+        if not self._stack or self._stack[-1] != '{' or self._keys[-1] not in self.EVENT_KEYS:
+            return False
+        if len(self._stack) == 1:
+            return True
+        return len(self._stack) == 2 and self._keys[0] == 'state' and self._keys[-1] == 'k'
+    
+    def _read_elements(self, buf: str, events: List[Dict]) -> bool:
+        """
+        Decode whole elements of the event list
+        
+        Returns:
+            False when the buffer ends inside an element (wait for more)
+        """
+        while True:
+            self._pos = self._ELEMENT_GAP.match(buf, self._pos).end()
+            if self._pos >= len(buf) or buf[self._pos] == ']':
+                return True
+            try:
+                element, end = self._DECODER.raw_decode(buf, self._pos)
+            except json.JSONDecodeError:
+                if len(buf) - self._pos > self.MAX_EVENT_BYTES:
+                    raise ValueError(f"KEL event exceeds {self.MAX_EVENT_BYTES} bytes or is malformed")
+                return False
+            self._pos = end
+            # A 'k' list of key strings is not the event list
+            if isinstance(element, dict):
+                events.append(element)
+                self._array_events += 1
+                self.events_seen += 1
+    
+    def _scan(self) -> List[Dict]:
+        events = []
+        buf = self._buf
+        while not self.done:
+            if self._target_depth is not None and len(self._stack) == self._target_depth:
+                if not self._read_elements(buf, events):
+                    break
+            
+            if self._in_string:
+                match = self._STRING_END.search(buf, self._pos)
+                if match is None:
+                    self._pos = len(buf)
+                    break
+                if match.group() == '\\':
+                    if match.end() >= len(buf):
+                        self._pos = match.start()
+                        break
+                    self._pos = match.end() + 1
+                    continue
+                self._in_string = False
+                self._pos = match.end()
+                if self._capture_key:
+                    self._keys[-1] = buf[self._string_start:match.start()]
+                continue
+            
+            match = self._TOKEN.search(buf, self._pos)
+            if match is None:
+                self._pos = len(buf)
+                break
+            
+            char = match.group()
+            self._pos = match.end()
+            if char == '"':
+                self._in_string = True
+                self._string_start = self._pos
+                self._capture_key = self._expect_key
+            elif char == ':':
+                self._expect_key = False
+            elif char == ',':
+                self._expect_key = bool(self._stack) and self._stack[-1] == '{'
+            elif char in '{[':
+                if char == '[' and self._is_event_array():
+                    self._target_depth = len(self._stack) + 1
+                    self._array_events = 0
+                self._stack.append(char)
+                self._keys.append(None)
+                self._expect_key = char == '{'
+            else:
+                self._stack.pop()
+                self._keys.pop()
+                self._expect_key = False
+                if self._target_depth is not None and len(self._stack) == self._target_depth - 1:
+                    if self._array_events:
+                        self.done = True
+                    self._target_depth = None
+        return events
+    
+    def _compact(self):
+        """Drop everything before the oldest offset still needed"""
+        keep = min(self._pos, self._string_start) if self._in_string else self._pos
+        if keep:
+            self._buf = self._buf[keep:]
+            self._pos -= keep
+            self._string_start -= keep
+
+
+def extract_events(kel_data: Dict) -> Optional[List[Dict]]:
+    """Locate the event list in a KERIA identifier response"""
+    if not isinstance(kel_data, dict):
+        return None
+    
+    # KERIA response structure may vary, try different paths
+    if 'events' in kel_data:
+        return kel_data['events']
+    if 'state' in kel_data and isinstance(kel_data['state'], dict):
+        return kel_data['state'].get('k')
+    return kel_data.get('k')
+
+
+def parse_sn(sn: Any) -> int:
+    """KERI sequence numbers are hex strings in events and key state"""
+    if isinstance(sn, int):
+        return sn
+    return int(str(sn), 16)
+
+
+class SealIndex:
+    """
+    Index of the seals anchored in one controller KEL
+    
+    Maps the sealed AID ('i') to the first event that anchors it, so a
+    delegation seal lookup is a dict access instead of a scan over every
+    event and seal. The index remembers how many events it has seen and
+    is extended in place when the KEL grows, which lets one instance be
+    shared by every request (single, batch or streaming) for that KEL.
+    """
+    
+    def __init__(self, aids: Optional[Set[str]] = None):
+        """
+        Args:
+            aids: only index seals for these AIDs (default: all seals)
+        """
+        self.aids = aids
+        self.seals: Dict[str, Dict[str, Any]] = {}
+        self.indexed_events = 0
+    
+    def extend(self, events: List[Dict], start: Optional[int] = None):
+        """Index events[start:], defaulting to the first unindexed event"""
+        start = self.indexed_events if start is None else start
+        for idx in range(start, len(events)):
+            self.add(idx, events[idx])
+    
+    def add(self, idx: int, event: Dict):
+        """Index a single event found at position idx of the KEL"""
+        self.indexed_events = max(self.indexed_events, idx + 1)
+        if not isinstance(event, dict):
+            return
+        
+        # Look for seals in 'a' field (anchors/seals)
+        seals = event.get('a', [])
+        if not seals or not isinstance(seals, list):
+            return
+        
+        for seal in seals:
+            if not isinstance(seal, dict) or 'i' not in seal:
+                continue
+            if self.aids is not None and seal['i'] not in self.aids:
+                continue
+            # First anchoring event wins, as with a front-to-back scan
+            self.seals.setdefault(seal['i'], {
+                "event_index": idx,
+                "event_type": event.get('t'),
+                "event_sequence": event.get('s'),
+                "seal_sequence": seal.get('s'),
+                "seal_digest": seal.get('d', '')
+            })
+    
+    def lookup(self, aid: str) -> Optional[Dict[str, Any]]:
+        return self.seals.get(aid)
+    
+    def __len__(self) -> int:
+        return len(self.seals)
+
+
+def parse_agent_icp(kel_data: Dict, agent_aid: str, controller_aid: str) -> Tuple[bool, Dict]:
+    """
+    Parse agent's inception event to verify delegation
+    
+    Returns:
+        (success: bool, details: Dict)
+    """
+    try:
+        events = extract_events(kel_data)
+        
+        if not events or not isinstance(events, list) or len(events) == 0:
+            return False, {
+                "error": "No events found in KEL",
+                "agent_aid": agent_aid,
+                "kel_structure": str(type(kel_data))
+            }
+        
+        # Get first event (should be ICP)
+        icp_event = events[0]
+        
+        logger.info(f"ICP Event structure: {icp_event}")
+        
+        # Verify it's an inception event (delegated inception is 'dip')
+        event_type = icp_event.get('t')
+        if event_type not in ('icp', 'dip'):
+            return False, {
+                "error": f"First event is not ICP, got: {event_type}",
+                "event": icp_event
+            }
+        
+        # Check for delegation field 'di'
+        delegator = icp_event.get('di')
+        
+        if not delegator:
+            return False, {
+                "error": "Agent is not delegated (no 'di' field in ICP)",
+                "icp_event": icp_event,
+                "has_di_field": False
+            }
+        
+        # Verify delegator matches controller
+        if delegator != controller_aid:
+            return False, {
+                "error": "Delegator mismatch",
+                "expected_controller": controller_aid,
+                "actual_delegator": delegator,
+                "match": False
+            }
+        
+        # SUCCESS!
+        return True, {
+            "agent_aid": agent_aid,
+            "agent_aid_from_event": icp_event.get('i'),
+            "delegator_aid": delegator,
+            "controller_aid": controller_aid,
+            "match": True,
+            "event_type": event_type,
+            "sequence_number": icp_event.get('s'),
+            "signing_threshold": icp_event.get('kt'),
+            "public_keys_count": len(icp_event.get('k', [])),
+            "has_di_field": True
+        }
+        
+    except Exception as e:
+        logger.error(f"Error parsing agent ICP: {e}", exc_info=True)
+        return False, {"error": f"ICP parsing failed: {str(e)}"}
+
+
+def find_delegation_seal(
+    kel_data: Dict,
+    agent_aid: str,
+    controller_aid: str,
+    seal_index: Optional["SealIndex"] = None
+) -> Tuple[bool, Dict]:
+    """
+    Search controller's KEL for delegation seal anchoring the agent
+    
+    Args:
+        kel_data: Controller's KERIA identifier response
+        agent_aid: Delegated agent AID to look for
+        controller_aid: Controller (delegator) AID
+        seal_index: Prebuilt index for this KEL; when omitted one is
+            built from kel_data for this call only
+    
+    Returns:
+        (found: bool, details: Dict)
+    """
+    try:
+        if seal_index is None:
+            # Get events from KEL data
+            events = extract_events(kel_data)
+            
+            if not events or not isinstance(events, list):
+                return False, {
+                    "error": "No events found in controller KEL",
+                    "controller_aid": controller_aid
+                }
+            
+            seal_index = SealIndex()
+            seal_index.extend(events)
+        
+        if seal_index.indexed_events == 0:
+            return False, {
+                "error": "No events found in controller KEL",
+                "controller_aid": controller_aid
+            }
+        
+        seal = seal_index.lookup(agent_aid)
+        if seal is None:
+            return False, {
+                "found": False,
+                "controller_aid": controller_aid,
+                "agent_aid": agent_aid,
+                "events_searched": seal_index.indexed_events,
+                "error": "No delegation seal found in controller KEL"
+            }
+        
+        logger.info(
+            f"✅ Found delegation seal in event {seal['event_index']}, "
+            f"sequence {seal['event_sequence']}"
+        )
+        return True, {
+            "found": True,
+            "controller_aid": controller_aid,
+            "agent_aid": agent_aid,
+            "seal_in_event_type": seal['event_type'],
+            "seal_in_sequence": seal['event_sequence'],
+            "seal_in_event_index": seal['event_index'],
+            "seal_agent_sequence": seal['seal_sequence'],
+            "seal_digest": seal['seal_digest'][:20] + "...",
+            "total_events_searched": seal_index.indexed_events
+        }
+        
+    except Exception as e:
+        logger.error(f"Error searching for delegation seal: {e}", exc_info=True)
+        return False, {"error": f"Seal search failed: {str(e)}"}
+
+
+def verify_event_consistency(agent_icp_details: Dict, seal_details: Dict) -> Tuple[bool, List[Dict]]:
+    """
+    Verify consistency between agent ICP and controller seal
+    
+    Returns:
+        (all_passed: bool, checks: List[Dict])
+    """
+    checks = []
+    
+    try:
+        # Check 1: Agent ICP sequence is 0
+        agent_seq = agent_icp_details.get('sequence_number')
+        checks.append({
+            "name": "Agent ICP sequence is 0",
+            "passed": agent_seq == "0" or agent_seq == 0,
+            "value": agent_seq
+        })
+        
+        # Check 2: Seal references agent's inception (sequence 0)
+        seal_agent_seq = seal_details.get('seal_agent_sequence')
+        checks.append({
+            "name": "Seal references agent inception",
+            "passed": seal_agent_seq == "0" or seal_agent_seq == 0,
+            "value": seal_agent_seq
+        })
+        
+        # Check 3: Controller seal is in event after inception
+        seal_controller_seq = seal_details.get('seal_in_sequence')
+        if seal_controller_seq:
+            try:
+                seq_int = int(seal_controller_seq)
+                checks.append({
+                    "name": "Controller seal after inception",
+                    "passed": seq_int >= 1,
+                    "value": seal_controller_seq
+                })
+            except:
+                checks.append({
+                    "name": "Controller seal after inception",
+                    "passed": False,
+                    "value": seal_controller_seq,
+                    "error": "Invalid sequence"
+                })
+        
+        # Check 4: AIDs match
+        agent_from_icp = agent_icp_details.get('agent_aid_from_event')
+        agent_from_seal = seal_details.get('agent_aid')
+        checks.append({
+            "name": "Agent AIDs match across events",
+            "passed": agent_from_icp == agent_from_seal,
+            "icp_aid": agent_from_icp,
+            "seal_aid": agent_from_seal
+        })
+        
+        all_passed = all(check.get('passed', False) for check in checks)
+        
+        return all_passed, checks
+        
+    except Exception as e:
+        logger.error(f"Error in consistency checks: {e}")
+        return False, [{"error": str(e)}]
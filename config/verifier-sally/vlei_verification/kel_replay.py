@@ -0,0 +1,346 @@
+"""
+Incremental KEL Replay
+
+A validated KEL is checkpointed (sn, digest, key state) and later
+verifications replay only the events appended since; a checkpoint whose
+event is no longer the one at its sn (a fork or recovery) is dropped
+and the KEL replayed from inception.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from vlei_verification import caches, kel_parsing, metrics, signatures
+
+logger = logging.getLogger(__name__)
+
+# Incremental KEL replay: a validated KEL is checkpointed (sn, digest, key
+# state) in KEL_CHECKPOINT_DB, and later verifications only replay events
+# appended since. ':memory:' keeps checkpoints for the process lifetime.
+# Files live in VERIFIER_DATA_DIR, or ~/.vlei-verification when that is
+# not writable (as keripy falls back from /usr/local/var/keri).
+KEL_REPLAY = os.getenv('KEL_REPLAY', 'true').lower() in ('1', 'true', 'yes')
+VERIFIER_DATA_DIR = os.getenv('VERIFIER_DATA_DIR', '/usr/local/var/vlei-verification')
+KEL_CHECKPOINT_DB = os.getenv('KEL_CHECKPOINT_DB', os.path.join(VERIFIER_DATA_DIR, 'kel_checkpoints.sqlite3'))
+
+
+@dataclass
+class KelCheckpoint:
+    """An AID's KEL validated through event sn, whose digest is digest"""
+    aid: str
+    sn: int
+    digest: str
+    state: signatures.KelState
+
+
+def writable_path(path: str) -> str:
+    """
+    path, with its directory created; the same file name under
+    ~/.vlei-verification when that directory cannot be written
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    try:
+        os.makedirs(directory, exist_ok=True)
+        if os.access(directory, os.W_OK):
+            return path
+    except OSError:
+        pass
+    fallback = os.path.join(os.path.expanduser('~'), '.vlei-verification')
+    os.makedirs(fallback, exist_ok=True)
+    logger.warning(f"⚠️  {directory} is not writable, using {fallback}")
+    return os.path.join(fallback, os.path.basename(path))
+
+
+class KelCheckpointStore:
+    """
+    Verified-through checkpoints in SQLite, one row per AID
+    
+    The database is opened on first use. Every call is a single statement
+    on the primary key, short enough to run on the event loop.
+    """
+    
+    def __init__(self, path: str):
+        self.path = path
+        self.conn: Optional[sqlite3.Connection] = None
+        self.lock = threading.Lock()
+    
+    def _db(self) -> sqlite3.Connection:
+        if self.conn is None:
+            if self.path != ':memory:':
+                self.path = writable_path(self.path)
+            self.conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS kel_checkpoints ("
+                "aid TEXT PRIMARY KEY, sn INTEGER NOT NULL, digest TEXT NOT NULL, "
+                "state TEXT NOT NULL, updated REAL NOT NULL)"
+            )
+        return self.conn
+    
+    def get(self, aid: str) -> Optional[KelCheckpoint]:
+        with self.lock:
+            row = self._db().execute(
+                "SELECT sn, digest, state FROM kel_checkpoints WHERE aid = ?", (aid,)
+            ).fetchone()
+        if row is None:
+            return None
+        sn, digest, state = row
+        state = json.loads(state)
+        if 'next_digests' not in state:
+            # Written before next key digests were recorded: its rotations
+            # were never checked against them, so replay the KEL in full
+            self.delete(aid)
+            return None
+        return KelCheckpoint(aid=aid, sn=sn, digest=digest, state=signatures.KelState(**state))
+    
+    def put(self, checkpoint: KelCheckpoint):
+        with self.lock:
+            self._db().execute(
+                "INSERT OR REPLACE INTO kel_checkpoints (aid, sn, digest, state, updated) VALUES (?, ?, ?, ?, ?)",
+                (checkpoint.aid, checkpoint.sn, checkpoint.digest, json.dumps(asdict(checkpoint.state)), time.time())
+            )
+    
+    def delete(self, aid: str) -> bool:
+        with self.lock:
+            return self._db().execute("DELETE FROM kel_checkpoints WHERE aid = ?", (aid,)).rowcount > 0
+    
+    def count(self) -> int:
+        with self.lock:
+            return self._db().execute("SELECT COUNT(*) FROM kel_checkpoints").fetchone()[0]
+    
+    def close(self):
+        with self.lock:
+            if self.conn is not None:
+                self.conn.close()
+                self.conn = None
+
+
+def replay_event_error(aid: str, idx: int, event: Any, prior: Optional[str]) -> Optional[str]:
+    """
+    Why events[idx] of aid's KEL does not follow the event before it,
+    whose digest is prior; None if it does
+    
+    Checks the event's AID and sn, that its digest 'd' is its SAID, that
+    it chains onto prior through its prior digest 'p' (event 0 must be an
+    inception instead) and that its seals are well formed. Pre-rotation
+    is checked with the signatures.
+    """
+    if not isinstance(event, dict):
+        return f"event {idx} is not a key event"
+    if event.get('i') != aid:
+        return f"event {idx} belongs to another AID ({str(event.get('i'))[:20]}...)"
+    try:
+        sn = kel_parsing.parse_sn(event.get('s', -1))
+    except ValueError:
+        sn = -1
+    if sn != idx:
+        return f"event {idx} has sequence number {event.get('s')!r}"
+    if not event.get('d'):
+        return f"event {idx} has no digest"
+    said_error, _ = signatures.event_said_error(event)
+    if said_error:
+        return f"event {idx}: {said_error}"
+    
+    if idx == 0:
+        if event.get('t') not in ('icp', 'dip'):
+            return f"event 0 is not an inception ({event.get('t')!r})"
+    elif event.get('t') in ('icp', 'dip'):
+        return f"event {idx} is a second inception"
+    elif event.get('p') != prior:
+        return f"event {idx} does not chain onto event {idx - 1} (prior digest mismatch)"
+    
+    seals = event.get('a', [])
+    if not isinstance(seals, list):
+        return f"event {idx} has malformed seals"
+    for seal in seals:
+        if not isinstance(seal, dict):
+            return f"event {idx} has malformed seals"
+        if 'i' in seal:
+            # Event seal: the sealed event's AID, sn and digest
+            try:
+                kel_parsing.parse_sn(seal.get('s'))
+            except (TypeError, ValueError):
+                return f"event {idx} has an event seal without a valid sequence number"
+            if not seal.get('d'):
+                return f"event {idx} has an event seal without a digest"
+    return None
+
+
+class KelReplayer:
+    """
+    Incremental KEL validation from persisted checkpoints
+    
+    replay() validates an AID's KEL from its checkpoint on: every event
+    after the checkpoint must be its own SAID, chain onto its predecessor,
+    carry well formed seals and meet its signature threshold under the
+    key state carried over from the checkpoint; a rotation's keys must
+    also be the ones its prior establishment event committed to. The
+    checkpoint then moves to the last valid event, so a long-lived KEL
+    costs only its new events.
+    
+    The whole KEL is replayed only when it no longer has the checkpointed
+    digest at the checkpointed sn: a fork, or a recovery that replaced
+    events after it.
+    """
+    
+    def __init__(self, store: KelCheckpointStore):
+        self.store = store
+        self.flights = caches.SingleFlight()
+        self.incremental = 0
+        self.full = 0
+        self.forks = 0
+        self.failures = 0
+        self.events_replayed = 0
+        self.events_skipped = 0
+    
+    async def replay(self, aid: str, events: List[Dict]) -> Dict[str, Any]:
+        """
+        Validate the events of a complete KEL not covered by its checkpoint
+        
+        Concurrent replays of the same KEL share one pass.
+        
+        Returns:
+            {"verified", "mode", "fork", "from_sn", "verified_through_sn",
+            "events_replayed", "events_skipped"} plus "error" naming the
+            first event that failed
+        """
+        head = events[-1].get('d') if events and isinstance(events[-1], dict) else None
+        return await self.flights.do((aid, len(events), head), lambda: self._replay(aid, events))
+    
+    async def _replay(self, aid: str, events: List[Dict]) -> Dict[str, Any]:
+        checkpoint = self.store.get(aid)
+        start, state, prior, fork = 0, signatures.KelState(), None, False
+        if checkpoint is not None:
+            held = events[checkpoint.sn] if checkpoint.sn < len(events) else None
+            if isinstance(held, dict) and held.get('d') == checkpoint.digest:
+                start, state, prior = checkpoint.sn + 1, checkpoint.state, checkpoint.digest
+            else:
+                fork = True
+                self.forks += 1
+                logger.warning(
+                    f"⚠️  KEL of {aid[:20]}... no longer has the checkpointed event "
+                    f"{checkpoint.sn} ({checkpoint.digest[:12]}...), replaying it in full"
+                )
+        
+        # Chaining and seals first: cheap, and nothing past a break is signed for
+        end, error = len(events), None
+        for idx in range(start, len(events)):
+            error = replay_event_error(aid, idx, events[idx], prior)
+            if error:
+                end = idx
+                break
+            prior = events[idx]['d']
+        
+        # Signatures of every chained event in one verifier call
+        if signatures.SIG_VERIFY_MODE != 'off' and end > start:
+            signed = signatures.kel_signed_events(events[:end], state=state, start=start)
+            outcomes = await signatures.signature_verifier.verify(signed)
+            for idx, event in enumerate(signed, start):
+                outcome = outcomes[event.key]
+                if outcome["verified"] or ("skipped" in outcome and signatures.SIG_VERIFY_MODE != 'required'):
+                    continue
+                end = idx
+                error = f"event {idx}: " + (
+                    outcome.get("error") or outcome.get("skipped") or "signatures do not meet the threshold"
+                )
+                break
+        
+        if end > start:
+            for event in events[start:end]:
+                state = state.apply(event)
+            self.store.put(KelCheckpoint(aid=aid, sn=end - 1, digest=events[end - 1]['d'], state=state))
+        elif fork and end == 0:
+            self.store.delete(aid)
+        
+        if start:
+            self.incremental += 1
+        else:
+            self.full += 1
+        self.events_replayed += end - start
+        self.events_skipped += start
+        result = {
+            "verified": error is None,
+            "mode": "incremental" if start else "full",
+            "fork": fork,
+            "from_sn": start,
+            "verified_through_sn": end - 1,
+            "events_replayed": end - start,
+            "events_skipped": start
+        }
+        if error:
+            self.failures += 1
+            result["error"] = error
+        return result
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": KEL_REPLAY,
+            "checkpoint_db": self.store.path,
+            "checkpoints": self.store.count(),
+            "incremental_replays": self.incremental,
+            "full_replays": self.full,
+            "forks": self.forks,
+            "failures": self.failures,
+            "events_replayed": self.events_replayed,
+            "events_skipped": self.events_skipped,
+            "single_flight": self.flights.stats()
+        }
+
+
+kel_checkpoints = KelCheckpointStore(KEL_CHECKPOINT_DB)
+kel_replayer = KelReplayer(kel_checkpoints)
+
+
+async def replay_kels(entries: Iterable[Any]) -> Dict[str, Dict[str, Any]]:
+    """
+    Replay every complete KEL held among entries (KelCacheEntry values)
+    
+    Streamed KELs and inception-only agent entries are not held in full
+    and are left out.
+    
+    Returns:
+        AID -> kel_replayer.replay() result; empty when KEL_REPLAY is off
+    """
+    if not KEL_REPLAY:
+        return {}
+    held = {
+        entry.aid: entry for entry in entries
+        if isinstance(entry, caches.KelCacheEntry) and entry.complete and not entry.streamed
+    }
+    results = await asyncio.gather(*(kel_replayer.replay(aid, entry.events) for aid, entry in held.items()))
+    return dict(zip(held, results))
+
+
+def check_kel_replays(replays: Dict[str, Dict[str, Any]], aids: Iterable[str]) -> Tuple[bool, Dict[str, Any]]:
+    """Judge the replays of a delegation's KELs"""
+    kels = {aid: replays[aid] for aid in aids if aid in replays}
+    if not kels:
+        return True, {"verified": False, "skipped": "no complete KEL held" if KEL_REPLAY else "disabled (KEL_REPLAY=false)"}
+    failed = [f"{aid[:20]}...: {replay['error']}" for aid, replay in kels.items() if not replay["verified"]]
+    details = {"verified": not failed, "kels": kels}
+    if failed:
+        details["error"] = "; ".join(failed)
+    return not failed, details
+
+
+metrics.registry.register(metrics.CallbackMetric(
+    "verifier_kel_replays_total",
+    "KEL replays by mode ('full' when there was no usable checkpoint) and forks detected",
+    lambda: {"incremental": kel_replayer.incremental, "full": kel_replayer.full, "fork": kel_replayer.forks},
+    kind="counter",
+    labels=("mode",)
+))
+metrics.registry.register(metrics.CallbackMetric(
+    "verifier_kel_replay_events_total",
+    "KEL events replayed, and skipped as covered by a checkpoint",
+    lambda: {"replayed": kel_replayer.events_replayed, "skipped": kel_replayer.events_skipped},
+    kind="counter",
+    labels=("result",)
+))
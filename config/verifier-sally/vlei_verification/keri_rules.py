@@ -0,0 +1,70 @@
+"""
+KERI Key Event Rules
+
+Event types and the digest and pre-rotation rules key event validation
+relies on, shared by the verification service and Sally's KEL replay
+(custom_sally) so both validate KELs the same way.
+"""
+
+import base64
+import hashlib
+from typing import Callable, Dict, Iterable, Optional, Set, Tuple
+
+try:
+    import blake3
+except ImportError:
+    blake3 = None
+
+
+# Event types that set the signing keys for themselves and later events
+ESTABLISHMENT_ILKS = ("icp", "dip", "rot", "drt")
+INCEPTION_ILKS = ("icp", "dip")
+# Establishment events whose keys must have been pre-rotated
+ROTATION_ILKS = ("rot", "drt")
+# Events a delegator must anchor with a seal
+DELEGATED_ILKS = ("dip", "drt")
+
+# 32 byte digest codes -> hash of a serialization; keripy's default,
+# Blake3-256 ('E'), needs the blake3 package
+DIGEST_FUNCTIONS: Dict[str, Callable[[bytes], bytes]] = {
+    "F": lambda ser: hashlib.blake2b(ser, digest_size=32).digest(),
+    "G": lambda ser: hashlib.blake2s(ser, digest_size=32).digest(),
+    "H": lambda ser: hashlib.sha3_256(ser).digest(),
+    "I": lambda ser: hashlib.sha256(ser).digest(),
+}
+if blake3 is not None:
+    DIGEST_FUNCTIONS["E"] = lambda ser: blake3.blake3(ser).digest()
+DIGEST_CODES = ("E", "F", "G", "H", "I")
+DIGEST_LENGTH = 44
+
+
+def qb64_digest(ser: bytes, code: str) -> Optional[str]:
+    """qb64 digest of ser under a 32 byte digest code, None when the code is not supported here"""
+    function = DIGEST_FUNCTIONS.get(code)
+    if function is None:
+        return None
+    return code + base64.urlsafe_b64encode(b"\x00" + function(ser)).decode()[1:]
+
+
+def exposed_next_keys(signers: Iterable[Tuple[str, Optional[int]]], next_digests: Iterable[str]) -> Set[int]:
+    """
+    Prior next key indices a rotation exposes, as keripy's Kever.exposeds
+
+    Args:
+        signers: (qb64 key, prior next index) of each verified signature
+            of the rotation; the index is the signature's ondex, the same
+            as its key index for dual indexed signatures
+        next_digests: next key digests 'n' of the prior establishment event
+
+    Returns:
+        indices i whose signer's key hashes to next_digests[i]
+    """
+    next_digests = list(next_digests)
+    exposed = set()
+    for key, ondex in signers:
+        if ondex is None or not 0 <= ondex < len(next_digests):
+            continue
+        digest = next_digests[ondex]
+        if isinstance(digest, str) and qb64_digest(key.encode("utf-8"), digest[:1]) == digest:
+            exposed.add(ondex)
+    return exposed
@@ -0,0 +1,114 @@
+"""
+Shared KERIA Client
+
+One pooled httpx client per process, opened for the application's
+lifetime by lifespan() and created lazily outside of it, so KERIA
+lookups reuse keep-alive (and, with h2 installed, HTTP/2) connections.
+"""
+
+import logging
+import os
+from contextlib import asynccontextmanager
+from typing import Any, Dict, Optional
+
+import httpx
+from fastapi import FastAPI
+
+logger = logging.getLogger(__name__)
+
+KERIA_URL = os.getenv('KERIA_URL', 'http://keria:3902')
+
+# Connection pool settings for the shared KERIA client
+KERIA_MAX_CONNECTIONS = int(os.getenv('KERIA_MAX_CONNECTIONS', '100'))
+KERIA_POOL_SIZE = int(os.getenv('KERIA_POOL_SIZE', '20'))
+KERIA_KEEPALIVE_EXPIRY = float(os.getenv('KERIA_KEEPALIVE_EXPIRY', '30.0'))
+KERIA_CONNECT_TIMEOUT = float(os.getenv('KERIA_CONNECT_TIMEOUT', '5.0'))
+KERIA_READ_TIMEOUT = float(os.getenv('KERIA_READ_TIMEOUT', '10.0'))
+KERIA_POOL_TIMEOUT = float(os.getenv('KERIA_POOL_TIMEOUT', '5.0'))
+KERIA_HTTP2 = os.getenv('KERIA_HTTP2', 'true').lower() in ('1', 'true', 'yes')
+
+client: Optional[httpx.AsyncClient] = None
+
+
+def http2_available() -> bool:
+    """HTTP/2 needs the optional 'h2' package (pip install httpx[http2])"""
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def create_client(**kwargs) -> httpx.AsyncClient:
+    """
+    Build the application-lifetime KERIA client
+
+    Keyword arguments are passed through to httpx.AsyncClient so that
+    tools can swap in a different transport or base URL.
+    """
+    http2 = KERIA_HTTP2 and http2_available()
+    if KERIA_HTTP2 and not http2:
+        logger.warning("⚠️  KERIA_HTTP2 requested but 'h2' is not installed, using HTTP/1.1")
+
+    options = {
+        "http2": http2,
+        "limits": httpx.Limits(
+            max_connections=KERIA_MAX_CONNECTIONS,
+            max_keepalive_connections=KERIA_POOL_SIZE,
+            keepalive_expiry=KERIA_KEEPALIVE_EXPIRY
+        ),
+        "timeout": httpx.Timeout(
+            KERIA_READ_TIMEOUT,
+            connect=KERIA_CONNECT_TIMEOUT,
+            pool=KERIA_POOL_TIMEOUT
+        )
+    }
+    options.update(kwargs)
+    return httpx.AsyncClient(**options)
+
+
+def get_client() -> httpx.AsyncClient:
+    """Return the shared client, creating it lazily outside of the lifespan"""
+    global client
+    if client is None or client.is_closed:
+        client = create_client()
+    return client
+
+
+def pool_stats() -> Dict[str, Any]:
+    """Connection pool statistics for /health"""
+    stats = {
+        "http2_enabled": KERIA_HTTP2 and http2_available(),
+        "max_connections": KERIA_MAX_CONNECTIONS,
+        "pool_size": KERIA_POOL_SIZE,
+        "keepalive_expiry": KERIA_KEEPALIVE_EXPIRY,
+        "client_open": client is not None and not client.is_closed
+    }
+
+    # httpcore keeps its connections on the transport's pool; this is not
+    # public API so degrade quietly if the internals move
+    pool = getattr(getattr(client, '_transport', None), '_pool', None)
+    connections = getattr(pool, 'connections', None)
+    if connections is not None:
+        stats["connections"] = len(connections)
+        stats["idle_connections"] = sum(1 for c in connections if c.is_idle())
+        stats["active_connections"] = stats["connections"] - stats["idle_connections"]
+        stats["http2_connections"] = sum(
+            1 for c in connections
+            if 'HTTP/2' in getattr(c, 'info', lambda: '')()
+        )
+    return stats
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Open the shared KERIA client on startup and close it on shutdown"""
+    global client
+    client = create_client()
+    logger.info(f"🔌 KERIA client ready (pool={KERIA_POOL_SIZE}, max={KERIA_MAX_CONNECTIONS})")
+    try:
+        yield
+    finally:
+        await client.aclose()
+        client = None
+        logger.info("🔌 KERIA client closed")
@@ -0,0 +1,215 @@
+"""
+Verifier Metrics
+
+Counters and histograms rendered in the Prometheus text format on
+/metrics, the KERIA call and JSON decode timings feeding them, and the
+StageTimer behind each response's Server-Timing header. Components
+register CallbackMetrics reading their own counters where they are
+created.
+"""
+
+import json
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, List, Tuple
+
+# Seconds; spans sub-millisecond cache hits up to the verification deadline
+METRICS_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def format_labels(names: Tuple[str, ...], values: Tuple[str, ...]) -> str:
+    """Render a Prometheus label set, e.g. {stage="format"}"""
+    if not names:
+        return ""
+    escaped = (
+        v.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        for v in values
+    )
+    return "{" + ",".join(f'{n}="{v}"' for n, v in zip(names, escaped)) + "}"
+
+
+def format_value(value: float) -> str:
+    if value == float('inf'):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Monotonic counter with a fixed label set"""
+    
+    kind = "counter"
+    
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.values: Dict[Tuple[str, ...], float] = {}
+    
+    def inc(self, amount: float = 1, **labels: Any):
+        key = tuple(str(labels[name]) for name in self.labels)
+        self.values[key] = self.values.get(key, 0) + amount
+    
+    def samples(self) -> Iterable[Tuple[str, str, float]]:
+        for key, value in sorted(self.values.items()):
+            yield self.name, format_labels(self.labels, key), value
+
+
+class Histogram:
+    """Cumulative-bucket histogram with a fixed label set"""
+    
+    kind = "histogram"
+    
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labels: Tuple[str, ...] = (),
+        buckets: Tuple[float, ...] = METRICS_BUCKETS
+    ):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.buckets = buckets + (float('inf'),)
+        # label values -> [per-bucket counts, sum]
+        self.series: Dict[Tuple[str, ...], List] = {}
+    
+    def observe(self, value: float, **labels: Any):
+        key = tuple(str(labels[name]) for name in self.labels)
+        series = self.series.get(key)
+        if series is None:
+            series = self.series[key] = [[0] * len(self.buckets), 0.0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+    
+    def samples(self) -> Iterable[Tuple[str, str, float]]:
+        bucket_labels = self.labels + ("le",)
+        for key, (counts, total) in sorted(self.series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                yield f"{self.name}_bucket", format_labels(bucket_labels, key + (format_value(bound),)), cumulative
+            yield f"{self.name}_sum", format_labels(self.labels, key), total
+            yield f"{self.name}_count", format_labels(self.labels, key), cumulative
+
+
+class CallbackMetric:
+    """Metric read at scrape time from state kept elsewhere (cache stats etc.)"""
+    
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        read: Callable[[], Any],
+        kind: str = "gauge",
+        labels: Tuple[str, ...] = ()
+    ):
+        self.name = name
+        self.help = help
+        self.read = read
+        self.kind = kind
+        self.labels = labels
+    
+    def samples(self) -> Iterable[Tuple[str, str, float]]:
+        values = self.read()
+        if not isinstance(values, dict):
+            values = {(): values}
+        for key, value in sorted(values.items()):
+            key = key if isinstance(key, tuple) else (key,)
+            yield self.name, format_labels(self.labels, key), value
+
+
+class MetricsRegistry:
+    """Renders registered metrics in the Prometheus text exposition format"""
+    
+    def __init__(self):
+        self.metrics: List[Any] = []
+    
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+    
+    def render(self) -> str:
+        lines = []
+        for metric in self.metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, labels, value in metric.samples():
+                lines.append(f"{name}{labels} {format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+stage_seconds = registry.register(Histogram(
+    "verifier_stage_seconds",
+    "Time spent in each verification pipeline stage",
+    ("stage",)
+))
+keria_request_seconds = registry.register(Histogram(
+    "verifier_keria_request_seconds",
+    "KERIA round-trip latency by route and HTTP status ('error' when no response)",
+    ("route", "status")
+))
+kel_decode_seconds = registry.register(Histogram(
+    "verifier_kel_decode_seconds",
+    "JSON decoding time of KERIA responses by route",
+    ("route",)
+))
+verification_outcomes = registry.register(Counter(
+    "verifier_verifications_total",
+    "Verification outcomes by endpoint, outcome and failure reason",
+    ("endpoint", "outcome", "reason")
+))
+
+
+@contextmanager
+def keria_timing(route: str):
+    """
+    Time one KERIA call into keria_request_seconds
+    
+    The caller stores the response status in the yielded dict; calls
+    that raise before a response arrives are recorded as 'error'.
+    """
+    call = {"status": "error"}
+    started = time.perf_counter()
+    try:
+        yield call
+    finally:
+        keria_request_seconds.observe(time.perf_counter() - started, route=route, status=call["status"])
+
+
+def decode_json(body: Any, route: str) -> Any:
+    """json.loads timed into kel_decode_seconds"""
+    started = time.perf_counter()
+    data = json.loads(body)
+    kel_decode_seconds.observe(time.perf_counter() - started, route=route)
+    return data
+
+
+class StageTimer:
+    """
+    Per-request stage durations
+    
+    Every stage is observed into stage_seconds; the per-request totals
+    are returned to the client in a Server-Timing header.
+    """
+    
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.durations: Dict[str, float] = {}
+    
+    @contextmanager
+    def stage(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            self.durations[name] = self.durations.get(name, 0.0) + elapsed
+            stage_seconds.observe(elapsed, stage=name)
+    
+    def server_timing(self) -> str:
+        timings = [f"{name};dur={seconds * 1000:.2f}" for name, seconds in self.durations.items()]
+        timings.append(f"total;dur={(time.perf_counter() - self.started) * 1000:.2f}")
+        return ", ".join(timings)
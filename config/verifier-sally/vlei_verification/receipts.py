@@ -0,0 +1,371 @@
+"""
+Witness Receipts
+
+An event is accepted once TOAD ('bt') of its witnesses have receipted it:
+signed its serialization with their (non-transferable Ed25519) prefixes.
+Receipts attached to the event in 'rcts' are indexed witness signatures
+(index into the witness list) or witness prefix + signature couples.
+Witnesses answer receipt queries with a 'rct' message carrying the same
+material as CESR attachments.
+
+ReceiptValidator only asks witnesses when the attached receipts fall
+short of an event's TOAD, and stops asking once it is met.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+import httpx
+
+from vlei_verification import kel_parsing, keria, metrics, signatures
+
+logger = logging.getLogger(__name__)
+
+# Witness receipts, same modes as SIG_VERIFY_MODE. Witnesses are asked for
+# receipts (WITNESS_URLS: JSON object of witness AID -> base URL) only when
+# those attached to an event fall short of its TOAD.
+RECEIPT_VERIFY_MODE = os.getenv('RECEIPT_VERIFY_MODE', 'auto').lower()
+WITNESS_URLS = os.getenv('WITNESS_URLS', '{}')
+WITNESS_RECEIPTS_PATH = os.getenv('WITNESS_RECEIPTS_PATH', '/receipts?pre={aid}&sn={sn}')
+WITNESS_TIMEOUT = float(os.getenv('WITNESS_TIMEOUT', '3.0'))
+RECEIPT_CACHE_MAX_ENTRIES = int(os.getenv('RECEIPT_CACHE_MAX_ENTRIES', '100000'))
+
+
+# CESR attachment groups in a witness receipt message
+WITNESS_INDEXED_SIGS_COUNTER = '-B'
+NON_TRANS_RECEIPT_COUPLES_COUNTER = '-C'
+ATTACHMENT_GROUP_COUNTER = '-V'
+ED25519_CIGAR_CODE = '0B'
+
+
+def load_witness_urls(config: str) -> Dict[str, str]:
+    """WITNESS_URLS as a dict, empty (no witness queries) when unset or invalid"""
+    try:
+        urls = json.loads(config)
+    except ValueError:
+        logger.warning("⚠️  WITNESS_URLS is not valid JSON, witnesses will not be queried")
+        return {}
+    if not isinstance(urls, dict):
+        logger.warning("⚠️  WITNESS_URLS must map witness AIDs to URLs, witnesses will not be queried")
+        return {}
+    return {aid: url for aid, url in urls.items() if isinstance(url, str)}
+
+
+def b64_count(chars: str) -> int:
+    count = 0
+    for char in chars:
+        value = signatures.B64_ALPHABET.find(char)
+        if value < 0:
+            raise ValueError(f"invalid count '{chars}'")
+        count = count * 64 + value
+    return count
+
+
+def decode_receipt(receipt: Any, witnesses: List[str]) -> Tuple[str, bytes, bytes]:
+    """
+    Resolve a receipt to the witness that made it
+    
+    Returns:
+        (witness prefix, raw verification key, raw signature)
+    
+    Raises:
+        ValueError for unsupported or malformed material, or a witness
+        that is not in the event's witness list
+    """
+    if not isinstance(receipt, str):
+        raise ValueError("receipt is not a qb64 string")
+    if len(receipt) == signatures.ED25519_INDEXED_SIG_LENGTH and receipt[0] in signatures.ED25519_INDEXED_SIG_CODES:
+        index = signatures.B64_ALPHABET.find(receipt[1])
+        if index < 0 or index >= len(witnesses):
+            raise ValueError(f"receipt index {index} has no witness")
+        witness, sig = witnesses[index], receipt
+    elif (len(receipt) == signatures.ED25519_VERKEY_LENGTH + signatures.ED25519_INDEXED_SIG_LENGTH and
+            receipt[signatures.ED25519_VERKEY_LENGTH:].startswith(ED25519_CIGAR_CODE)):
+        witness, sig = receipt[:signatures.ED25519_VERKEY_LENGTH], receipt[signatures.ED25519_VERKEY_LENGTH:]
+        if witness not in witnesses:
+            raise ValueError(f"receipt by {witness[:12]}..., not a witness of the event")
+    else:
+        raise ValueError(f"unsupported receipt '{receipt[:8]}...'")
+    if len(witness) != signatures.ED25519_VERKEY_LENGTH or witness[0] not in signatures.ED25519_VERKEY_CODES:
+        raise ValueError(f"unsupported witness prefix '{witness[:8]}...'")
+    return witness, signatures.qb64_raw(witness, 1), signatures.qb64_raw(sig, 2)
+
+
+def parse_receipt_message(body: bytes, digest: str) -> List[str]:
+    """
+    Receipts in a witness's 'rct' message for the event with this digest
+    
+    Returns:
+        qb64 receipts in the form decode_receipt() takes; empty when the
+        message receipts another event
+    
+    Raises:
+        ValueError if the message cannot be parsed
+    """
+    text = body.decode("utf-8")
+    ked, end = json.JSONDecoder().raw_decode(text)
+    if not isinstance(ked, dict) or ked.get('t') != 'rct' or ked.get('d') != digest:
+        return []
+    
+    receipts = []
+    rest = text[end:].strip()
+    while len(rest) >= 4:
+        code, count, rest = rest[:2], b64_count(rest[2:4]), rest[4:]
+        if code == ATTACHMENT_GROUP_COUNTER:
+            # Wraps the groups below; its count is in quadlets
+            continue
+        if code == WITNESS_INDEXED_SIGS_COUNTER:
+            size = signatures.ED25519_INDEXED_SIG_LENGTH
+        elif code == NON_TRANS_RECEIPT_COUPLES_COUNTER:
+            size = signatures.ED25519_VERKEY_LENGTH + signatures.ED25519_INDEXED_SIG_LENGTH
+        else:
+            break
+        receipts.extend(rest[i * size:(i + 1) * size] for i in range(count))
+        rest = rest[count * size:]
+    return receipts
+
+
+class ReceiptValidator:
+    """
+    Witness receipt validation that stops at the TOAD
+    
+    Attached receipts are checked TOAD-minus-valid at a time, so a fully
+    receipted event costs TOAD signature checks however many witnesses
+    it has. When they fall short, witnesses without a valid receipt are
+    asked concurrently, again only as many at a time as receipts are
+    still needed; a failed lookup starts the next witness and lookups
+    still running are cancelled once the TOAD is met.
+    
+    Events whose receipts met the TOAD are remembered by digest, with a
+    fingerprint of the receipted bytes, and are not validated again.
+    """
+    
+    def __init__(self, urls: Dict[str, str], max_entries: int, timeout: float):
+        """
+        Args:
+            urls: witness AID -> base URL of its receipt endpoint
+            max_entries: validated event digests remembered
+            timeout: per witness query seconds
+        """
+        self.urls = urls
+        self.max_entries = max_entries
+        self.timeout = timeout
+        # Event digest -> (fingerprint of the serialization, witnesses receipted)
+        self.validated: "OrderedDict[str, Tuple[bytes, int]]" = OrderedDict()
+        self.cache_hits = 0
+        self.satisfied_events = 0
+        self.short_events = 0
+        self.skipped_events = 0
+        self.receipts_checked = 0
+        self.witness_queries = 0
+        self.witness_failures = 0
+        self.cancelled_queries = 0
+    
+    async def validate(self, events: Iterable[signatures.SignedEvent]) -> Dict[Tuple[str, str, str], Dict[str, Any]]:
+        """
+        Validate the receipts of events, all events concurrently
+        
+        Returns:
+            event key -> {"verified", "cached", "toad", ...}; events
+            with no receipt to check have a "skipped" reason
+        """
+        unique: Dict[Tuple[str, str, str], signatures.SignedEvent] = {}
+        for event in events:
+            unique.setdefault(event.key, event)
+        outcomes = await asyncio.gather(*(self._validate(event) for event in unique.values()))
+        return dict(zip(unique, outcomes))
+    
+    async def _validate(self, event: signatures.SignedEvent) -> Dict[str, Any]:
+        try:
+            toad = kel_parsing.parse_sn(event.toad) if event.toad is not None else 0
+        except ValueError:
+            self.short_events += 1
+            return {"verified": False, "cached": False, "error": f"invalid TOAD {event.toad!r}"}
+        outcome = {"verified": True, "cached": False, "toad": toad, "witnesses": len(event.witnesses)}
+        if toad == 0:
+            outcome["receipted_by"] = 0
+            return outcome
+        if toad > len(event.witnesses):
+            self.short_events += 1
+            return {**outcome, "verified": False, "error": f"TOAD {toad} exceeds {len(event.witnesses)} witnesses"}
+        
+        fingerprint = hashlib.blake2b(event.raw, digest_size=16).digest()
+        cached = self.validated.get(event.digest)
+        if cached is not None and cached[0] == fingerprint:
+            self.validated.move_to_end(event.digest)
+            self.cache_hits += 1
+            return {**outcome, "cached": True, "receipted_by": cached[1]}
+        
+        if not signatures.signature_verifier.available:
+            self.skipped_events += 1
+            return {**outcome, "verified": False,
+                    "skipped": "no Ed25519 implementation installed (pysodium or cryptography)"}
+        
+        # One candidate per witness, in attachment order
+        candidates: Dict[str, Tuple[bytes, bytes]] = {}
+        for receipt in event.receipts:
+            try:
+                witness, key, sig = decode_receipt(receipt, event.witnesses)
+            except ValueError:
+                continue
+            candidates.setdefault(witness, (key, sig))
+        attached = list(candidates.items())
+        
+        receipted: Set[str] = set()
+        while len(receipted) < toad and attached:
+            needed = toad - len(receipted)
+            take, attached = attached[:needed], attached[needed:]
+            results = await signatures.signature_verifier.check([(key, event.raw, sig) for _, (key, sig) in take])
+            self.receipts_checked += len(take)
+            receipted.update(witness for (witness, _), ok in zip(take, results) if ok)
+        
+        asked = 0
+        if len(receipted) < toad:
+            asked = await self._query_witnesses(event, toad, receipted)
+        
+        outcome.update(receipted_by=len(receipted), attached=len(candidates), witness_queries=asked)
+        if len(receipted) >= toad:
+            self._remember(event.digest, fingerprint, len(receipted))
+            self.satisfied_events += 1
+        elif not candidates and not asked:
+            self.skipped_events += 1
+            outcome.update(verified=False, skipped="no receipts attached and no witness URLs known")
+        else:
+            self.short_events += 1
+            outcome.update(verified=False, error=f"{len(receipted)} of {toad} required witness receipts valid")
+        return outcome
+    
+    async def _query_witnesses(self, event: signatures.SignedEvent, toad: int, receipted: Set[str]) -> int:
+        """
+        Ask witnesses for receipts until the TOAD is met, adding to receipted
+        
+        Returns:
+            number of witnesses asked
+        """
+        waiting = [w for w in event.witnesses if w not in receipted and w in self.urls]
+        running: Set[asyncio.Task] = set()
+        asked = 0
+        try:
+            while len(receipted) < toad:
+                while waiting and len(running) < toad - len(receipted):
+                    running.add(asyncio.create_task(self._witness_receipt(waiting.pop(0), event)))
+                    asked += 1
+                if not running:
+                    break
+                done, running = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    witness = task.result()
+                    if witness is not None:
+                        receipted.add(witness)
+        finally:
+            for task in running:
+                task.cancel()
+                self.cancelled_queries += 1
+        return asked
+    
+    async def _witness_receipt(self, witness: str, event: signatures.SignedEvent) -> Optional[str]:
+        """Query one witness; its prefix if it returned a valid receipt"""
+        url = self.urls[witness].rstrip('/') + WITNESS_RECEIPTS_PATH.format(aid=event.pre, sn=kel_parsing.parse_sn(event.sn))
+        self.witness_queries += 1
+        try:
+            response = await keria.get_client().get(url, timeout=self.timeout)
+            if response.status_code != 200:
+                raise ValueError(f"HTTP {response.status_code}")
+            receipts = parse_receipt_message(response.content, event.digest)
+        except (httpx.HTTPError, ValueError) as e:
+            self.witness_failures += 1
+            logger.info(f"⚠️  Witness {witness[:12]}... receipt query failed: {e}")
+            return None
+        
+        for receipt in receipts:
+            try:
+                receipter, key, sig = decode_receipt(receipt, event.witnesses)
+            except ValueError:
+                continue
+            if receipter != witness:
+                continue
+            self.receipts_checked += 1
+            if (await signatures.signature_verifier.check([(key, event.raw, sig)]))[0]:
+                return witness
+        self.witness_failures += 1
+        return None
+    
+    def _remember(self, digest: str, fingerprint: bytes, receipted: int):
+        self.validated[digest] = (fingerprint, receipted)
+        self.validated.move_to_end(digest)
+        while len(self.validated) > self.max_entries:
+            self.validated.popitem(last=False)
+    
+    def clear(self):
+        self.validated.clear()
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "mode": RECEIPT_VERIFY_MODE,
+            "known_witnesses": len(self.urls),
+            "cached_events": len(self.validated),
+            "max_entries": self.max_entries,
+            "cache_hits": self.cache_hits,
+            "satisfied_events": self.satisfied_events,
+            "short_events": self.short_events,
+            "skipped_events": self.skipped_events,
+            "receipts_checked": self.receipts_checked,
+            "witness_queries": self.witness_queries,
+            "witness_failures": self.witness_failures,
+            "cancelled_queries": self.cancelled_queries
+        }
+
+
+receipt_validator = ReceiptValidator(load_witness_urls(WITNESS_URLS), RECEIPT_CACHE_MAX_ENTRIES, WITNESS_TIMEOUT)
+
+
+def check_delegation_receipts(
+    signed: List[signatures.SignedEvent],
+    outcomes: Dict[Tuple[str, str, str], Dict[str, Any]],
+    unavailable: Optional[str] = None
+) -> Tuple[bool, Dict[str, Any]]:
+    """Judge a delegation's events from receipt_validator outcomes"""
+    return signatures.check_delegation_events(
+        signed, outcomes, unavailable, RECEIPT_VERIFY_MODE, "short of their witness threshold (TOAD)"
+    )
+
+
+async def verify_delegation_receipts(
+    signed: List[signatures.SignedEvent],
+    unavailable: Optional[str] = None
+) -> Tuple[bool, Dict[str, Any]]:
+    """Witness receipt stage for one delegation's delegation_signed_events()"""
+    if RECEIPT_VERIFY_MODE == 'off':
+        return True, {"verified": False, "skipped": "disabled (RECEIPT_VERIFY_MODE=off)"}
+    outcomes = await receipt_validator.validate(signed) if signed else {}
+    return check_delegation_receipts(signed, outcomes, unavailable)
+
+
+metrics.registry.register(metrics.CallbackMetric(
+    "verifier_witness_receipt_events_total",
+    "Events whose witness receipts were validated, by outcome against the TOAD",
+    lambda: {
+        "satisfied": receipt_validator.satisfied_events,
+        "short": receipt_validator.short_events,
+        "skipped": receipt_validator.skipped_events,
+        "cached": receipt_validator.cache_hits
+    },
+    kind="counter",
+    labels=("result",)
+))
+metrics.registry.register(metrics.CallbackMetric(
+    "verifier_witness_queries_total",
+    "Witness receipt queries by outcome ('cancelled' once the TOAD was met)",
+    lambda: {
+        "sent": receipt_validator.witness_queries,
+        "failed": receipt_validator.witness_failures,
+        "cancelled": receipt_validator.cancelled_queries
+    },
+    kind="counter",
+    labels=("result",)
+))
@@ -0,0 +1,686 @@
+"""
+Signature Verification
+
+Events are JSON key events as KERIA serves them. The controller's qb64
+indexed signatures travel with each event in a 'sigs' list, and witness
+receipts in 'rcts'. Neither is part of what was signed: the signed bytes
+are the event without them, serialized the way keripy serializes JSON
+events (field order kept, no whitespace).
+
+SignatureVerifier checks event SAIDs, signing thresholds and
+pre-rotation, batching Ed25519 checks onto a process pool when there
+are enough of them, and remembers the digests of verified events.
+"""
+
+import asyncio
+import base64
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+from fractions import Fraction
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from vlei_verification import kel_parsing, keri_rules, metrics
+
+logger = logging.getLogger(__name__)
+
+# Event signatures: 'auto' verifies signed events, 'required' also fails
+# unsigned ones, 'off' skips the stage
+SIG_VERIFY_MODE = os.getenv('SIG_VERIFY_MODE', 'auto').lower()
+# Ed25519 worker processes (0 verifies in-process) and how work is split
+SIG_VERIFY_WORKERS = int(os.getenv('SIG_VERIFY_WORKERS', str(os.cpu_count() or 1)))
+SIG_VERIFY_START_METHOD = os.getenv('SIG_VERIFY_START_METHOD', 'spawn')
+SIG_BATCH_MIN = int(os.getenv('SIG_BATCH_MIN', '64'))
+SIG_BATCH_SIZE = int(os.getenv('SIG_BATCH_SIZE', '512'))
+# Digests of events whose signatures have been verified
+SIG_CACHE_MAX_ENTRIES = int(os.getenv('SIG_CACHE_MAX_ENTRIES', '100000'))
+
+
+SIGS_FIELD = 'sigs'
+RECEIPTS_FIELD = 'rcts'
+ATTACHMENT_FIELDS = (SIGS_FIELD, RECEIPTS_FIELD)
+
+
+# Ed25519 verification key codes (transferable, non-transferable) and
+# indexed signature codes (both lists, current list only)
+ED25519_VERKEY_CODES = ('D', 'B')
+ED25519_INDEXED_SIG_CODES = ('A', 'B')
+ED25519_VERKEY_LENGTH = 44
+ED25519_INDEXED_SIG_LENGTH = 88
+B64_ALPHABET = "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-_"
+
+
+def load_ed25519_backend() -> Tuple[Optional[str], Optional[Callable[[bytes, bytes, bytes], bool]]]:
+    """
+    Pick an Ed25519 implementation: pysodium (libsodium, as keripy uses)
+    or else cryptography
+    
+    Returns:
+        (name, verify(key, message, signature) -> bool), or (None, None)
+        when neither is installed
+    """
+    try:
+        import pysodium
+        
+        def verify(key: bytes, msg: bytes, sig: bytes) -> bool:
+            try:
+                pysodium.crypto_sign_verify_detached(sig, msg, key)
+                return True
+            except ValueError:
+                return False
+        
+        return "pysodium", verify
+    except Exception:
+        # ImportError, or pysodium installed without libsodium
+        pass
+    
+    try:
+        from cryptography.exceptions import InvalidSignature
+        from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PublicKey
+        
+        def verify(key: bytes, msg: bytes, sig: bytes) -> bool:
+            try:
+                Ed25519PublicKey.from_public_bytes(key).verify(sig, msg)
+                return True
+            except (InvalidSignature, ValueError):
+                return False
+        
+        return "cryptography", verify
+    except ImportError:
+        return None, None
+
+
+ED25519_BACKEND, ed25519_verify = load_ed25519_backend()
+
+
+def verify_ed25519_chunk(triples: List[Tuple[bytes, bytes, bytes]]) -> List[bool]:
+    """Check (key, message, signature) triples; also the process pool task"""
+    return [ed25519_verify(key, msg, sig) for key, msg, sig in triples]
+
+
+def event_said_error(event: Dict) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Check that an event's digest 'd' is its SAID, as keripy computes it:
+    the digest of the event serialized with 'd' (and, for an inception,
+    a self-addressing prefix 'i') replaced by '#' padding
+    
+    A basic (key) prefix must instead be the inception's only signing key.
+    
+    Returns:
+        (error, None) when a digest does not match, (None, reason) when
+        it cannot be computed here, (None, None) when it matches
+    """
+    said = event.get('d')
+    if not isinstance(said, str) or len(said) != keri_rules.DIGEST_LENGTH or said[0] not in keri_rules.DIGEST_CODES:
+        return f"unsupported event digest '{str(said)[:8]}...'", None
+    
+    ked = {label: value for label, value in event.items() if label not in ATTACHMENT_FIELDS}
+    labels = ['d']
+    if event.get('t') in keri_rules.INCEPTION_ILKS:
+        pre = event.get('i')
+        if isinstance(pre, str) and pre[:1] in keri_rules.DIGEST_CODES:
+            labels.append('i')
+        elif event.get('t') == 'dip':
+            return "delegated inception without a self-addressing prefix", None
+        elif event.get('k') != [pre]:
+            return "basic prefix is not the inception's only signing key", None
+    for label in labels:
+        ked[label] = '#' * len(ked[label])
+    
+    raw = json.dumps(ked, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    for label in labels:
+        digest = keri_rules.qb64_digest(raw, event[label][0])
+        if digest is None:
+            return None, f"no implementation of digest code '{event[label][0]}' installed (blake3 for 'E')"
+        if digest != event[label]:
+            return f"'{label}' is not the event's SAID", None
+    return None, None
+
+
+def next_key_digest_met(keys: List[str], signers: Set[int], next_digests: List[str], next_threshold: Any) -> bool:
+    """
+    Pre-rotation: do the keys of a rotation that signed it satisfy the
+    prior establishment event's next key threshold
+    
+    A signer counts for prior next key i when its key, at the same index,
+    hashes to that event's digest 'n'[i] (dual indexed signatures).
+    """
+    exposed = keri_rules.exposed_next_keys(
+        ((keys[index], index) for index in signers if index < len(keys)), next_digests
+    )
+    return threshold_met(next_threshold, exposed)
+
+
+def qb64_raw(qb64: str, code_size: int) -> bytes:
+    """Raw value of a fixed size qb64 primitive whose code is code_size characters"""
+    # Zeroing the code leaves the pad bytes in front of the raw value
+    return base64.urlsafe_b64decode("A" * code_size + qb64[code_size:])[code_size:]
+
+
+def event_raw(event: Dict) -> bytes:
+    """The signed serialization of a JSON key event"""
+    ked = {label: value for label, value in event.items() if label not in ATTACHMENT_FIELDS}
+    return json.dumps(ked, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def decode_indexed_signature(sig: Any, keys: List[str]) -> Tuple[int, bytes, bytes]:
+    """
+    Resolve an indexed signature to the key it claims to be made with
+    
+    Returns:
+        (key index, raw verification key, raw signature)
+    
+    Raises:
+        ValueError for unsupported or malformed material
+    """
+    if (not isinstance(sig, str) or len(sig) != ED25519_INDEXED_SIG_LENGTH or
+            sig[0] not in ED25519_INDEXED_SIG_CODES):
+        raise ValueError(f"unsupported signature '{str(sig)[:8]}...'")
+    index = B64_ALPHABET.find(sig[1])
+    if index < 0 or index >= len(keys):
+        raise ValueError(f"signature index {index} has no signing key")
+    key = keys[index]
+    if (not isinstance(key, str) or len(key) != ED25519_VERKEY_LENGTH or
+            key[0] not in ED25519_VERKEY_CODES):
+        raise ValueError(f"unsupported signing key '{str(key)[:8]}...'")
+    return index, qb64_raw(key, 1), qb64_raw(sig, 2)
+
+
+def threshold_met(threshold: Any, signers: Set[int]) -> bool:
+    """
+    Do the key indices in signers satisfy a KERI signing threshold
+    
+    Numeric thresholds are hex counts; weighted thresholds are a list of
+    fractions, or a list of such clauses that must each sum to at least 1.
+    """
+    if isinstance(threshold, list):
+        clauses = threshold if threshold and all(isinstance(c, list) for c in threshold) else [threshold]
+        offset = 0
+        try:
+            for clause in clauses:
+                weight = sum(Fraction(w) for i, w in enumerate(clause) if offset + i in signers)
+                if weight < 1:
+                    return False
+                offset += len(clause)
+        except (TypeError, ValueError, ZeroDivisionError):
+            return False
+        return True
+    
+    try:
+        required = kel_parsing.parse_sn(threshold)
+    except (TypeError, ValueError):
+        return False
+    return len(signers) >= max(1, required)
+
+
+@dataclass
+class SignedEvent:
+    """One event, its signatures and receipts, and the key state that must have made them"""
+    pre: str
+    sn: Any
+    ilk: str
+    digest: str
+    raw: bytes
+    keys: List[str]
+    threshold: Any
+    sigs: List[Any]
+    witnesses: List[str] = field(default_factory=list)
+    toad: Any = None
+    receipts: List[Any] = field(default_factory=list)
+    # Rotations: next key digests and threshold of the prior establishment event
+    prior_next: Optional[List[str]] = None
+    prior_next_threshold: Any = None
+    # Why the event is invalid whatever its signatures, or cannot be checked
+    error: Optional[str] = None
+    unchecked: Optional[str] = None
+    
+    @property
+    def key(self) -> Tuple[str, str, str]:
+        """What verifier outcomes are keyed by: claimed digests may repeat"""
+        return (self.pre, str(self.sn), self.digest)
+
+
+@dataclass
+class KelState:
+    """Keys, threshold, next key digests, witnesses and TOAD in force after an event"""
+    keys: List[str] = field(default_factory=list)
+    threshold: Any = None
+    witnesses: List[str] = field(default_factory=list)
+    toad: Any = None
+    next_digests: List[str] = field(default_factory=list)
+    next_threshold: Any = None
+    
+    def apply(self, event: Dict) -> "KelState":
+        """State after event; only establishment events change it"""
+        if event.get('t') not in keri_rules.ESTABLISHMENT_ILKS:
+            return self
+        if 'b' in event:
+            witnesses = list(event.get('b') or [])
+        else:
+            # Rotations cut ('br') and add ('ba') witnesses
+            cuts = set(event.get('br') or [])
+            witnesses = [w for w in self.witnesses if w not in cuts] + list(event.get('ba') or [])
+        return KelState(
+            keys=list(event.get('k') or []),
+            threshold=event.get('kt'),
+            witnesses=witnesses,
+            toad=event.get('bt', self.toad),
+            next_digests=list(event.get('n') or []),
+            next_threshold=event.get('nt')
+        )
+
+
+def kel_signed_events(
+    events: List[Dict],
+    indices: Optional[Iterable[int]] = None,
+    state: Optional[KelState] = None,
+    start: int = 0
+) -> List[SignedEvent]:
+    """
+    Signed events for events[i], i in indices (default: every event)
+    
+    One forward pass that carries the keys, threshold, next key
+    digests, witnesses and TOAD of the latest establishment event, so
+    interaction events get the ones in force and rotations the next keys
+    they must reveal. Pass the state in force before events[start] to
+    begin the pass there instead of at inception.
+    
+    Each returned event's SAID is recomputed; the key state is only as
+    good as the establishment events among indices.
+    """
+    wanted = None if indices is None else set(indices)
+    stop = len(events) if wanted is None else min(len(events), max(wanted, default=-1) + 1)
+    state = state or KelState()
+    signed = []
+    for idx in range(start, stop):
+        event = events[idx]
+        if not isinstance(event, dict):
+            continue
+        prior, state = state, state.apply(event)
+        if wanted is None or idx in wanted:
+            rotation = event.get('t') in keri_rules.ROTATION_ILKS
+            error, unchecked = event_said_error(event)
+            signed.append(SignedEvent(
+                pre=event.get('i', ''),
+                sn=event.get('s'),
+                ilk=event.get('t', ''),
+                digest=event.get('d', ''),
+                raw=event_raw(event),
+                keys=state.keys,
+                threshold=state.threshold,
+                sigs=event.get(SIGS_FIELD) or [],
+                witnesses=state.witnesses,
+                toad=state.toad,
+                receipts=event.get(RECEIPTS_FIELD) or [],
+                prior_next=prior.next_digests if rotation else None,
+                prior_next_threshold=prior.next_threshold if rotation else None,
+                error=error,
+                unchecked=unchecked
+            ))
+    return signed
+
+
+class SignatureVerifier:
+    """
+    Batched Ed25519 verification of key event signatures
+    
+    verify() takes every signed event of a verification, or of a whole
+    batch of verifications, resolves each indexed signature to its key
+    and checks all of them in one go: small sets in-process, larger sets
+    split into chunks on a process pool, so the checks run on every core
+    and never hold the event loop.
+    
+    An event's SAID is recomputed before its digest is trusted, and a
+    rotation's signing keys must be the ones committed to by the prior
+    establishment event's next key digests (pre-rotation).
+    
+    An event whose signatures met its threshold is remembered by digest,
+    with a fingerprint of the signed bytes and the key state they were
+    checked against, and is not checked again.
+    """
+    
+    def __init__(self, workers: int, batch_min: int, batch_size: int, max_entries: int):
+        """
+        Args:
+            workers: worker processes; 0 checks everything in-process
+            batch_min: fewer signatures than this are checked in-process
+            batch_size: most signatures sent to a worker at once
+            max_entries: verified event digests remembered
+        """
+        self.workers = workers
+        self.batch_min = batch_min
+        self.batch_size = batch_size
+        self.max_entries = max_entries
+        # Event digest -> fingerprint of the serialization that verified
+        self.verified: "OrderedDict[str, bytes]" = OrderedDict()
+        self.pool: Optional[ProcessPoolExecutor] = None
+        self.cache_hits = 0
+        self.valid_events = 0
+        self.invalid_events = 0
+        self.unsigned_events = 0
+        self.inline_checks = 0
+        self.pool_checks = 0
+        self.pool_failures = 0
+    
+    @property
+    def available(self) -> bool:
+        return ed25519_verify is not None
+    
+    def _pool(self) -> ProcessPoolExecutor:
+        if self.pool is None:
+            self.pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context(SIG_VERIFY_START_METHOD)
+            )
+        return self.pool
+    
+    def shutdown(self):
+        if self.pool is not None:
+            self.pool.shutdown(wait=False, cancel_futures=True)
+            self.pool = None
+    
+    async def check(self, triples: List[Tuple[bytes, bytes, bytes]]) -> List[bool]:
+        """Verify (key, message, signature) triples, in order"""
+        if self.workers <= 0 or len(triples) < self.batch_min:
+            self.inline_checks += len(triples)
+            return verify_ed25519_chunk(triples)
+        
+        # Enough chunks to keep every worker busy, none larger than batch_size
+        size = max(1, min(self.batch_size, -(-len(triples) // self.workers)))
+        chunks = [triples[i:i + size] for i in range(0, len(triples), size)]
+        loop = asyncio.get_running_loop()
+        try:
+            results = await asyncio.gather(*(
+                loop.run_in_executor(self._pool(), verify_ed25519_chunk, chunk) for chunk in chunks
+            ))
+        except BrokenProcessPool:
+            logger.warning("⚠️  Signature worker pool died, checking in-process")
+            self.pool = None
+            self.pool_failures += 1
+            self.inline_checks += len(triples)
+            return verify_ed25519_chunk(triples)
+        self.pool_checks += len(triples)
+        return [ok for chunk in results for ok in chunk]
+    
+    async def verify(self, events: Iterable[SignedEvent]) -> Dict[Tuple[str, str, str], Dict[str, Any]]:
+        """
+        Check the signatures of events against their key state
+        
+        Invalid signatures are ignored, as keripy does; an event verifies
+        when the valid ones satisfy its threshold.
+        
+        Returns:
+            event key -> {"verified", "cached", ...}; events that could
+            not be checked (no signatures, no Ed25519 implementation) have
+            a "skipped" reason, malformed signature material an "error"
+        """
+        events = list(events)
+        outcomes: Dict[Tuple[str, str, str], Dict[str, Any]] = {}
+        sns: Dict[Tuple[str, str, str], int] = {}
+        pending: List[Tuple[SignedEvent, bytes, List[Tuple[int, int]]]] = []
+        triples: List[Tuple[bytes, bytes, bytes]] = []
+        
+        for event in events:
+            if event.key in outcomes:
+                continue
+            if event.error:
+                self.invalid_events += 1
+                outcomes[event.key] = {"verified": False, "cached": False, "error": event.error}
+                continue
+            try:
+                sns[event.key] = kel_parsing.parse_sn(event.sn)
+            except ValueError:
+                self.invalid_events += 1
+                outcomes[event.key] = {"verified": False, "cached": False,
+                                       "error": f"invalid sequence number {event.sn!r}"}
+                continue
+            
+            fingerprint = hashlib.blake2b(event.raw, digest_size=16)
+            fingerprint.update(json.dumps(
+                [event.keys, event.threshold, event.prior_next, event.prior_next_threshold]
+            ).encode("utf-8"))
+            fingerprint = fingerprint.digest()
+            if self.verified.get(event.digest) == fingerprint:
+                self.verified.move_to_end(event.digest)
+                self.cache_hits += 1
+                outcomes[event.key] = {"verified": True, "cached": True}
+                continue
+            
+            skipped = None
+            if event.unchecked:
+                skipped = event.unchecked
+            elif not event.sigs:
+                skipped = "no signatures attached"
+            elif not self.available:
+                skipped = "no Ed25519 implementation installed (pysodium or cryptography)"
+            if skipped:
+                self.unsigned_events += 1
+                outcomes[event.key] = {"verified": False, "cached": False, "skipped": skipped}
+                continue
+            
+            try:
+                decoded = [decode_indexed_signature(sig, event.keys) for sig in event.sigs]
+            except ValueError as e:
+                self.invalid_events += 1
+                outcomes[event.key] = {"verified": False, "cached": False, "error": str(e)}
+                continue
+            
+            checks = []
+            for sig, (index, key, raw_sig) in zip(event.sigs, decoded):
+                checks.append((index, len(triples), sig[0] == 'A'))
+                triples.append((key, event.raw, raw_sig))
+            pending.append((event, fingerprint, checks))
+        
+        results = await self.check(triples) if triples else []
+        for event, fingerprint, checks in pending:
+            signers = sorted({index for index, position, _ in checks if results[position]})
+            invalid = sorted({index for index, position, _ in checks if not results[position]})
+            verified = threshold_met(event.threshold, set(signers))
+            rotation_error = None
+            if verified and event.prior_next is not None:
+                # Current-only ('B') signatures do not count towards the prior next threshold
+                dual = {index for index, position, both in checks if results[position] and both}
+                if not next_key_digest_met(event.keys, dual, event.prior_next, event.prior_next_threshold):
+                    verified = False
+                    rotation_error = "rotation keys do not satisfy the prior event's next key digests (pre-rotation)"
+            outcomes[event.key] = {
+                "verified": verified,
+                "cached": False,
+                "signers": signers,
+                "invalid_signatures": invalid,
+                "threshold": event.threshold
+            }
+            if rotation_error:
+                outcomes[event.key]["error"] = rotation_error
+        
+        # Key state after an invalid establishment event is the attacker's:
+        # nothing later in that KEL verifies
+        broken: Dict[str, Tuple[int, str]] = {}
+        for event in events:
+            outcome = outcomes[event.key]
+            if (event.key in sns and event.ilk in keri_rules.INCEPTION_ILKS + keri_rules.ROTATION_ILKS and
+                    not outcome["verified"] and "skipped" not in outcome):
+                sn = sns[event.key]
+                if event.pre not in broken or sn < broken[event.pre][0]:
+                    broken[event.pre] = (sn, event.ilk)
+        for event in events:
+            if event.pre in broken and sns.get(event.key, -1) > broken[event.pre][0]:
+                sn, ilk = broken[event.pre]
+                outcomes[event.key] = {
+                    "verified": False,
+                    "cached": False,
+                    "error": f"follows the invalid {ilk} at sn {sn}"
+                }
+        
+        for event, fingerprint, _ in pending:
+            if outcomes[event.key]["verified"]:
+                self._remember(event.digest, fingerprint)
+                self.valid_events += 1
+            else:
+                self.invalid_events += 1
+        return outcomes
+    
+    def _remember(self, digest: str, fingerprint: bytes):
+        self.verified[digest] = fingerprint
+        self.verified.move_to_end(digest)
+        while len(self.verified) > self.max_entries:
+            self.verified.popitem(last=False)
+    
+    def clear(self):
+        self.verified.clear()
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "mode": SIG_VERIFY_MODE,
+            "backend": ED25519_BACKEND,
+            "workers": self.workers,
+            "pool_running": self.pool is not None,
+            "batch_min": self.batch_min,
+            "batch_size": self.batch_size,
+            "cached_events": len(self.verified),
+            "max_entries": self.max_entries,
+            "cache_hits": self.cache_hits,
+            "valid_events": self.valid_events,
+            "invalid_events": self.invalid_events,
+            "unsigned_events": self.unsigned_events,
+            "inline_checks": self.inline_checks,
+            "pool_checks": self.pool_checks,
+            "pool_failures": self.pool_failures
+        }
+
+
+signature_verifier = SignatureVerifier(SIG_VERIFY_WORKERS, SIG_BATCH_MIN, SIG_BATCH_SIZE, SIG_CACHE_MAX_ENTRIES)
+
+
+def delegation_signed_events(
+    agent_kel: Dict,
+    controller_kel: Dict,
+    seal_event_index: Optional[int]
+) -> Tuple[List[SignedEvent], Optional[str]]:
+    """
+    Signed events a delegation rests on
+    
+    The agent's delegated inception, and from the controller KEL the
+    event anchoring the delegation seal plus every establishment event
+    before it, which establish the keys that signed the anchor.
+    Interaction events in between change no keys and are not needed.
+    
+    Returns:
+        (events, None), or ([], reason) when those events are not held
+    """
+    agent_events = kel_parsing.extract_events(agent_kel) or []
+    if not agent_events or not isinstance(agent_events[0], dict):
+        return [], "agent inception event not held"
+    
+    controller_events = kel_parsing.extract_events(controller_kel) or []
+    if seal_event_index is None or seal_event_index >= len(controller_events):
+        return [], "anchoring event not held (controller KEL was streamed)"
+    
+    anchors = [
+        idx for idx in range(seal_event_index)
+        if isinstance(controller_events[idx], dict) and controller_events[idx].get('t') in keri_rules.ESTABLISHMENT_ILKS
+    ]
+    anchors.append(seal_event_index)
+    return kel_signed_events(agent_events, [0]) + kel_signed_events(controller_events, anchors), None
+
+
+def check_delegation_events(
+    signed: List[SignedEvent],
+    outcomes: Dict[Tuple[str, str, str], Dict[str, Any]],
+    unavailable: Optional[str],
+    mode: str,
+    failure: str
+) -> Tuple[bool, Dict[str, Any]]:
+    """
+    Judge a delegation's events from per-digest verifier outcomes
+    
+    Args:
+        signed: the delegation's events (delegation_signed_events)
+        outcomes: event key -> {"verified", ...} from a verifier
+        unavailable: why the events are not at hand, if they are not
+        mode: the stage's 'auto' / 'required' setting
+        failure: how failed events are described in the error
+    
+    Returns:
+        (ok, details): ok is False when an event failed, or when events
+        could not be checked and mode is 'required'
+    """
+    required = mode == 'required'
+    if unavailable:
+        return not required, {"verified": False, "skipped": unavailable}
+    
+    events = []
+    for event in signed:
+        outcome = outcomes.get(event.key, {"verified": False, "error": "not checked"})
+        events.append({
+            "aid": event.pre,
+            "sequence": event.sn,
+            "event_type": event.ilk,
+            "digest": event.digest[:20] + "...",
+            **outcome
+        })
+    
+    failed = [e for e in events if not e["verified"] and "skipped" not in e]
+    skipped = [e for e in events if "skipped" in e]
+    details = {
+        "verified": not failed and not skipped,
+        "events_checked": len(events),
+        "cached": sum(1 for e in events if e.get("cached")),
+        "events": events
+    }
+    if failed:
+        details["error"] = (
+            f"{len(failed)} event(s) {failure}: " +
+            ", ".join(f"{e['event_type']} sn {e['sequence']} of {e['aid'][:12]}..." for e in failed)
+        )
+    elif skipped:
+        details["skipped"] = skipped[0]["skipped"]
+    return not failed and (not skipped or not required), details
+
+
+def check_delegation_signatures(
+    signed: List[SignedEvent],
+    outcomes: Dict[Tuple[str, str, str], Dict[str, Any]],
+    unavailable: Optional[str] = None
+) -> Tuple[bool, Dict[str, Any]]:
+    """Judge a delegation's events from signature_verifier outcomes"""
+    return check_delegation_events(
+        signed, outcomes, unavailable, SIG_VERIFY_MODE, "without a valid signature threshold"
+    )
+
+
+async def verify_delegation_signatures(
+    signed: List[SignedEvent],
+    unavailable: Optional[str] = None
+) -> Tuple[bool, Dict[str, Any]]:
+    """Signature stage for one delegation's delegation_signed_events()"""
+    if SIG_VERIFY_MODE == 'off':
+        return True, {"verified": False, "skipped": "disabled (SIG_VERIFY_MODE=off)"}
+    outcomes = await signature_verifier.verify(signed) if signed else {}
+    return check_delegation_signatures(signed, outcomes, unavailable)
+
+
+metrics.registry.register(metrics.CallbackMetric(
+    "verifier_signature_events_total",
+    "Signed events checked, by outcome ('cached' when the digest was already verified)",
+    lambda: {
+        "valid": signature_verifier.valid_events,
+        "invalid": signature_verifier.invalid_events,
+        "cached": signature_verifier.cache_hits
+    },
+    kind="counter",
+    labels=("result",)
+))
+metrics.registry.register(metrics.CallbackMetric(
+    "verifier_signatures_checked_total",
+    "Ed25519 signature checks by where they ran",
+    lambda: {"inline": signature_verifier.inline_checks, "pool": signature_verifier.pool_checks},
+    kind="counter",
+    labels=("where",)
+))
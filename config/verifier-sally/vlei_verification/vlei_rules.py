@@ -0,0 +1,74 @@
+"""
+vLEI Credential Rules
+
+The credential types of the vLEI ecosystem, known by schema SAID, and
+the rules a credential chain must follow, shared by the verification
+service and Sally's agent verifier (custom_sally) so both check chains
+the same way.
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+
+
+QVI = "QVI"
+LE = "LE"
+OOR_AUTH = "OOR Auth"
+OOR = "OOR"
+ECR_AUTH = "ECR Auth"
+ECR = "ECR"
+
+# vLEI schema SAID -> credential type
+VLEI_TYPES = {
+    "EBfdlu8R27Fbx-ehrqwImnK-8Cm79sqbAQ4MmvEAYqao": QVI,
+    "ENPXp1vQzRF6JwIuS-mp2U8Uf1MoADoP_GqQ62VsDZWY": LE,
+    "EKA57bKBKxr_kN7iN5i7lMUxpMG-s19dRcmov1iDxz-E": OOR_AUTH,
+    "EBNaNu-M9P5cgrnfl2Fvymy4E_jvxxyjb70PRtiANlJy": OOR,
+    "EH6ekLjSr8V32WyFbGe1zXjTzFs9PkTYmupJ9H65O14g": ECR_AUTH,
+    "EEy9PkikFcANV1l7EHukCeXqrzT1hNZjGlUk7wuMO5jw": ECR,
+}
+
+# Types of an OOR holder's chain, leaf first; each credential's one edge
+# points to the next and the QVI credential is issued by GLEIF (GEDA)
+OOR_CHAIN = (OOR, OOR_AUTH, LE, QVI)
+
+# TEL event types of an issued and of a revoked credential
+ISSUED_ILKS = ("iss", "bis")
+REVOKED_ILKS = ("rev", "brv")
+
+
+def credential_edges(sad: Dict[str, Any]) -> List[Tuple[str, Dict[str, Any]]]:
+    """
+    (name, edge) pairs of an ACDC edge section that point to a credential
+
+    Skips the section's own SAID ('d') and anything without a node SAID.
+    """
+    edges = sad.get("e")
+    if not isinstance(edges, dict):
+        return []
+    return [
+        (name, edge) for name, edge in edges.items()
+        if name != "d" and isinstance(edge, dict) and edge.get("n")
+    ]
+
+
+def edge_error(sad: Dict[str, Any], name: str, edge: Dict[str, Any], node: Dict[str, Any]) -> Optional[str]:
+    """
+    Why a chained credential does not satisfy the edge pointing to it
+
+    The node must have the schema the edge names and, unless the edge
+    operator is NI2I, be issued to the issuer of the credential.
+
+    Returns:
+        None if it does, else the error
+    """
+    if edge.get("s") and node.get("s") != edge["s"]:
+        return (
+            f"Edge '{name}' of {sad.get('d')} expects schema {edge['s']}, "
+            f"{node.get('d')} has {node.get('s')}"
+        )
+    if edge.get("o", "I2I") != "NI2I" and (node.get("a") or {}).get("i") != sad.get("i"):
+        return (
+            f"Edge '{name}' of {sad.get('d')}: issuer {sad.get('i')} "
+            f"is not the issuee of {node.get('d')}"
+        )
+    return None